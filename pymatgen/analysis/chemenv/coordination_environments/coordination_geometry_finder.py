@@ -17,8 +17,11 @@ __email__ = "david.waroquiers@gmail.com"
 __date__ = "Feb 20, 2016"
 
 import itertools
+import json
 import logging
+import os
 import time
+from monty.json import jsanitize
 
 from numpy.linalg import svd
 from numpy.linalg import norm
@@ -307,6 +310,67 @@ def find_scaling_factor(points_distorted, points_perfect, rot):
     return num / denom, rotated_coords
 
 
+def symmetry_measures(points_distorted, points_perfect):
+    """
+    Computes the continuous symmetry measures of a stack of (distorted) sets of points "points_distorted" with
+    respect to the (perfect) set of points "points_perfect". This is the batched equivalent of symmetry_measure,
+    typically used to evaluate all the permutations of a given coordination geometry at once.
+    :param points_distorted: Array of shape (n_permutations, n_points, 3) containing the sets of points describing
+                             the (distorted) polyhedra for which the symmetry measures have to be computed with
+                             respect to the model polyhedron described by "points_perfect".
+    :param points_perfect: Array of shape (n_points, 3) of "perfect" points describing a given model polyhedron.
+    :return: Array of the continuous symmetry measures of each distorted polyhedron with respect to the perfect
+             polyhedron
+    """
+    points_distorted = np.array(points_distorted, np.float)
+    points_perfect = np.array(points_perfect, np.float)
+    # When there is only one point, the symmetry measure is 0.0 by definition
+    if points_distorted.shape[1] == 1:
+        return np.zeros(len(points_distorted), np.float)
+    rots = find_rotations(points_distorted=points_distorted,
+                          points_perfect=points_perfect)
+    scaling_factors, rotated_coords = find_scaling_factors(
+        points_distorted=points_distorted,
+        points_perfect=points_perfect,
+        rots=rots)
+    diff = points_perfect - scaling_factors[:, None, None] * rotated_coords
+    num = np.einsum('nij,nij->n', diff, diff)
+    denom = np.sum(points_perfect * points_perfect)
+    return num / denom * 100.0
+
+
+def find_rotations(points_distorted, points_perfect):
+    """
+    This finds the rotation matrices that align each (distorted) set of points of the stack "points_distorted" with
+    respect to the (perfect) set of points "points_perfect" in a least-square sense (batched Kabsch algorithm).
+    :param points_distorted: Array of shape (n_permutations, n_points, 3) of (distorted) sets of points.
+    :param points_perfect: Array of shape (n_points, 3) of "perfect" points describing a given model polyhedron.
+    :return: Array of shape (n_permutations, 3, 3) of rotation matrices
+    """
+    H = np.einsum('nki,kj->nij', points_distorted, points_perfect)
+    U, S, Vt = svd(H)
+    rots = np.einsum('nji,nkj->nik', Vt, U)
+    # Sets of points that are already aligned with the perfect points are not rotated
+    isexact = np.all(np.isclose(points_distorted, points_perfect), axis=(1, 2))
+    rots[isexact] = np.eye(3)
+    return rots
+
+
+def find_scaling_factors(points_distorted, points_perfect, rots):
+    """
+    This finds the scaling factors between each (distorted) set of points of the stack "points_distorted" and the
+    (perfect) set of points "points_perfect" in a least-square sense.
+    :param points_distorted: Array of shape (n_permutations, n_points, 3) of (distorted) sets of points.
+    :param points_perfect: Array of shape (n_points, 3) of "perfect" points describing a given model polyhedron.
+    :param rots: Array of shape (n_permutations, 3, 3) of rotation matrices
+    :return: The scaling factors between the structures and the rotated sets of (distorted) points.
+    """
+    rotated_coords = np.einsum('nij,nkj->nki', rots, points_distorted)
+    num = np.einsum('nki,ki->n', rotated_coords, points_perfect)
+    denom = np.einsum('nki,nki->n', rotated_coords, rotated_coords)
+    return num / denom, rotated_coords
+
+
 class LocalGeometryFinder(object):
     """
     Main class used to find the local environments in a structure
@@ -448,12 +512,22 @@ class LocalGeometryFinder(object):
                                                         no_valence_exclude_atoms_fallback=None,
                                                         maximum_distance_factor=None,
                                                         minimum_angle_factor=None,
-                                                        max_cn=None):
+                                                        max_cn=None,
+                                                        ncpus=None,
+                                                        checkpoint_file=None,
+                                                        shared_voronoi_tessellation=False):
         """
         Computes and returns the StructureEnvironments object containing all the information about the coordination
         environments in the structure
         :param excluded_atoms: Atoms for which the coordination geometries does not have to be identified
         :param only_atoms: If not set to None, atoms for which the coordination geometries have to be identified
+        :param ncpus: Number of cpus to use. Default of None means serial computation. Otherwise, the (independent)
+                      unequivalent sites are distributed over a multiprocessing pool of ncpus processes.
+        :param checkpoint_file: If not None, the environments of each site are appended to this file as soon as they
+                                are computed. When the file already exists (e.g. from an interrupted computation on
+                                the same structure), the sites it contains are not computed again.
+        :param shared_voronoi_tessellation: If set to True, the Voronoi of all the sites is obtained from a single
+                                            tessellation (see DetailedVoronoiContainer).
         :return: The StructureEnvironments object containing all the information about the coordination
         environments in the structure
         """
@@ -475,28 +549,19 @@ class LocalGeometryFinder(object):
                 self.structure_refinement == self.STRUCTURE_REFINEMENT_SYMMETRIZED and
                 len(self.symmetrized_structure.equivalent_sites) > 0):
             logging.info('Symmetrizing and refining structure')
-            indices = []
-            ind_eqsites_found = []
             self.equivalent_sites = self.symmetrized_structure.equivalent_sites
             self.struct_sites_to_irreducible_site_list_map = [-1] * len(
                 self.structure)
             self.sites_map = [-1] * len(self.structure)
-            eqsite_found = [-1] * len(
-                self.symmetrized_structure.equivalent_sites)
-            for isite, site in enumerate(self.structure):
-                for ieqsites, eqsites in enumerate(
-                        self.symmetrized_structure.equivalent_sites):
-                    if site in eqsites:
-                        self.struct_sites_to_irreducible_site_list_map[
-                            isite] = ieqsites
-                        if ieqsites not in ind_eqsites_found:
-                            indices.append(isite)
-                            ind_eqsites_found.append(ieqsites)
-                            myieqsite = isite
-                            eqsite_found[ieqsites] = myieqsite
-                        else:
-                            myieqsite = eqsite_found[ieqsites]
-                self.sites_map[isite] = myieqsite
+            # The equivalent indices of each group are sorted, the first one is used as the irreducible site
+            for ieqsites, eqindices in enumerate(
+                    self.symmetrized_structure.equivalent_indices):
+                for isite in eqindices:
+                    self.struct_sites_to_irreducible_site_list_map[
+                        isite] = ieqsites
+                    self.sites_map[isite] = eqindices[0]
+            indices = sorted([eqindices[0] for eqindices in
+                              self.symmetrized_structure.equivalent_indices])
         else:
             self.equivalent_sites = [[site] for site in self.structure]
             self.struct_sites_to_irreducible_site_list_map = list(
@@ -558,60 +623,80 @@ class LocalGeometryFinder(object):
                                                          isites=sites_indices,
                                                          valences=self.valences,
                                                          maximum_distance_factor=maximum_distance_factor,
-                                                         minimum_angle_factor=minimum_angle_factor)
+                                                         minimum_angle_factor=minimum_angle_factor,
+                                                         shared_tessellation=shared_voronoi_tessellation)
         logging.info('DetailedVoronoiContainer has been set up')
 
+        ce_dicts = {}
+        if checkpoint_file is not None:
+            # All the parameters that affect the environments computed for the sites
+            checkpoint_parameters = {'max_cn': max_cn,
+                                     'excluded_atoms': excluded_atoms,
+                                     'only_atoms': only_atoms,
+                                     'only_cations': only_cations,
+                                     'only_indices': only_indices,
+                                     'maximum_distance_factor': maximum_distance_factor,
+                                     'minimum_angle_factor': minimum_angle_factor,
+                                     'shared_voronoi_tessellation': shared_voronoi_tessellation,
+                                     'valences': self.valences,
+                                     'centering_type': self.centering_type,
+                                     'include_central_site_in_centroid': self.include_central_site_in_centroid,
+                                     'bva_distance_scale_factor': self.bva_distance_scale_factor,
+                                     'structure_refinement': self.structure_refinement,
+                                     'spg_analyzer_options': self.spg_analyzer_options,
+                                     'permutations_safe_override': self.permutations_safe_override,
+                                     'plane_ordering_override': self.plane_ordering_override,
+                                     'plane_safe_permutations': self.plane_safe_permutations}
+            ce_dicts = self._read_checkpoint(checkpoint_file, checkpoint_parameters)
+            if len(ce_dicts) > 0:
+                logging.info('Resuming from {:d} sites found in checkpoint '
+                             'file "{}"'.format(len(ce_dicts), checkpoint_file))
         ce_list = []
         skipped = []
-        logging.info('Computing structure environments')
-        tse1 = time.clock()
+        todo = []
+        sites_indices_set = set(sites_indices)
         for isite in range(len(self.structure)):
-            if isite not in sites_indices:
+            if isite not in sites_indices_set:
                 logging.info(' ... in site #{:d} ({}) : skipped'.format(isite,
                                                                         self.structure[
                                                                             isite].species_string))
                 skipped.append(isite)
-                ce_list.append(None)
-                continue
-            logging.info(' ... in site #{:d} ({})'.format(isite, self.structure[
-                isite].species_string))
-            t1 = time.clock()
-            coords = self.detailed_voronoi.unique_coordinations(isite)
-
-            ce_dict = {}
-            for cn in coords:
-                if max_cn is not None and cn > max_cn:
-                    continue
-                ce_dict[cn] = []
-                for i_nlist, nlist_tuple in enumerate(coords[cn]):
-                    neighb_list = nlist_tuple[0]
-                    ce = ChemicalEnvironments()
-                    mycoords = [st.coords for st in neighb_list]
-                    self.setup_local_geometry(isite, coords=mycoords)
-                    cncgsm = self.get_coordination_symmetry_measures()
-                    for cg in cncgsm:
-                        other_csms = {
-                            'csm_wocs_ctwocc': cncgsm[cg]['csm_wocs_ctwocc'],
-                            'csm_wocs_ctwcc': cncgsm[cg]['csm_wocs_ctwcc'],
-                            'csm_wocs_csc': cncgsm[cg]['csm_wocs_csc'],
-                            'csm_wcs_ctwocc': cncgsm[cg]['csm_wcs_ctwocc'],
-                            'csm_wcs_ctwcc': cncgsm[cg]['csm_wcs_ctwcc'],
-                            'csm_wcs_csc': cncgsm[cg]['csm_wcs_csc'],}
-                        ce.add_coord_geom(cg, cncgsm[cg]['csm'],
-                                          algo=cncgsm[cg]['algo'],
-                                          permutation=cncgsm[cg]['indices'],
-                                          local2perfect_map=cncgsm[cg][
-                                              'local2perfect_map'],
-                                          perfect2local_map=cncgsm[cg][
-                                              'perfect2local_map'],
-                                          detailed_voronoi_index={'cn': cn,
-                                                                  'index': i_nlist},
-                                          other_symmetry_measures=other_csms
-                                          )
-                    ce_dict[cn].append(ce)
-            t2 = time.clock()
-            logging.info('    ... computed in {:.2f} seconds'.format(t2 - t1))
-            ce_list.append(ce_dict)
+            elif isite not in ce_dicts:
+                todo.append((isite, self._get_neighbors_coords(isite, max_cn)))
+
+        logging.info('Computing structure environments')
+        tse1 = time.clock()
+        checkpoint = None
+        if checkpoint_file is not None:
+            checkpoint = self._open_checkpoint(checkpoint_file, checkpoint_parameters)
+        pool = None
+        if ncpus and len(todo) > 1:
+            import multiprocessing as mp
+            # The finder is sent once to each process instead of once per site
+            pool = mp.Pool(ncpus, initializer=_init_pool_finder, initargs=(self,))
+        try:
+            if pool:
+                results = pool.imap_unordered(_compute_site_environments, todo)
+            else:
+                results = ((isite, self.compute_site_environments(isite, nb_coords))
+                           for isite, nb_coords in todo)
+            for isite, ce_dict in results:
+                ce_dicts[isite] = ce_dict
+                if checkpoint is not None:
+                    checkpoint.write(json.dumps(
+                        {'isite': isite,
+                         'ce_dict': {str(cn): [ce.as_dict() for ce in ce_dict[cn]]
+                                     for cn in ce_dict}}) + '\n')
+                    checkpoint.flush()
+        finally:
+            if pool:
+                pool.close()
+                pool.join()
+            if checkpoint is not None:
+                checkpoint.close()
+        for isite in range(len(self.structure)):
+            ce_list.append(ce_dicts[isite] if isite in sites_indices_set
+                           else None)
         tse2 = time.clock()
         logging.info('Structure environments computed in {:.2f} seconds'.format(
             tse2 - tse1))
@@ -619,6 +704,127 @@ class LocalGeometryFinder(object):
                                      self.sites_map, self.equivalent_sites,
                                      ce_list, self.structure)
 
+    def __getstate__(self):
+        # The detailed voronoi container is only needed to set up the neighbors of each site, it is not sent to the
+        # processes of the multiprocessing pool
+        d = dict(self.__dict__)
+        d.pop('detailed_voronoi', None)
+        return d
+
+    def _get_neighbors_coords(self, isite, max_cn=None):
+        """
+        Returns the coordinates of the neighbors of site isite for each list of neighbors of the detailed voronoi
+        container.
+        :param isite: Index of the site
+        :param max_cn: Coordination numbers above max_cn are discarded
+        :return: Dictionary with the coordination numbers as keys and the lists of coordinates of the neighbors as values
+        """
+        coords = self.detailed_voronoi.unique_coordinations(isite)
+        return {cn: [[st.coords for st in nlist_tuple[0]] for nlist_tuple in coords[cn]]
+                for cn in coords if max_cn is None or cn <= max_cn}
+
+    def compute_site_environments(self, isite, neighbors_coords):
+        """
+        Computes the chemical environments of site isite for each list of neighbors.
+        :param isite: Index of the site
+        :param neighbors_coords: Dictionary with the coordination numbers as keys and the lists of coordinates of
+                                 the neighbors as values
+        :return: Dictionary with the coordination numbers as keys and the lists of ChemicalEnvironments as values
+        """
+        logging.info(' ... in site #{:d} ({})'.format(isite, self.structure[
+            isite].species_string))
+        t1 = time.clock()
+        ce_dict = {}
+        for cn in neighbors_coords:
+            ce_dict[cn] = []
+            for i_nlist, mycoords in enumerate(neighbors_coords[cn]):
+                ce = ChemicalEnvironments()
+                self.setup_local_geometry(isite, coords=mycoords)
+                cncgsm = self.get_coordination_symmetry_measures()
+                for cg in cncgsm:
+                    other_csms = {
+                        'csm_wocs_ctwocc': cncgsm[cg]['csm_wocs_ctwocc'],
+                        'csm_wocs_ctwcc': cncgsm[cg]['csm_wocs_ctwcc'],
+                        'csm_wocs_csc': cncgsm[cg]['csm_wocs_csc'],
+                        'csm_wcs_ctwocc': cncgsm[cg]['csm_wcs_ctwocc'],
+                        'csm_wcs_ctwcc': cncgsm[cg]['csm_wcs_ctwcc'],
+                        'csm_wcs_csc': cncgsm[cg]['csm_wcs_csc'],}
+                    ce.add_coord_geom(cg, cncgsm[cg]['csm'],
+                                      algo=cncgsm[cg]['algo'],
+                                      permutation=cncgsm[cg]['indices'],
+                                      local2perfect_map=cncgsm[cg][
+                                          'local2perfect_map'],
+                                      perfect2local_map=cncgsm[cg][
+                                          'perfect2local_map'],
+                                      detailed_voronoi_index={'cn': cn,
+                                                              'index': i_nlist},
+                                      other_symmetry_measures=other_csms
+                                      )
+                ce_dict[cn].append(ce)
+        t2 = time.clock()
+        logging.info('    ... computed in {:.2f} seconds'.format(t2 - t1))
+        return ce_dict
+
+    def _checkpoint_header(self, parameters):
+        return {'structure': self.structure.as_dict(),
+                'parameters': json.loads(json.dumps(jsanitize(parameters)))}
+
+    def _read_checkpoint(self, checkpoint_file, parameters):
+        """
+        Reads the environments of the sites already computed from a checkpoint file. The first line of the file
+        identifies the computation, each following line contains the environments of one site. An incomplete last
+        line (interrupted while writing) is ignored.
+        :param checkpoint_file: Path to the checkpoint file
+        :param parameters: Dictionary with the parameters of the computation
+        :return: Dictionary with the site indices as keys and the dictionaries of ChemicalEnvironments as values
+        :raise: ValueError if the checkpoint file has been written for another computation
+        """
+        ce_dicts = {}
+        if not os.path.exists(checkpoint_file):
+            return ce_dicts
+        with open(checkpoint_file, 'r') as f:
+            lines = f.readlines()
+        if len(lines) == 0:
+            return ce_dicts
+        header = json.loads(lines[0])
+        ref_header = self._checkpoint_header(parameters)
+        if header.get('parameters') != ref_header['parameters']:
+            diff = sorted(k for k in set(header.get('parameters', {})).union(ref_header['parameters'])
+                          if header.get('parameters', {}).get(k) != ref_header['parameters'].get(k))
+            raise ValueError('Checkpoint file "{}" has been written with different parameters ({})'.format(
+                checkpoint_file, ', '.join(diff)))
+        if Structure.from_dict(header['structure']) != self.structure:
+            raise ValueError('Checkpoint file "{}" does not correspond to this '
+                             'structure'.format(checkpoint_file))
+        for line in lines[1:]:
+            try:
+                d = json.loads(line)
+            except ValueError:
+                break
+            ce_dicts[d['isite']] = {
+                int(cn): [ChemicalEnvironments.from_dict(ced) for ced in ceds]
+                for cn, ceds in d['ce_dict'].items()}
+        return ce_dicts
+
+    def _open_checkpoint(self, checkpoint_file, parameters):
+        """
+        Opens the checkpoint file for appending the environments of the sites, writing the header and dropping any
+        incomplete last line first.
+        :param checkpoint_file: Path to the checkpoint file
+        :param parameters: Dictionary with the parameters of the computation
+        :return: The checkpoint file object
+        """
+        lines = []
+        if os.path.exists(checkpoint_file):
+            with open(checkpoint_file, 'r') as f:
+                lines = [line for line in f.readlines() if line.endswith('\n')]
+        if len(lines) == 0:
+            lines = [json.dumps(self._checkpoint_header(parameters)) + '\n']
+        f = open(checkpoint_file, 'w')
+        f.writelines(lines)
+        f.flush()
+        return f
+
     def setup_local_geometry(self, isite, coords):
         """
         Sets up the AbstractGeometry for the local geometry of site with index isite.
@@ -941,6 +1147,21 @@ class LocalGeometryFinder(object):
             iperm += 1
         return permutations_symmetry_measures, permutations, 'SAFE'
 
+    def _permutations_symmetry_measures(self, permutations, points_perfect):
+        """
+        Returns the symmetry measures of the local geometry with respect to the perfect points for all the given
+        permutations at once.
+        :param permutations: List of permutations of the neighbors of the local geometry
+        :param points_perfect: Points of the perfect geometry
+        :return: Array of the symmetry measures for each permutation
+        """
+        if len(permutations) == 0:
+            return np.zeros(0, np.float)
+        points = np.array(self.local_geometry.points_wocs_ctwocc(), np.float)
+        points_distorted = points[np.array(permutations, np.int)]
+        return symmetry_measures(points_distorted=points_distorted,
+                                 points_perfect=points_perfect)
+
     def coordination_geometry_symmetry_measures_standard(self,
                                                          coordination_geometry,
                                                          algo,
@@ -953,8 +1174,6 @@ class LocalGeometryFinder(object):
         :param coordination_geometry: The coordination geometry to be investigated
         :return: The symmetry measures for the given coordination geometry for each permutation investigated
         """
-        permutations_symmetry_measures = np.zeros(len(algo.permutations),
-                                                  np.float)
         permutations = list()
         algos = list()
         local2perfect_maps = list()
@@ -969,15 +1188,9 @@ class LocalGeometryFinder(object):
                 local2perfect_map[ii] = iperfect
             local2perfect_maps.append(local2perfect_map)
             perfect2local_maps.append(perfect2local_map)
-
-            points_distorted = self.local_geometry.points_wocs_ctwocc(
-                permutation=perm)
-
-            csm = symmetry_measure(points_distorted=points_distorted,
-                                   points_perfect=points_perfect)
-
-            permutations_symmetry_measures[iperm] = csm
             algos.append(str(algo))
+        permutations_symmetry_measures = self._permutations_symmetry_measures(
+            permutations, points_perfect)
         return permutations_symmetry_measures, permutations, algos, local2perfect_maps, perfect2local_maps
 
     def coordination_geometry_symmetry_measures_separation_plane(self,
@@ -1157,13 +1370,9 @@ class LocalGeometryFinder(object):
                 if testing:
                     separation_permutations.append(sep_perm)
 
-                points_distorted = self.local_geometry.points_wocs_ctwocc(
-                    permutation=pp)
-
-                csm = symmetry_measure(points_distorted=points_distorted,
-                                       points_perfect=points_perfect)
-
-                permutations_symmetry_measures.append(csm)
+            permutations_symmetry_measures = list(
+                self._permutations_symmetry_measures(permutations,
+                                                     points_perfect))
             if plane_found:
                 break
         if len(permutations_symmetry_measures) > 0:
@@ -1191,7 +1400,6 @@ class LocalGeometryFinder(object):
         :param NRANDOM: Number of random permutations to be tested
         :return: The symmetry measures for the given coordination geometry for each permutation investigated
         """
-        permutations_symmetry_measures = np.zeros(NRANDOM, np.float)
         permutations = list()
         algos = list()
         perfect2local_maps = list()
@@ -1207,11 +1415,29 @@ class LocalGeometryFinder(object):
                 l2p[pp] = i_p
             perfect2local_maps.append(p2l)
             local2perfect_maps.append(l2p)
-
-            points_distorted = self.local_geometry.points_wocs_ctwocc(
-                permutation=perm)
-            csm = symmetry_measure(points_distorted=points_distorted,
-                                   points_perfect=points_perfect)
-            permutations_symmetry_measures[iperm] = csm
             algos.append('APPROXIMATE_FALLBACK')
+        permutations_symmetry_measures = self._permutations_symmetry_measures(
+            permutations, points_perfect)
         return permutations_symmetry_measures, permutations, algos, local2perfect_maps, perfect2local_maps
+
+
+# LocalGeometryFinder used by the processes of the multiprocessing pool
+_pool_finder = None
+
+
+def _init_pool_finder(finder):
+    """
+    Initializer of the processes of the multiprocessing pool used in
+    LocalGeometryFinder.compute_structure_environments_detailed_voronoi.
+    """
+    global _pool_finder
+    _pool_finder = finder
+
+
+def _compute_site_environments(args):
+    """
+    Helper for LocalGeometryFinder.compute_structure_environments_detailed_voronoi, defined at the module
+    level so that it can be used with multiprocessing.
+    """
+    isite, neighbors_coords = args
+    return isite, _pool_finder.compute_site_environments(isite, neighbors_coords)
@@ -7,7 +7,10 @@ import unittest2
 import os
 import json
 import numpy as np
+from monty.tempfile import ScratchDir
 from pymatgen.analysis.chemenv.coordination_environments.coordination_geometry_finder import LocalGeometryFinder
+from pymatgen.analysis.chemenv.coordination_environments.coordination_geometry_finder import symmetry_measure
+from pymatgen.analysis.chemenv.coordination_environments.coordination_geometry_finder import symmetry_measures
 from pymatgen.analysis.chemenv.coordination_environments.coordination_geometries import AllCoordinationGeometries
 from pymatgen.analysis.chemenv.coordination_environments.chemenv_strategies import SimplestChemenvStrategy
 from pymatgen.analysis.chemenv.coordination_environments.chemenv_strategies import SimpleAbundanceChemenvStrategy
@@ -92,6 +95,69 @@ class CoordinationGeometryFinderTest(unittest2.TestCase):
                                                                                   maximum_distance_factor=1.5)
                     self.assertAlmostEqual(se.get_csm(0, mp_symbol)['symmetry_measure'], 0.0, 4)
 
+    def test_checkpoint(self):
+        self.lgf.setup_test_perfect_environment('O:6', randomness=False, indices=[0, 2, 3, 1, 5, 4],
+                                                random_translation='NONE', random_rotation='NONE',
+                                                random_scale='NONE')
+        with ScratchDir('.'):
+            se = self.lgf.compute_structure_environments_detailed_voronoi(only_indices=[0],
+                                                                          maximum_distance_factor=1.5,
+                                                                          checkpoint_file='se_checkpoint.json')
+            with open('se_checkpoint.json') as f:
+                self.assertEqual(len(f.readlines()), 2)
+            # The environment of site 0 is read back from the checkpoint file
+            self.lgf.compute_site_environments = None
+            se_resumed = self.lgf.compute_structure_environments_detailed_voronoi(only_indices=[0],
+                                                                                  maximum_distance_factor=1.5,
+                                                                                  checkpoint_file='se_checkpoint.json')
+            del self.lgf.compute_site_environments
+            self.assertAlmostEqual(se_resumed.get_csm(0, 'O:6')['symmetry_measure'],
+                                   se.get_csm(0, 'O:6')['symmetry_measure'])
+            self.assertEqual(se_resumed.ce_list[1], None)
+            self.assertRaises(ValueError, self.lgf.compute_structure_environments_detailed_voronoi,
+                              only_indices=[0], maximum_distance_factor=1.5, max_cn=4,
+                              checkpoint_file='se_checkpoint.json')
+            self.assertRaises(ValueError, self.lgf.compute_structure_environments_detailed_voronoi,
+                              only_indices=[0], maximum_distance_factor=1.4,
+                              checkpoint_file='se_checkpoint.json')
+            self.assertRaises(ValueError, self.lgf.compute_structure_environments_detailed_voronoi,
+                              only_indices=[0], maximum_distance_factor=1.5, minimum_angle_factor=0.1,
+                              checkpoint_file='se_checkpoint.json')
+
+    def test_ncpus(self):
+        self.lgf.setup_test_perfect_environment('O:6', randomness=False, indices=[0, 2, 3, 1, 5, 4],
+                                                random_translation='NONE', random_rotation='NONE',
+                                                random_scale='NONE')
+        se = self.lgf.compute_structure_environments_detailed_voronoi(only_indices=[0, 1],
+                                                                      maximum_distance_factor=1.5)
+        se_parallel = self.lgf.compute_structure_environments_detailed_voronoi(only_indices=[0, 1],
+                                                                               maximum_distance_factor=1.5,
+                                                                               ncpus=2)
+        self.assertAlmostEqual(se_parallel.get_csm(0, 'O:6')['symmetry_measure'],
+                               se.get_csm(0, 'O:6')['symmetry_measure'])
+        for isite in [0, 1]:
+            self.assertEqual(sorted(se_parallel.ce_list[isite].keys()), sorted(se.ce_list[isite].keys()))
+        self.assertEqual(se_parallel.ce_list[2], None)
+
+    def test_symmetry_measures(self):
+        np.random.seed(0)
+        points_perfect = np.random.random((8, 3)) - 0.5
+        points_perfect -= np.mean(points_perfect, axis=0)
+        points_distorted = points_perfect + 0.05 * (np.random.random((8, 3)) - 0.5)
+        perms = [np.random.permutation(8) for ii in range(20)]
+        perms.append(np.arange(8))
+        stack = np.array([points_distorted[perm] for perm in perms])
+        csms = symmetry_measures(points_distorted=stack, points_perfect=points_perfect)
+        self.assertEqual(csms.shape, (21,))
+        for iperm, perm in enumerate(perms):
+            csm = symmetry_measure(points_distorted=list(points_distorted[perm]),
+                                   points_perfect=list(points_perfect))
+            self.assertAlmostEqual(csms[iperm], csm, 8)
+        np.testing.assert_array_almost_equal(symmetry_measures(points_distorted=[points_perfect],
+                                             points_perfect=points_perfect), [0.0])
+        np.testing.assert_array_almost_equal(symmetry_measures(points_distorted=np.ones((3, 1, 3)),
+                                             points_perfect=np.ones((1, 3))), [0.0, 0.0, 0.0])
+
 
 if __name__ == "__main__":
     unittest2.main()
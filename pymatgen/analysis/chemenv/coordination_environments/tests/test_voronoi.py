@@ -156,6 +156,37 @@ class VoronoiContainerTest(PymatgenTest):
         other_detailed_voronoi_container = DetailedVoronoiContainer.from_dict(detailed_voronoi_container.as_dict())
         self.assertTrue(detailed_voronoi_container, other_detailed_voronoi_container)
 
+    def test_shared_tessellation(self):
+        cubic_lattice = Lattice.cubic(10.0)
+        species = ['Cu', 'Cu', 'O', 'O', 'O', 'Cu', 'O']
+        valences = [2, 2, -2, -2, -2, 2, -2]
+        coords = [[5.0, 5.0, 5.0],
+                  [6.01, 5.0, 5.0],
+                  [5.0, 5.0, 3.96],
+                  [4.0, 5.0, 5.0],
+                  [5.0, 6.03, 5.0],
+                  [5.0, 3.98, 5.0],
+                  [5.0, 5.0, 6.05]]
+        fake_structure = Structure(cubic_lattice, species, coords, coords_are_cartesian=True)
+        isites = [0, 1, 5]
+        per_site = DetailedVoronoiContainer(structure=fake_structure, valences=valences, isites=isites)
+        shared = DetailedVoronoiContainer(structure=fake_structure, valences=valences, isites=isites,
+                                          shared_tessellation=True)
+        for isite in range(len(fake_structure)):
+            if isite not in isites:
+                self.assertIsNone(shared.voronoi_list[isite])
+                continue
+            self.assertEqual(len(shared.voronoi_list[isite]), len(per_site.voronoi_list[isite]))
+            for key in ['angle', 'distance', 'weighted_angle', 'weighted_distance']:
+                self.assertArrayAlmostEqual(sorted([dd[key] for (nn, dd) in shared.voronoi_list[isite]]),
+                                            sorted([dd[key] for (nn, dd) in per_site.voronoi_list[isite]]))
+            self.assertEqual(sorted([(dd['index'], round(dd['distance'], 6))
+                                     for (nn, dd) in shared.voronoi_list[isite]]),
+                             sorted([(dd['index'], round(dd['distance'], 6))
+                                     for (nn, dd) in per_site.voronoi_list[isite]]))
+            self.assertEqual(shared.unique_coordinations(isite).keys(),
+                             per_site.unique_coordinations(isite).keys())
+
     def test_get_vertices_dist_ang_indices(self):
         cubic_lattice = Lattice.cubic(10.0)
         species = ['Cu', 'O', 'O', 'O', 'O', 'O', 'O']
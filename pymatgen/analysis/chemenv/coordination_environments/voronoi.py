@@ -67,7 +67,8 @@ class DetailedVoronoiContainer(MSONable):
                  voronoi_cutoff=default_voronoi_cutoff, isites=None,
                  weighted_distance_tolerance=1e-5, weighted_angle_tolerance=1e-3,
                  additional_conditions=None, valences=None,
-                 maximum_distance_factor=None, minimum_angle_factor=None):
+                 maximum_distance_factor=None, minimum_angle_factor=None,
+                 shared_tessellation=False):
         """
         Constructor for the VoronoiContainer object. Either a structure is given, in which case the Voronoi is
         computed, or the different components of the VoronoiContainer are given (used in the from_dict method)
@@ -76,6 +77,8 @@ class DetailedVoronoiContainer(MSONable):
         :param neighbors_list: list of neighbors for each site
         :param voronoi_cutoff: cutoff used for the voronoi
         :param isites: indices of sites for which the Voronoi has to be computed
+        :param shared_tessellation: If set to True, a single Voronoi tessellation of all the sites and their
+                                    neighbors is performed instead of one tessellation for each site
         :raise: RuntimeError if the Voronoi cannot be constructed
         """
         self.weighted_distance_tolerance = weighted_distance_tolerance
@@ -95,6 +98,8 @@ class DetailedVoronoiContainer(MSONable):
         logging.info('Setting Voronoi list')
         if voronoi_list is not None:
             self.voronoi_list = voronoi_list
+        elif shared_tessellation:
+            self.setup_voronoi_list_shared(indices=indices, voronoi_cutoff=voronoi_cutoff)
         else:
             self.setup_voronoi_list(indices=indices, voronoi_cutoff=voronoi_cutoff)
         logging.info('Setting neighbors distances and angles')
@@ -130,8 +135,9 @@ class DetailedVoronoiContainer(MSONable):
             site = self.structure[isite]
             neighbors1 = [(site, 0.0, isite)]
             neighbors1.extend(struct_neighbors[isite])
-            distances = [i[1] for i in sorted(neighbors1, key=lambda s: s[1])]
-            neighbors = [i[0] for i in sorted(neighbors1, key=lambda s: s[1])]
+            neighbors1 = sorted(neighbors1, key=lambda s: s[1])
+            distances = [i[1] for i in neighbors1]
+            neighbors = [i[0] for i in neighbors1]
             qvoronoi_input = [s.coords for s in neighbors]
             voro = VoronoiTess(qvoronoi_input)
             all_vertices = voro.vertices
@@ -153,14 +159,10 @@ class DetailedVoronoiContainer(MSONable):
                         sa = my_solid_angle(site.coords, facets)
                     maxangle = max([sa, maxangle])
                     mindist = min([mindist, distances[nn[1]]])
-                    for iii, sss in enumerate(self.structure):
-                        if neighbors[nn[1]].is_periodic_image(sss):
-                            myindex = iii
-                            break
                     results.append((neighbors[nn[1]],
                                     {'angle': sa,
                                      'distance': distances[nn[1]],
-                                     'index': myindex}))
+                                     'index': neighbors1[nn[1]][2]}))
             for (nn, dd) in results:
                 dd['weighted_angle'] = dd['angle'] / maxangle
                 dd['weighted_distance'] = dd['distance'] / mindist
@@ -168,6 +170,102 @@ class DetailedVoronoiContainer(MSONable):
         t2 = time.clock()
         logging.info('Voronoi list set up in {:.2f} seconds'.format(t2-t1))
 
+    def setup_voronoi_list_shared(self, indices, voronoi_cutoff):
+        """
+        Set up of the voronoi list of neighbours with a single call to qhull. The points of the tessellation are the
+        sites in indices together with all their neighbours (within voronoi_cutoff), each periodic image being
+        included only once, so that the overlapping clouds of neighbours are tessellated only once.
+        :param indices: indices of the sites for which the Voronoi is needed
+        :param voronoi_cutoff: Voronoi cutoff for the search of neighbours
+        :raise RuntimeError: If an infinite vertex is found in the voronoi construction
+        """
+        self.voronoi_list = [None] * len(self.structure)
+        if len(indices) == 0:
+            return
+        logging.info('Getting all neighbors in structure')
+        centers, inds, images, dists = self.structure.get_neighbor_list(voronoi_cutoff)
+        t1 = time.clock()
+        logging.info('Setting up shared Voronoi tessellation')
+        indices = np.array(indices, np.int)
+        keep = np.in1d(centers, indices)
+        point_indices = np.concatenate([indices, inds[keep]])
+        point_images = np.concatenate([np.zeros((len(indices), 3), np.int),
+                                       np.rint(images[keep]).astype(np.int)])
+        # Each periodic image of a site is identified by a single integer to find the unique points
+        offset = np.max(np.abs(point_images)) if len(point_images) > 0 else 0
+        base = 2 * offset + 1
+        shifted = point_images + offset
+        keys = ((point_indices * base + shifted[:, 0]) * base + shifted[:, 1]) * base + shifted[:, 2]
+        keys, ifirst, inverse = np.unique(keys, return_index=True, return_inverse=True)
+        point_indices = point_indices[ifirst]
+        point_images = point_images[ifirst]
+        frac_coords = self.structure.frac_coords[point_indices] + point_images
+        cart_coords = self.structure.lattice.get_cartesian_coords(frac_coords)
+        centre_points = inverse[:len(indices)]
+        is_centre = np.zeros(len(keys), np.bool)
+        is_centre[centre_points] = True
+
+        voro = VoronoiTess(cart_coords)
+        all_vertices = voro.vertices
+        face_centres = []
+        face_neighbors = []
+        face_angles = []
+        for nn, vind in list(voro.ridges.items()):
+            for icentre, ineighbor in (nn, nn[::-1]):
+                if not is_centre[icentre]:
+                    continue
+                if 0 in vind:
+                    raise RuntimeError("This structure is pathological,"
+                                       " infinite vertex in the voronoi "
+                                       "construction")
+                facets = [all_vertices[i] for i in vind]
+                try:
+                    sa = solid_angle(cart_coords[icentre], facets)
+                except ValueError:
+                    sa = my_solid_angle(cart_coords[icentre], facets)
+                face_centres.append(icentre)
+                face_neighbors.append(ineighbor)
+                face_angles.append(sa)
+        face_centres = np.array(face_centres, np.int)
+        face_neighbors = np.array(face_neighbors, np.int)
+        face_angles = np.array(face_angles, np.float)
+        face_distances = np.linalg.norm(cart_coords[face_neighbors] - cart_coords[face_centres], axis=1)
+
+        # Group the faces by centre
+        order = np.argsort(face_centres, kind='mergesort')
+        face_centres = face_centres[order]
+        face_neighbors = face_neighbors[order]
+        face_angles = face_angles[order]
+        face_distances = face_distances[order]
+        starts = np.searchsorted(face_centres, centre_points, side='left')
+        ends = np.searchsorted(face_centres, centre_points, side='right')
+
+        sites = {}
+        for isite, istart, iend in zip(indices, starts, ends):
+            if iend == istart:
+                self.voronoi_list[isite] = []
+                continue
+            angles = face_angles[istart:iend]
+            distances = face_distances[istart:iend]
+            neighbors = face_neighbors[istart:iend]
+            maxangle = np.max(angles)
+            mindist = np.min(distances)
+            results = []
+            for ineighbor, sa, dist in zip(neighbors, angles, distances):
+                if ineighbor not in sites:
+                    struct_site = self.structure[point_indices[ineighbor]]
+                    sites[ineighbor] = PeriodicSite(struct_site.species_and_occu, frac_coords[ineighbor],
+                                                    struct_site.lattice, properties=struct_site.properties)
+                results.append((sites[ineighbor],
+                                {'angle': sa,
+                                 'distance': dist,
+                                 'index': int(point_indices[ineighbor]),
+                                 'weighted_angle': sa / maxangle,
+                                 'weighted_distance': dist / mindist}))
+            self.voronoi_list[isite] = results
+        t2 = time.clock()
+        logging.info('Voronoi list set up in {:.2f} seconds'.format(t2-t1))
+
     def setup_neighbors_distances_and_angles(self, indices):
         """
         Initializes the angle and distance separations
@@ -84,6 +84,22 @@ class XRDCalculatorTest(PymatgenTest):
         self.assertAlmostEqual(data[0][1], 2377745.2296686019)
         self.assertAlmostEqual(data[0][3], 2.2382050944897789)
 
+    def test_get_xrd_data_batch(self):
+        c = XRDCalculator()
+        structures = [self.get_structure(n)
+                      for n in ["CsCl", "LiFePO4", "Graphite"]]
+        for ncpus in [None, 2]:
+            batch = c.get_xrd_data_batch(structures, ncpus=ncpus)
+            self.assertEqual(len(batch), 3)
+            for s, data in zip(structures, batch):
+                expected = c.get_xrd_data(s)
+                self.assertEqual(len(data), len(expected))
+                for p1, p2 in zip(data, expected):
+                    self.assertAlmostEqual(p1[0], p2[0])
+                    self.assertAlmostEqual(p1[1], p2[1])
+                    self.assertEqual(p1[2], p2[2])
+        self.assertEqual(batch[0][0][2], {(1, 0, 0): 6})
+
 
 if __name__ == '__main__':
     unittest.main()
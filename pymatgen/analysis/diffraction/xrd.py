@@ -16,13 +16,14 @@ __email__ = "ongsp@ucsd.edu"
 __date__ = "5/22/14"
 
 
-from math import sin, cos, asin, pi, degrees, radians
+from math import sin, pi, radians
 import os
 import collections
 
 import numpy as np
 import json
 
+from pymatgen.core.periodic_table import Element
 from pymatgen.symmetry.analyzer import SpacegroupAnalyzer
 
 #XRD wavelengths in angstroms
@@ -58,6 +59,48 @@ with open(os.path.join(os.path.dirname(__file__),
     ATOMIC_SCATTERING_PARAMS = json.load(f)
 
 
+_SCATTERING_PARAMS_CACHE = {}
+
+
+def _get_scattering_params(symbols):
+    """
+    Returns the atomic numbers and atomic scattering coefficients for a list
+    of element symbols as arrays. The per-element arrays are cached so that
+    they are constructed only once across all structures.
+
+    Args:
+        symbols ([str]): Element symbols.
+
+    Returns:
+        (zs, coeffs) arrays of shape (n,) and (n, 4, 2).
+    """
+    zs = []
+    coeffs = []
+    for sym in symbols:
+        if sym not in _SCATTERING_PARAMS_CACHE:
+            try:
+                c = ATOMIC_SCATTERING_PARAMS[sym]
+            except KeyError:
+                raise ValueError("Unable to calculate XRD pattern as "
+                                 "there is no scattering coefficients for"
+                                 " %s." % sym)
+            _SCATTERING_PARAMS_CACHE[sym] = (Element(sym).Z, np.array(c))
+        z, c = _SCATTERING_PARAMS_CACHE[sym]
+        zs.append(z)
+        coeffs.append(c)
+    return np.array(zs), np.array(coeffs).reshape((len(symbols), -1, 2))
+
+
+def _get_xrd_data(args):
+    """
+    Helper for XRDCalculator.get_xrd_data_batch, defined at the module level
+    so that it can be used with multiprocessing.
+    """
+    calculator, structure, scaled, two_theta_range = args
+    return calculator.get_xrd_data(structure, scaled=scaled,
+                                   two_theta_range=two_theta_range)
+
+
 class XRDCalculator(object):
     """
     Computes the XRD pattern of a crystal structure.
@@ -194,114 +237,131 @@ class XRDCalculator(object):
             [[0, 0, 0]], [0, 0, 0], max_r)
         if min_r:
             recip_pts = [pt for pt in recip_pts if pt[1] >= min_r]
-
-        # Create a flattened array of zs, coeffs, fcoords and occus. This is
-        # used to perform vectorized computation of atomic scattering factors
-        # later. Note that these are not necessarily the same size as the
-        # structure as each partially occupied specie occupies its own
-        # position in the flattened array.
-        zs = []
-        coeffs = []
+        recip_pts = [pt for pt in recip_pts if pt[1] != 0]
+
+        # Force miller indices to be integers.
+        hkls = np.array([np.round(pt[0]) for pt in recip_pts],
+                        dtype=np.int).reshape((-1, 3))
+        g_hkls = np.array([pt[1] for pt in recip_pts])
+        order = np.lexsort((-hkls[:, 2], -hkls[:, 1], -hkls[:, 0], g_hkls))
+        hkls = hkls[order]
+        g_hkls = g_hkls[order]
+
+        # Create flattened arrays of the fractional coords and occupancies
+        # of every specie in the structure, together with the index of the
+        # specie in the table of unique scattering parameters. Note that
+        # these are not necessarily the same size as the structure as each
+        # partially occupied specie occupies its own position in the
+        # flattened array.
+        symbols = []
+        sp_inds = []
         fcoords = []
         occus = []
-        dwfactors = []
-
         for site in structure:
             for sp, occu in site.species_and_occu.items():
-                zs.append(sp.Z)
-                try:
-                    c = ATOMIC_SCATTERING_PARAMS[sp.symbol]
-                except KeyError:
-                    raise ValueError("Unable to calculate XRD pattern as "
-                                     "there is no scattering coefficients for"
-                                     " %s." % sp.symbol)
-                coeffs.append(c)
-                dwfactors.append(self.debye_waller_factors.get(sp.symbol, 0))
+                if sp.symbol not in symbols:
+                    symbols.append(sp.symbol)
+                sp_inds.append(symbols.index(sp.symbol))
                 fcoords.append(site.frac_coords)
                 occus.append(occu)
-
-        zs = np.array(zs)
-        coeffs = np.array(coeffs)
+        zs, coeffs = _get_scattering_params(symbols)
+        dwfactors = np.array([self.debye_waller_factors.get(sym, 0)
+                              for sym in symbols])
+        sp_inds = np.array(sp_inds, dtype=np.int)
         fcoords = np.array(fcoords)
         occus = np.array(occus)
-        dwfactors = np.array(dwfactors)
-        peaks = {}
-        two_thetas = []
-
-        for hkl, g_hkl, ind in sorted(
-                recip_pts, key=lambda i: (i[1], -i[0][0], -i[0][1], -i[0][2])):
-            hkl = [int(round(i)) for i in hkl] #Force miller indices to be integers.
-            if g_hkl != 0:
-
-                d_hkl = 1 / g_hkl
-
-                # Bragg condition
-                theta = asin(wavelength * g_hkl / 2)
-
-                # s = sin(theta) / wavelength = 1 / 2d = |ghkl| / 2 (d =
-                # 1/|ghkl|)
-                s = g_hkl / 2
-
-                #Store s^2 since we are using it a few times.
-                s2 = s ** 2
-
-                # Vectorized computation of g.r for all fractional coords and
-                # hkl.
-                g_dot_r = np.dot(fcoords, np.transpose([hkl])).T[0]
-
-                # Highly vectorized computation of atomic scattering factors.
-                # Equivalent non-vectorized code is::
-                #
-                #   for site in structure:
-                #      el = site.specie
-                #      coeff = ATOMIC_SCATTERING_PARAMS[el.symbol]
-                #      fs = el.Z - 41.78214 * s2 * sum(
-                #          [d[0] * exp(-d[1] * s2) for d in coeff])
-                fs = zs - 41.78214 * s2 * np.sum(
-                    coeffs[:, :, 0] * np.exp(-coeffs[:, :, 1] * s2), axis=1)
-
-                dw_correction = np.exp(-dwfactors * s2)
-
-                # Structure factor = sum of atomic scattering factors (with
-                # position factor exp(2j * pi * g.r and occupancies).
-                # Vectorized computation.
-                f_hkl = np.sum(fs * occus * np.exp(2j * pi * g_dot_r)
-                               * dw_correction)
-
-                # Lorentz polarization correction for hkl
-                lorentz_factor = (1 + cos(2 * theta) ** 2) / \
-                    (sin(theta) ** 2 * cos(theta))
-
-                # Intensity for hkl is modulus square of structure factor.
-                i_hkl = (f_hkl * f_hkl.conjugate()).real
-
-                two_theta = degrees(2 * theta)
-
-                if is_hex:
-                    # Use Miller-Bravais indices for hexagonal lattices.
-                    hkl = (hkl[0], hkl[1], - hkl[0] - hkl[1], hkl[2])
-                # Deal with floating point precision issues.
-                ind = np.where(np.abs(np.subtract(two_thetas, two_theta)) <
-                               XRDCalculator.TWO_THETA_TOL)
-                if len(ind[0]) > 0:
-                    peaks[two_thetas[ind[0][0]]][0] += i_hkl * lorentz_factor
-                    peaks[two_thetas[ind[0][0]]][1].append(tuple(hkl))
-                else:
-                    peaks[two_theta] = [i_hkl * lorentz_factor, [tuple(hkl)],
-                                        d_hkl]
-                    two_thetas.append(two_theta)
+
+        # s = sin(theta) / wavelength = 1 / 2d = |ghkl| / 2 (d = 1/|ghkl|)
+        s2 = (g_hkls / 2) ** 2
+
+        # Atomic scattering factors for all (hkl, unique specie) pairs.
+        # Equivalent non-vectorized code is::
+        #
+        #   for site in structure:
+        #      el = site.specie
+        #      coeff = ATOMIC_SCATTERING_PARAMS[el.symbol]
+        #      fs = el.Z - 41.78214 * s2 * sum(
+        #          [d[0] * exp(-d[1] * s2) for d in coeff])
+        fs = zs - 41.78214 * s2[:, None] * np.sum(
+            coeffs[:, :, 0] * np.exp(-coeffs[:, :, 1] * s2[:, None, None]),
+            axis=2)
+        fs *= np.exp(-dwfactors * s2[:, None])
+
+        # Structure factor = sum of atomic scattering factors (with position
+        # factor exp(2j * pi * g.r and occupancies), computed for all hkl
+        # at once as a (n_hkl x n_species) array.
+        g_dot_r = np.dot(hkls, fcoords.T)
+        f_hkl = np.sum(fs[:, sp_inds] * occus * np.exp(2j * pi * g_dot_r),
+                       axis=1)
+
+        # Intensity for hkl is modulus square of structure factor.
+        i_hkl = (f_hkl * f_hkl.conjugate()).real
+
+        # Bragg condition and Lorentz polarization correction.
+        theta = np.arcsin(wavelength * g_hkls / 2)
+        lorentz_factor = (1 + np.cos(2 * theta) ** 2) / \
+            (np.sin(theta) ** 2 * np.cos(theta))
+        two_thetas = np.degrees(2 * theta)
+
+        # Merge reflections whose two thetas are within TWO_THETA_TOL of
+        # each other. The reflections are sorted by two theta, so each peak
+        # is a contiguous run of reflections.
+        starts = np.concatenate(
+            [[0], np.where(np.diff(two_thetas) >=
+                           XRDCalculator.TWO_THETA_TOL)[0] + 1]).astype(np.int)
+        intensities = np.add.reduceat(i_hkl * lorentz_factor, starts)
+        ends = np.append(starts[1:], len(hkls))
+
+        if is_hex:
+            # Use Miller-Bravais indices for hexagonal lattices.
+            hkls = np.column_stack([hkls[:, 0], hkls[:, 1],
+                                    -hkls[:, 0] - hkls[:, 1], hkls[:, 2]])
+        hkls = [tuple(hkl) for hkl in hkls.tolist()]
 
         # Scale intensities so that the max intensity is 100.
-        max_intensity = max([v[0] for v in peaks.values()])
+        max_intensity = max(intensities)
         data = []
-        for k in sorted(peaks.keys()):
-            v = peaks[k]
-            scaled_intensity = v[0] / max_intensity * 100 if scaled else v[0]
-            fam = get_unique_families(v[1])
+        for i, j, intensity in zip(starts, ends, intensities):
+            scaled_intensity = intensity / max_intensity * 100 if scaled \
+                else intensity
             if scaled_intensity > XRDCalculator.SCALED_INTENSITY_TOL:
-                data.append([k, scaled_intensity, fam, v[2]])
+                data.append([float(two_thetas[i]), float(scaled_intensity),
+                             get_unique_families(hkls[i:j]),
+                             1 / float(g_hkls[i])])
         return data
 
+    def get_xrd_data_batch(self, structures, scaled=True,
+                           two_theta_range=(0, 90), ncpus=None):
+        """
+        Calculates the XRD data for a list of structures, e.g., for phase
+        identification against a large set of candidate structures.
+        Scattering parameters are shared across all structures.
+
+        Args:
+            structures ([Structure]): Input structures.
+            scaled (bool): Whether to return scaled intensities. See
+                get_xrd_data.
+            two_theta_range ([float of length 2]): Tuple for range of
+                two_thetas to calculate in degrees. See get_xrd_data.
+            ncpus (int): Number of cpus to use. Default of None means serial
+                processing. Otherwise, the structures are distributed over
+                a multiprocessing pool of ncpus processes.
+
+        Returns:
+            [XRD pattern] in the same order as structures, with each XRD
+            pattern in the form returned by get_xrd_data.
+        """
+        args = [(self, s, scaled, two_theta_range) for s in structures]
+        if ncpus:
+            import multiprocessing as mp
+            p = mp.Pool(ncpus)
+            try:
+                return p.map(_get_xrd_data, args)
+            finally:
+                p.close()
+                p.join()
+        return [_get_xrd_data(a) for a in args]
+
     def get_xrd_plot(self, structure, two_theta_range=(0, 90),
                      annotate_peaks=True):
         """
@@ -365,22 +425,11 @@ def get_unique_families(hkls):
     Returns:
         {hkl: multiplicity}: A dict with unique hkl and multiplicity.
     """
-    # TODO: Definitely can be sped up.
-    def is_perm(hkl1, hkl2):
-        h1 = np.abs(hkl1)
-        h2 = np.abs(hkl2)
-        return all([i == j for i, j in zip(sorted(h1), sorted(h2))])
-
+    # Two Miller indices are permutations of each other if their sorted
+    # absolute values are the same.
     unique = collections.defaultdict(list)
-    for hkl1 in hkls:
-        found = False
-        for hkl2 in unique.keys():
-            if is_perm(hkl1, hkl2):
-                found = True
-                unique[hkl2].append(hkl1)
-                break
-        if not found:
-            unique[hkl1].append(hkl1)
+    for hkl in hkls:
+        unique[tuple(sorted(abs(i) for i in hkl))].append(hkl)
 
     pretty_unique = {}
     for k, v in unique.items():
@@ -711,7 +711,8 @@ class DiffusionAnalyzer(MSONable):
                 offset = 0
                 for p in filepaths:
                     v = Vasprun(p, ionic_step_offset=offset,
-                                ionic_step_skip=step_skip)
+                                ionic_step_skip=step_skip,
+                                ionic_step_fields=["structure"])
                     yield v
                     # Recompute offset.
                     offset = (-(v.nionic_steps - offset)) % step_skip
@@ -779,7 +780,8 @@ def _get_vasprun(args):
     Internal method to support multiprocessing.
     """
     return Vasprun(args[0], ionic_step_skip=args[1],
-                   parse_dos=False, parse_eigen=False)
+                   parse_dos=False, parse_eigen=False,
+                   ionic_step_fields=["structure"])
 
 
 def fit_arrhenius(temps, diffusivities):
@@ -47,6 +47,10 @@ class EwaldSummation(object):
     # Converts unit of q*q/r into eV
     CONV_FACT = 1e10 * constants.e / (4 * pi * constants.epsilon_0)
 
+    # Maximum number of (G vector, site) elements in the temporary arrays
+    # of the reciprocal space summation.
+    BLOCK_SIZE = 1000000
+
     def __init__(self, structure, real_space_cut=None, recip_space_cut=None,
                  eta=None, acc_factor=12.0, w=1 / sqrt(2), compute_forces=False):
         """
@@ -273,40 +277,42 @@ class EwaldSummation(object):
 
         frac_coords = [fcoords for (fcoords, dist, i) in recip_nn if dist != 0]
 
-        gs = rcp_latt.get_cartesian_coords(frac_coords)
+        gs = rcp_latt.get_cartesian_coords(frac_coords).reshape((-1, 3))
         g2s = np.sum(gs ** 2, 1)
         expvals = np.exp(-g2s / (4 * self._eta))
-        grs = np.sum(gs[:, None] * coords[None, :], 2)
 
         oxistates = np.array(self._oxi_states)
 
         # create array where q_2[i,j] is qi * qj
         qiqj = oxistates[None, :] * oxistates[:, None]
 
-        # calculate the structure factor
-        sreals = np.sum(oxistates[None, :] * np.cos(grs), 1)
-        simags = np.sum(oxistates[None, :] * np.sin(grs), 1)
-
-        for g, g2, gr, expval, sreal, simag in zip(gs, g2s, grs, expvals,
-                                                   sreals, simags):
-
-            # Create array where exparg[i,j] is gvectdot[i] - gvectdot[j]
-            exparg = gr[None, :] - gr[:, None]
-
-            # Uses the identity sin(x)+cos(x) = 2**0.5 sin(x + pi/4)
-            sfactor = qiqj * np.sin(exparg + pi / 4) * 2 ** 0.5
-
-            erecip += expval / g2 * sfactor
+        # The G vectors are processed in blocks to bound the size of the
+        # (G, site) temporaries. Using
+        # sin(x) + cos(x) = sin(gr_j - gr_i) + cos(gr_j - gr_i)
+        #   = cos_i (cos_j + sin_j) + sin_i (sin_j - cos_j),
+        # the sum over G of each block reduces to two matrix products.
+        blocksize = max(1, EwaldSummation.BLOCK_SIZE // max(numsites, 1))
+        for start in range(0, len(gs), blocksize):
+            g = gs[start:start + blocksize]
+            grs = np.dot(g, coords.T)
+            coss = np.cos(grs)
+            sins = np.sin(grs)
+            weights = (expvals[start:start + blocksize] /
+                       g2s[start:start + blocksize])[:, None]
+
+            erecip += np.dot((weights * coss).T, coss + sins)
+            erecip += np.dot((weights * sins).T, sins - coss)
 
             if self._compute_forces:
-                pref = 2 * expval / g2 * oxistates
-                factor = prefactor * pref * (
-                    sreal * np.sin(gr) - simag * np.cos(gr))
-
-                forces += factor[:, None] * g[None, :]
+                # calculate the structure factor
+                sreals = np.dot(coss, oxistates)
+                simags = np.dot(sins, oxistates)
+                factor = 2 * weights * (sreals[:, None] * sins -
+                                        simags[:, None] * coss)
+                forces += prefactor * oxistates[:, None] * np.dot(factor.T, g)
 
         forces *= EwaldSummation.CONV_FACT
-        erecip *= prefactor * EwaldSummation.CONV_FACT
+        erecip *= qiqj * prefactor * EwaldSummation.CONV_FACT
 
         return erecip, forces
 
@@ -320,7 +326,6 @@ class EwaldSummation(object):
         forcepf = 2.0 * self._sqrt_eta / sqrt(pi)
         coords = self._coords
         numsites = self._s.num_sites
-        ereal = np.empty((numsites, numsites), dtype=np.float)
 
         forces = np.zeros((numsites, 3), dtype=np.float)
 
@@ -328,34 +333,41 @@ class EwaldSummation(object):
 
         epoint = - qs ** 2 * sqrt(self._eta / pi)
 
-        for i in range(numsites):
-            nfcoords, rij, js = self._s.lattice.get_points_in_sphere(fcoords,
-                                    coords[i], self._rmax, zip_results=False)
-
-            # remove the rii term
-            inds = rij > 1e-8
-            js = js[inds]
-            rij = rij[inds]
-            nfcoords = nfcoords[inds]
+        # A single neighbor list for all sites. Since the list contains both
+        # (i, j, image) and (j, i, -image) for every pair, only the pairs
+        # with i <= j are evaluated and the matrix is symmetrized.
+        centers, js, images, rij = self._s.get_neighbor_list(self._rmax)
+        inds = centers <= js
+        centers = centers[inds]
+        js = js[inds]
+        images = images[inds]
+        rij = rij[inds]
 
-            qi = qs[i]
-            qj = qs[js]
+        qi = qs[centers]
+        qj = qs[js]
 
-            erfcval = erfc(self._sqrt_eta * rij)
-            new_ereals = erfcval * qi * qj / rij
+        erfcval = erfc(self._sqrt_eta * rij)
+        new_ereals = erfcval * qi * qj / rij
 
-            # insert new_ereals
-            for k in range(numsites):
-                ereal[k, i] = np.sum(new_ereals[js == k])
-
-            if self._compute_forces:
-                nccoords = self._s.lattice.get_cartesian_coords(nfcoords)
+        ereal = np.bincount(centers * numsites + js, weights=new_ereals,
+                            minlength=numsites * numsites).reshape(
+            (numsites, numsites))
+        ereal += ereal.T
+        ereal[np.diag_indices(numsites)] /= 2
 
-                fijpf = qj / rij ** 3 * (erfcval + forcepf * rij *
-                                         np.exp(-self._eta * rij ** 2))
-                forces[i] += np.sum(np.expand_dims(fijpf, 1) *
-                                    (np.array([coords[i]]) - nccoords) *
-                                    qi * EwaldSummation.CONV_FACT, axis=0)
+        if self._compute_forces:
+            nccoords = self._s.lattice.get_cartesian_coords(
+                fcoords[js] + images)
+
+            fijpf = qi * qj / rij ** 3 * (erfcval + forcepf * rij *
+                                          np.exp(-self._eta * rij ** 2))
+            fij = fijpf[:, None] * (coords[centers] - nccoords) * \
+                EwaldSummation.CONV_FACT
+            for k in range(3):
+                forces[:, k] += np.bincount(centers, weights=fij[:, k],
+                                            minlength=numsites)
+                forces[:, k] -= np.bincount(js, weights=fij[:, k],
+                                            minlength=numsites)
 
         ereal *= 0.5 * EwaldSummation.CONV_FACT
         epoint *= EwaldSummation.CONV_FACT
@@ -374,6 +386,159 @@ class EwaldSummation(object):
         return "\n".join(output)
 
 
+class IncrementalEwaldSummation(object):
+    """
+    Maintains the Ewald energy of a fixed set of sites under changes of the
+    site charges, e.g., for Monte Carlo ordering or for screening large
+    numbers of configurations. The total energy is written as
+
+    E = sum_ij q_i A_ij q_j
+
+    where the charge independent interaction matrix A is obtained from the
+    real, reciprocal and point energy matrices of an EwaldSummation. The
+    site potentials phi = A q are kept up to date, so that swapping two
+    sites or changing the charge of a site is an O(N) operation and the
+    corresponding energy change is O(1).
+    """
+
+    def __init__(self, ewald):
+        """
+        Args:
+            ewald (EwaldSummation): Ewald summation of the starting
+                structure. All sites must have non-zero charges so that the
+                interaction matrix can be recovered from the energy
+                matrices. Sites can then be removed, i.e., have their
+                charges set to zero.
+        """
+        charges = np.array(ewald._oxi_states, dtype=np.float)
+        if np.any(np.abs(charges) < 1e-8):
+            raise ValueError("IncrementalEwaldSummation requires non-zero "
+                             "charges on all sites of the starting "
+                             "structure.")
+        qiqj = charges[:, None] * charges[None, :]
+        matrix = ewald.reciprocal_space_energy_matrix + \
+            ewald.real_space_energy_matrix
+        # Only the symmetric part of the matrix contributes to the energy.
+        self._interaction = (matrix + matrix.T) / 2 / qiqj
+        self._interaction[np.diag_indices(len(charges))] += \
+            ewald.point_energy_matrix / charges ** 2
+        self._charges = charges
+        self._potentials = np.dot(self._interaction, charges)
+        self._energy = np.dot(charges, self._potentials)
+
+    @property
+    def energy(self):
+        """
+        The total Ewald energy for the current charges.
+        """
+        return self._energy
+
+    @property
+    def charges(self):
+        """
+        The current site charges.
+        """
+        return self._charges.copy()
+
+    @property
+    def potentials(self):
+        """
+        The current site potentials phi_i = sum_j A_ij q_j. The energy
+        change for a small charge change dq on site i is 2 phi_i dq.
+        """
+        return self._potentials.copy()
+
+    @property
+    def interaction_matrix(self):
+        """
+        The charge independent interaction matrix A.
+        """
+        return self._interaction
+
+    def get_charge_change_energy(self, i, charge):
+        """
+        Energy change if the charge of site i is set to charge, without
+        performing the change.
+
+        Args:
+            i (int): Site index.
+            charge (float): New charge of site i.
+
+        Returns:
+            Energy change in eV.
+        """
+        dq = charge - self._charges[i]
+        return 2 * dq * self._potentials[i] + dq ** 2 * \
+            self._interaction[i, i]
+
+    def get_swap_energy(self, i, j):
+        """
+        Energy change if the charges of sites i and j are swapped, without
+        performing the swap.
+
+        Args:
+            i (int): Index of first site.
+            j (int): Index of second site.
+
+        Returns:
+            Energy change in eV.
+        """
+        a = self._interaction
+        dq = self._charges[j] - self._charges[i]
+        return 2 * dq * (self._potentials[i] - self._potentials[j]) + \
+            dq ** 2 * (a[i, i] + a[j, j] - 2 * a[i, j])
+
+    def set_charge(self, i, charge):
+        """
+        Sets the charge of site i.
+
+        Args:
+            i (int): Site index.
+            charge (float): New charge of site i.
+
+        Returns:
+            Energy change in eV.
+        """
+        delta = self.get_charge_change_energy(i, charge)
+        self._potentials += self._interaction[:, i] * \
+            (charge - self._charges[i])
+        self._charges[i] = charge
+        self._energy += delta
+        return delta
+
+    def swap(self, i, j):
+        """
+        Swaps the charges of sites i and j.
+
+        Args:
+            i (int): Index of first site.
+            j (int): Index of second site.
+
+        Returns:
+            Energy change in eV.
+        """
+        delta = self.get_swap_energy(i, j)
+        dq = self._charges[j] - self._charges[i]
+        self._potentials += (self._interaction[:, i] -
+                             self._interaction[:, j]) * dq
+        self._charges[i], self._charges[j] = self._charges[j], \
+            self._charges[i]
+        self._energy += delta
+        return delta
+
+    def remove(self, i):
+        """
+        Removes site i, i.e., sets its charge to zero.
+
+        Args:
+            i (int): Site index.
+
+        Returns:
+            Energy change in eV.
+        """
+        return self.set_charge(i, 0)
+
+
 class EwaldMinimizer:
     """
     This class determines the manipulations that will minimize an ewald matrix,
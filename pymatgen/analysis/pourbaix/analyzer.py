@@ -38,6 +38,7 @@ class PourbaixAnalyzer(object):
         self._pd = pd
         self._keys = ['H+', 'V', '1']
         self.chempot_limits = None
+        self._stable_g_coeffs = None
 
     def get_facet_chempots(self, facet):
         """
@@ -221,6 +222,62 @@ class PourbaixAnalyzer(object):
         nPhi = -entry.nPhi
         return g0 - npH * pH - nPhi * V
 
+    @staticmethod
+    def _get_g_coeffs(entries):
+        """
+        Returns the array with the coefficients [g0, c_pH, c_V] of each entry
+        such that g(entry, pH, V) = g0 + c_pH * pH + c_V * V.
+        """
+        return np.array([[entry.g0, entry.npH * 0.0591, entry.nPhi]
+                         for entry in entries], dtype=np.float)
+
+    def get_stability_map(self, pH, V, entries=None, chunk_size=10000000):
+        """
+        Evaluates the free energies on a grid of pH and V values with array
+        operations. The coefficients of the stable entries are computed
+        once so that the same analyzer can be used for many grids.
+
+        Args:
+            pH: Array with the values of pH, e.g. from np.meshgrid.
+            V: Array with the values of V. pH and V are broadcast together.
+            entries: List of PourbaixEntries for which the energy above the
+                stable phase is computed. Defaults to the stable entries.
+            chunk_size (int): Maximum number of free energies computed at
+                once. Used to limit the memory.
+
+        Returns:
+            (stable_map, e_above_hull_map): stable_map is an integer array
+            with the shape of the grid giving the index of the stable entry
+            (in pd.stable_entries) at each point. e_above_hull_map is an
+            array of shape (len(entries),) + grid shape with the free energy
+            of each entry above the one of the stable entry.
+        """
+        pH, V = np.broadcast_arrays(np.asarray(pH, dtype=np.float),
+                                    np.asarray(V, dtype=np.float))
+        shape = pH.shape
+        pH, V = pH.ravel(), V.ravel()
+
+        if self._stable_g_coeffs is None:
+            self._stable_g_coeffs = self._get_g_coeffs(self._pd.stable_entries)
+        stable_coeffs = self._stable_g_coeffs
+        coeffs = stable_coeffs if entries is None else \
+            self._get_g_coeffs(entries)
+
+        stable_map = np.empty(len(pH), dtype=np.int)
+        e_above_hull = np.empty((len(coeffs), len(pH)))
+        step = max(1, chunk_size // max(len(stable_coeffs), len(coeffs)))
+        for i in range(0, len(pH), step):
+            x = np.array([np.ones(len(pH[i:i + step])), pH[i:i + step],
+                          V[i:i + step]])
+            g_stable = np.dot(stable_coeffs, x)
+            inds = np.argmin(g_stable, axis=0)
+            stable_map[i:i + step] = inds
+            g_min = g_stable[inds, np.arange(len(inds))]
+            e_above_hull[:, i:i + step] = np.dot(coeffs, x) - g_min
+
+        return stable_map.reshape(shape), \
+            e_above_hull.reshape((len(coeffs),) + shape)
+
     def get_decomposition(self, entry):
         """
         Provides the decomposition at a particular composition
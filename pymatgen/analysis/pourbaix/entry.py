@@ -255,17 +255,9 @@ class MultiEntry(PourbaixEntry):
         """
         Normalize each entry by nM
         """
-        norm_fac = 0.0
-        for w, e in zip(self.weights, self.entrylist):
-            for el in e.composition.elements:
-                if (el == Element("O")) | (el == Element("H")):
-                    continue
-                if e.phase_type == 'Solid':
-                    red_fac = e.composition.\
-                        get_reduced_composition_and_factor()[1]
-                else:
-                    red_fac = 1.0
-                norm_fac += w * e.composition[el] / red_fac
+        # The weights multiply the energies of the (unreduced) entries, the
+        # normalization uses the same formula units.
+        norm_fac = sum([w * e.nM for w, e in zip(self.weights, self.entrylist)])
         fact = 1.0 / norm_fac
         return fact
 
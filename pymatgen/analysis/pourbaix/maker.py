@@ -21,6 +21,7 @@ __date__ = "Nov 1, 2012"
 
 
 import logging
+import collections
 import numpy as np
 import itertools
 from itertools import chain
@@ -42,8 +43,15 @@ class PourbaixDiagram(object):
     Args:
         entries: Entries list containing both Solids and Ions
         comp_dict: Dictionary of compositions
+        prune_entries: Only for multi-element diagrams. If True, the entries
+            that cannot be stable at any pH and potential are removed before
+            generating the combinations of entries. Defaults to False.
     """
-    def __init__(self, entries, comp_dict=None):
+    # Maximum number of combinations of entries whose weights are solved at once.
+    combination_batch_size = 100000
+
+    def __init__(self, entries, comp_dict=None, prune_entries=False):
+        self._prune_entries = prune_entries
         self._solid_entries = list()
         self._ion_entries = list()
         for entry in entries:
@@ -122,73 +130,198 @@ class PourbaixDiagram(object):
 
     def _process_multielement_entries(self):
         """
-        Create entries for multi-element Pourbaix construction
+        Create entries for multi-element Pourbaix construction.
+
+        The entries are indexed by their sets of non-O/H elements and only
+        the combinations of entries whose element sets cover all the elements
+        of the target composition are generated. The weights of the
+        combinations with the same number of entries are computed with
+        batched linear solves.
         """
-        N = len(self._elt_comp)  # No. of elements
+        el_list = list(self._elt_comp.keys())
+        N = len(el_list)  # No. of elements
+        comp_list = np.array([self._elt_comp[el] for el in el_list])
         entries = self._unprocessed_entries
-        el_list = self._elt_comp.keys()
-        comp_list = [self._elt_comp[el] for el in el_list]
-        list_of_entries = list()
-        for j in range(1, N + 1):
-            list_of_entries += list(itertools.combinations(
-                                list(range(len(entries))), j))
+
+        # Amounts of the elements in each entry
+        amounts = self._get_element_amounts(entries, el_list)
+        if self._prune_entries:
+            keep = self._get_prunable_mask(entries, amounts)
+            logger.debug("Pruning {} entries".format(np.sum(~keep)))
+            entries = [e for e, k in zip(entries, keep) if k]
+            amounts = amounts[keep]
+
+        # Index the entries by their sets of elements.
+        entries_by_elset = collections.defaultdict(list)
+        for i, row in enumerate(amounts):
+            elset = frozenset(j for j in range(N) if row[j] > 0)
+            if elset:
+                entries_by_elset[elset].append(i)
+        all_els = frozenset(range(N))
+
         processed_entries = list()
-        for entry_list in list_of_entries:
-            # Check if all elements in composition list are present in
-            # entry_list
-            if not (set([Element(el) for el in el_list]).issubset(
-                    set(list(chain.from_iterable([entries[i].composition.keys()
-                                                  for i in entry_list]))))):
-                continue
-            if len(entry_list) == 1:
-                # If only one entry in entry_list, then check if the composition matches with the set composition. 
-                entry = entries[entry_list[0]]
-                dict_of_non_oh = dict(zip([key for key in entry.composition.keys() if key.symbol not in ["O", "H"]],
-                                           [entry.composition[key] for key in [key for key in entry.composition.keys() if key.symbol not in ["O", "H"]]]))
-                if Composition(dict(zip(self._elt_comp.keys(), [self._elt_comp[key] / min([self._elt_comp[key] for key in self._elt_comp.keys()])
-                                                                 for key in self._elt_comp.keys()]))).reduced_formula ==\
-                        Composition(dict(zip(dict_of_non_oh.keys(), [dict_of_non_oh[el] / min([dict_of_non_oh[key] for key in dict_of_non_oh.keys()])
-                                                                     for el in dict_of_non_oh.keys()]))).reduced_formula:                                                                     
-                    processed_entries.append(MultiEntry([entry], [1.0]))
+        for i in entries_by_elset.get(all_els, []):
+            if self._has_target_composition(entries[i]):
+                processed_entries.append(MultiEntry([entries[i]], [1.0]))
+
+        for k in range(2, N + 1):
+            # Take the combinations from the generator in batches so that
+            # they are never all in memory at once.
+            combos = self._get_covering_combinations(entries_by_elset,
+                                                     all_els, k)
+            while True:
+                batch = np.array(list(itertools.islice(
+                    combos, self.combination_batch_size)))
+                if len(batch) == 0:
+                    break
+                weights, valid = self._get_combination_weights(
+                    amounts, batch, comp_list)
+                for combo, w in zip(batch[valid], weights[valid]):
+                    processed_entries.append(MultiEntry(
+                        [entries[i] for i in combo], w.tolist()))
+
+        return processed_entries
+
+    @staticmethod
+    def _get_element_amounts(entries, el_list):
+        """
+        Returns the array with the amounts of the elements in el_list in each
+        entry. The amounts are scaled so that their sum over the non-O/H
+        elements is nM, i.e. they refer to the same formula unit as the
+        energy of the entry (see PourbaixEntry.reduced_entry).
+        """
+        amounts = np.zeros((len(entries), len(el_list)))
+        for i, entry in enumerate(entries):
+            comp = entry.composition
+            n_non_oh = sum([amt for el, amt in comp.items()
+                            if el.symbol not in ["O", "H"]])
+            if n_non_oh > 0:
+                amounts[i] = [comp[Element(el)] * entry.nM / n_non_oh
+                              for el in el_list]
+        return amounts
+
+    def _has_target_composition(self, entry):
+        """
+        True if the ratio between the non-O/H elements of entry is the one of
+        the target composition.
+        """
+        dict_of_non_oh = {el: amt for el, amt in entry.composition.items()
+                          if el.symbol not in ["O", "H"]}
+        min_target = min(self._elt_comp.values())
+        min_entry = min(dict_of_non_oh.values())
+        target = Composition({el: amt / min_target
+                              for el, amt in self._elt_comp.items()})
+        comp = Composition({el: amt / min_entry
+                            for el, amt in dict_of_non_oh.items()})
+        return target.reduced_formula == comp.reduced_formula
+
+    @staticmethod
+    def _get_covering_combinations(entries_by_elset, all_els, k):
+        """
+        Generates the combinations (as sorted tuples of indices) of k entries
+        whose element sets cover all_els.
+        """
+        elsets = list(entries_by_elset.keys())
+        for elset_combo in itertools.combinations_with_replacement(elsets, k):
+            if frozenset(chain.from_iterable(elset_combo)) != all_els:
                 continue
+            counts = collections.Counter(elset_combo)
+            choices = [itertools.combinations(entries_by_elset[elset], n)
+                       for elset, n in counts.items()]
+            for combo in itertools.product(*choices):
+                yield tuple(sorted(chain.from_iterable(combo)))
 
-            A = [[0.0] * (len(entry_list) - 1) for _ in range(len(entry_list) - 1)]
-            multi_entries = [entries[j] for j in entry_list]
-            entry0 = entries[entry_list[0]]
-            comp0 = entry0.composition
-            if entry0.phase_type == "Solid":
-                red_fac = comp0.get_reduced_composition_and_factor()[1]
-            else:
-                red_fac = 1.0
-            sum_nel = sum([comp0[el] / red_fac for el in el_list])
-            b = [comp0[Element(el_list[i])] / red_fac - comp_list[i] * sum_nel
-                 for i in range(1, len(entry_list))]
-            for j in range(1, len(entry_list)):
-                entry = entries[entry_list[j]]
-                comp = entry.composition
-                if entry.phase_type == "Solid":
-                    red_fac = comp.get_reduced_composition_and_factor()[1]
-                else:
-                    red_fac = 1.0
-                sum_nel = sum([comp[el] / red_fac for el in el_list])
-                for i in range(1, len(entry_list)):
-                    el = el_list[i]
-                    A[i-1][j-1] = comp_list[i] * sum_nel -\
-                        comp[Element(el)] / red_fac
+    @staticmethod
+    def _get_combination_weights(amounts, combos, comp_list):
+        """
+        Solves the weights of many combinations of entries at once.
+
+        Args:
+            amounts: Array with the amounts of the elements in each entry.
+            combos: (M, k) array with the indices of the entries of M
+                combinations.
+            comp_list: Target fractions of the elements.
+
+        Returns:
+            (weights, valid): (M, k) array with the weights of the entries
+            (the weight of the first entry is 1) and boolean array that is
+            True for the combinations with positive weights reproducing the
+            target composition.
+        """
+        nc, k = combos.shape
+        N = len(comp_list)
+        c = amounts[combos]
+        # d[m, j, i] is the excess of element i with respect to the target
+        # composition in the entry j of the combination m.
+        d = comp_list * c.sum(axis=2)[:, :, None] - c
+        a = np.transpose(d[:, 1:, 1:k], (0, 2, 1))
+        b = -d[:, 0, 1:k]
+
+        valid = np.abs(np.linalg.det(a)) > 1e-12
+        weights = np.ones((nc, k))
+        if valid.any():
+            weights[valid, 1:] = np.linalg.solve(a[valid],
+                                                 b[valid][:, :, None])[:, :, 0]
+        valid &= np.all(weights > 0.0, axis=1)
+
+        if k < N:
+            # Only k-1 elements are used to compute the weights. Check that
+            # the other elements match the target composition as well.
+            residual = np.einsum("mj,mji->mi", weights, d[:, :, k:])
+            total = np.einsum("mj,mji->m", weights, c)
+            valid &= np.all(np.abs(residual) <= 1e-8 * total[:, None], axis=1)
+
+        return weights, valid
+
+    @staticmethod
+    def _get_prunable_mask(entries, amounts):
+        """
+        Returns a boolean array that is False for the entries that cannot be
+        stable at any pH and potential.
+
+        The entries are grouped by the ratio between their non-O/H elements.
+        An entry that is not on the lower convex hull of the free energies
+        (per non-O/H atom, i.e. normalized by nM as in the convex hull of the
+        diagram) of its group in the (npH, nPhi, g0) space is
+        always above another member of the group. It can thus be replaced
+        by this member in any combination, so that no combination containing
+        it can be stable.
+        """
+        sum_amounts = amounts.sum(axis=1)
+        keep = np.ones(len(entries), dtype=bool)
+        groups = collections.defaultdict(list)
+        for i, (row, tot) in enumerate(zip(amounts, sum_amounts)):
+            if tot > 0:
+                groups[tuple(np.round(row / tot, 6))].append(i)
+
+        for inds in groups.values():
+            if len(inds) < 4:
+                continue
+            data = np.array([[e.npH, e.nPhi, e.energy - MU_H2O * e.nH2O +
+                              PREFAC * np.log10(e.conc)]
+                             for e in [entries[i] for i in inds]])
+            data /= np.array([entries[i].nM for i in inds])[:, None]
             try:
-                weights = np.linalg.solve(np.array(A), np.array(b))
-            except np.linalg.linalg.LinAlgError as err:
-                if 'Singular matrix' in err.message:
-                    continue
-                else:
-                    raise Exception("Unknown Error message!")
-            if not(np.all(weights > 0.0)):
+                hull_facets = ConvexHull(data.tolist()).vertices
+            except Exception:
+                # Degenerate set of points (e.g. coplanar). Keep all the entries.
                 continue
-            weights = list(weights)
-            weights.insert(0, 1.0)
-            super_entry = MultiEntry(multi_entries, weights)
-            processed_entries.append(super_entry)
-        return processed_entries
+
+            center = data.mean(axis=0)
+            lower_hull = set()
+            for facet in hull_facets:
+                n = np.cross(data[facet[1]] - data[facet[0]],
+                             data[facet[2]] - data[facet[0]])
+                if np.dot(n, data[facet[0]] - center) < 0:
+                    n = -n
+                if n[2] <= 1e-8 * np.linalg.norm(n):
+                    lower_hull.update(facet)
+            if not lower_hull:
+                continue
+            for j, i in enumerate(inds):
+                keep[i] = j in lower_hull
+
+        return keep
 
     def _make_pourbaixdiagram(self):
         """
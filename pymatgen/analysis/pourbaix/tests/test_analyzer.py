@@ -6,6 +6,7 @@ from __future__ import unicode_literals
 
 import unittest2 as unittest
 import os
+import numpy as np
 
 from pymatgen.analysis.pourbaix.maker import PourbaixDiagram
 from pymatgen.analysis.pourbaix.entry import PourbaixEntryIO
@@ -45,5 +46,24 @@ class TestPourbaixAnalyzer(unittest.TestCase):
             e_above_hull = self.analyzer.get_e_above_hull(entry)
             self.assertAlmostEqual(e_above_hull, self.e_above_hull_test[entry.name], 3)
 
+    def test_get_stability_map(self):
+        pH, V = np.meshgrid(np.linspace(-2, 16, 7), np.linspace(-3, 3, 5))
+        stable_entries = self.pd.stable_entries
+        stable_map, e_above_hull = self.analyzer.get_stability_map(pH, V)
+        self.assertEqual(stable_map.shape, pH.shape)
+        self.assertEqual(e_above_hull.shape, (len(stable_entries),) + pH.shape)
+        for (i, j), ind in np.ndenumerate(stable_map):
+            g = [self.analyzer.g(e, pH[i, j], V[i, j]) for e in stable_entries]
+            self.assertAlmostEqual(g[ind], min(g))
+            self.assertTrue(np.allclose(e_above_hull[:, i, j],
+                                        np.array(g) - min(g)))
+
+        # Reuse the analyzer with another grid and other entries.
+        entries = self.pd.all_entries
+        stable_map, e_above_hull = self.analyzer.get_stability_map(
+            [0, 7, 14], 0.5, entries=entries)
+        self.assertEqual(e_above_hull.shape, (len(entries), 3))
+        self.assertTrue(np.all(e_above_hull > -1e-8))
+
 if __name__ == '__main__':
     unittest.main()
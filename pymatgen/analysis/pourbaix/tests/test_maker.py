@@ -6,9 +6,14 @@ from __future__ import unicode_literals
 
 import unittest2 as unittest
 import os
+import numpy as np
 
 from pymatgen.analysis.pourbaix.maker import PourbaixDiagram
-from pymatgen.analysis.pourbaix.entry import PourbaixEntryIO
+from pymatgen.analysis.pourbaix.entry import PourbaixEntryIO, PourbaixEntry, \
+    IonEntry
+from pymatgen.phasediagram.entries import PDEntry
+from pymatgen.core.composition import Composition
+from pymatgen.core.ion import Ion
 
 
 class TestPourbaixDiagram(unittest.TestCase):
@@ -27,5 +32,46 @@ class TestPourbaixDiagram(unittest.TestCase):
         for entry in self._pd.stable_entries:
             self.assertIn(entry.name, self.list_of_stable_entries, "List of stable entries does not match")
 
+    def test_get_combination_weights(self):
+        amounts = np.array([[1.0, 0.0], [0.0, 1.0], [1.0, 1.0], [0.0, 2.0]])
+        combos = np.array([[0, 1], [0, 2], [0, 3], [1, 2]])
+        weights, valid = PourbaixDiagram._get_combination_weights(
+            amounts, combos, np.array([0.5, 0.5]))
+        self.assertEqual(valid.tolist(), [True, False, True, False])
+        self.assertTrue(np.allclose(weights[0], [1.0, 1.0]))
+        self.assertTrue(np.allclose(weights[2], [1.0, 0.5]))
+
+        # Only combinations covering both elements are generated.
+        entries_by_elset = {frozenset([0]): [0], frozenset([1]): [1, 3],
+                            frozenset([0, 1]): [2]}
+        combos = set(PourbaixDiagram._get_covering_combinations(
+            entries_by_elset, frozenset([0, 1]), 2))
+        self.assertEqual(combos, {(0, 1), (0, 3), (0, 2), (1, 2), (2, 3)})
+
+
+    def _get_multielement_entries(self):
+        module_dir = os.path.dirname(os.path.abspath(__file__))
+        entries = PourbaixEntryIO.from_csv(os.path.join(module_dir,
+                                                        "test_entries.csv"))[1]
+        # ZnO is given as an unreduced solid.
+        entries = [e for e in entries if e.name != "ZnO(s)"]
+        entries.append(PourbaixEntry(PDEntry(Composition("Zn2O2"), -6.676)))
+        entries.extend([PourbaixEntry(PDEntry(Composition("Cu"), 0.0)),
+                        PourbaixEntry(PDEntry(Composition("CuO"), -1.34)),
+                        PourbaixEntry(PDEntry(Composition("Cu2O"), -1.51)),
+                        PourbaixEntry(IonEntry(Ion.from_formula("Cu[2+]"),
+                                               0.68))])
+        return entries
+
+    def test_prune_entries(self):
+        comp_dict = {"Zn": 0.5, "Cu": 0.5}
+        pd = PourbaixDiagram(self._get_multielement_entries(), comp_dict)
+        pd_pruned = PourbaixDiagram(self._get_multielement_entries(),
+                                    comp_dict, prune_entries=True)
+        self.assertLess(len(pd_pruned.all_entries), len(pd.all_entries))
+        self.assertEqual(set(e.name for e in pd_pruned.stable_entries),
+                         set(e.name for e in pd.stable_entries))
+        self.assertTrue(any("ZnO(s)" in e.name for e in pd.stable_entries))
+
 if __name__ == '__main__':
     unittest.main()
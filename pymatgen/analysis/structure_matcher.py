@@ -9,12 +9,12 @@ This module provides classes to perform fitting of structures.
 from __future__ import division, unicode_literals
 
 import six
-from six.moves import filter
 from six.moves import zip
 
 import numpy as np
 import itertools
 import abc
+import collections
 
 from monty.json import MSONable
 from pymatgen.core.structure import Structure
@@ -343,12 +343,19 @@ class StructureMatcher(MSONable):
             certain ions, e.g., Li-ion intercalation frameworks. This is more
             useful than allow_subset because it allows better control over
             what species are ignored in the matching.
+        cache_size (int): Maximum number of reduced (primitive and niggli)
+            structures cached by fit, get_rms_dist, fit_anonymous and
+            get_rms_anonymous. A structure compared against many others,
+            e.g., when checking a new structure against a database, is then
+            only reduced once. Structures are identified by their lattice,
+            coordinates and species, so modified structures are not
+            mistaken for cached ones. Set to 0 to disable caching.
     """
 
     def __init__(self, ltol=0.2, stol=0.3, angle_tol=5, primitive_cell=True,
                  scale=True, attempt_supercell=False, allow_subset=False,
                  comparator=SpeciesComparator(), supercell_size='num_sites',
-                 ignored_species=None):
+                 ignored_species=None, cache_size=100):
 
         self.ltol = ltol
         self.stol = stol
@@ -361,6 +368,15 @@ class StructureMatcher(MSONable):
         self._subset = allow_subset
         self._ignored_species = [] if ignored_species is None else \
             ignored_species[:]
+        self._cache_size = cache_size
+        self._reduced_cache = collections.OrderedDict()
+
+    def __getstate__(self):
+        # The cache is not pickled, e.g., when sending the matcher to
+        # multiprocessing workers.
+        d = self.__dict__.copy()
+        d["_reduced_cache"] = collections.OrderedDict()
+        return d
 
     def _get_supercell_size(self, s1, s2):
         """
@@ -537,13 +553,15 @@ class StructureMatcher(MSONable):
         Returns:
             True or False.
         """
-        struct1, struct2 = self._process_species([struct1, struct2])
+        comp1, struct1 = self._get_cached_reduced_structure(struct1)
+        comp2, struct2 = self._get_cached_reduced_structure(struct2)
 
-        if not self._subset and self._comparator.get_hash(struct1.composition) \
-                != self._comparator.get_hash(struct2.composition):
+        if not self._subset and self._comparator.get_hash(comp1) \
+                != self._comparator.get_hash(comp2):
             return None
 
-        struct1, struct2, fu, s1_supercell = self._preprocess(struct1, struct2)
+        struct1, struct2, fu, s1_supercell = self._scale_reduced(struct1,
+                                                                 struct2)
         match = self._match(struct1, struct2, fu, s1_supercell,
                             break_on_match=True)
 
@@ -565,8 +583,10 @@ class StructureMatcher(MSONable):
             and maximum distance between paired sites. If no matching
             lattice is found None is returned.
         """
-        struct1, struct2 = self._process_species([struct1, struct2])
-        struct1, struct2, fu, s1_supercell = self._preprocess(struct1, struct2)
+        struct1 = self._get_cached_reduced_structure(struct1)[1]
+        struct2 = self._get_cached_reduced_structure(struct2)[1]
+        struct1, struct2, fu, s1_supercell = self._scale_reduced(struct1,
+                                                                 struct2)
         match = self._match(struct1, struct2, fu, s1_supercell, use_rms=True,
                             break_on_match=False)
 
@@ -593,18 +613,60 @@ class StructureMatcher(MSONable):
         and finds fu, the supercell size to make struct1 comparable to
         s2
         """
-        struct1 = struct1.copy()
-        struct2 = struct2.copy()
+        struct1 = self._get_reduced_structure(struct1, niggli)
+        struct2 = self._get_reduced_structure(struct2, niggli)
+        return self._scale_reduced(struct1, struct2)
+
+    def _get_reduced_structure(self, struct, niggli=True):
+        """
+        Finds the reduced structure (niggli and primitive) of a single
+        structure. Unlike the rest of the preprocessing, this does not
+        depend on the structure it is compared to.
+        """
+        struct = struct.copy()
 
         if niggli:
-            struct1 = struct1.get_reduced_structure(reduction_algo="niggli")
-            struct2 = struct2.get_reduced_structure(reduction_algo="niggli")
+            struct = struct.get_reduced_structure(reduction_algo="niggli")
 
         # primitive cell transformation
         if self._primitive_cell:
-            struct1 = struct1.get_primitive_structure()
-            struct2 = struct2.get_primitive_structure()
+            struct = struct.get_primitive_structure()
+
+        return struct
 
+    def _get_cached_reduced_structure(self, struct, niggli=True):
+        """
+        Processes the species of a structure and finds its reduced structure,
+        using a bounded least recently used cache.
+
+        Returns:
+            (composition of the processed structure, reduced structure). The
+            reduced structure may be shared with other calls and must not be
+            modified.
+        """
+        key = None
+        if self._cache_size:
+            key = (_get_structure_key(struct), niggli)
+            if key in self._reduced_cache:
+                # Move to the end as the most recently used entry.
+                value = self._reduced_cache.pop(key)
+                self._reduced_cache[key] = value
+                return value
+
+        processed = self._process_species([struct])[0]
+        value = (processed.composition,
+                 self._get_reduced_structure(processed, niggli))
+        if key is not None:
+            if len(self._reduced_cache) >= self._cache_size:
+                self._reduced_cache.popitem(last=False)
+            self._reduced_cache[key] = value
+        return value
+
+    def _scale_reduced(self, struct1, struct2):
+        """
+        Finds fu, the supercell size to make struct1 comparable to s2, and
+        rescales copies of the reduced structures to the same volume.
+        """
         if self._supercell:
             fu, s1_supercell = self._get_supercell_size(struct1, struct2)
         else:
@@ -614,13 +676,53 @@ class StructureMatcher(MSONable):
         # rescale lattice to same volume
         if self._scale:
             ratio = (struct2.volume / (struct1.volume * mult)) ** (1 / 6)
+            struct1 = struct1.copy()
             nl1 = Lattice(struct1.lattice.matrix * ratio)
             struct1.modify_lattice(nl1)
+            struct2 = struct2.copy()
             nl2 = Lattice(struct2.lattice.matrix / ratio)
             struct2.modify_lattice(nl2)
 
         return struct1, struct2, fu, s1_supercell
 
+    def _fit_reduced(self, struct1, struct2, anonymous=False):
+        """
+        Fits two structures that have already been processed and reduced
+        with _get_reduced_structure. Returns the same as fit, or
+        fit_anonymous if anonymous is True.
+        """
+        struct1, struct2, fu, s1_supercell = self._scale_reduced(struct1,
+                                                                 struct2)
+        if anonymous:
+            return bool(self._anonymous_match(
+                struct1, struct2, fu, s1_supercell, break_on_match=True,
+                single_match=True))
+        match = self._match(struct1, struct2, fu, s1_supercell,
+                            break_on_match=True)
+        return match is not None and match[0] <= self.stol
+
+    def _get_group_invariants(self, struct):
+        """
+        Returns cheap invariants of a reduced structure that are used to
+        rule out matches in group_structures without calling fit:
+        (number of sites, length of shortest lattice vector, shortest
+        lattice parameter). Lengths are normalized by the cube root of the
+        volume if structures are scaled.
+
+        fit(s1, s2) requires a basis of the s1 lattice with lengths within
+        ltol of the lattice parameters of s2, which can only exist if the
+        shortest lattice vector of s1 is shorter than (1 + ltol) times the
+        shortest lattice parameter of s2. Without supercells, the number of
+        sites must also be the same.
+        """
+        latt = struct.lattice
+        norm = latt.volume ** (1 / 3) if self._scale else 1
+        min_abc = min(latt.abc)
+        dists = latt.get_points_in_sphere([[0, 0, 0]], [0, 0, 0], min_abc,
+                                          zip_results=False)[1]
+        shortest = min([min_abc] + list(dists[dists > 1e-8]))
+        return len(struct), shortest / norm, min_abc / norm
+
     def _match(self, struct1, struct2, fu, s1_supercell=True, use_rms=False,
                break_on_match=False):
         """
@@ -697,14 +799,22 @@ class StructureMatcher(MSONable):
         if best_match and best_match[0] < self.stol:
             return best_match
 
-    def group_structures(self, s_list, anonymous=False):
+    def group_structures(self, s_list, anonymous=False, ncpus=None):
         """
         Given a list of structures, use fit to group
         them by structural equality.
 
+        Structures are pre-grouped by composition and each structure is
+        reduced only once. Pairs that cannot match based on cheap lattice
+        invariants (see _get_group_invariants) are not fitted, which gives
+        the same groups as fitting all pairs.
+
         Args:
             s_list ([Structure]): List of structures to be grouped
             anonymous (bool): Wheher to use anonymous mode.
+            ncpus (int): Number of cpus to use. Default of None means serial
+                processing. Otherwise, the reduction of the structures and
+                the fits are distributed over a multiprocessing pool.
 
         Returns:
             A list of lists of matched structures
@@ -718,35 +828,80 @@ class StructureMatcher(MSONable):
         original_s_list = list(s_list)
         s_list = self._process_species(s_list)
 
-        # Use structure hash to pre-group structures
-        if anonymous:
-            c_hash = lambda c: c.anonymized_formula
-        else:
-            c_hash = self._comparator.get_hash
-        s_hash = lambda s: c_hash(s[1].composition)
-        sorted_s_list = sorted(enumerate(s_list), key=s_hash)
-        all_groups = []
-
-        # For each pre-grouped list of structures, perform actual matching.
-        for k, g in itertools.groupby(sorted_s_list, key=s_hash):
-            unmatched = list(g)
-            while len(unmatched) > 0:
-                i, refs = unmatched.pop(0)
-                matches = [i]
-                if anonymous:
-                    inds = filter(lambda i: self.fit_anonymous(refs,
-                            unmatched[i][1]), list(range(len(unmatched))))
-                else:
-                    inds = filter(lambda i: self.fit(refs, unmatched[i][1]),
-                                  list(range(len(unmatched))))
-                inds = list(inds)
-                matches.extend([unmatched[i][0] for i in inds])
-                unmatched = [unmatched[i] for i in range(len(unmatched))
-                             if i not in inds]
-                all_groups.append([original_s_list[i] for i in matches])
+        pool = None
+        if ncpus:
+            import multiprocessing as mp
+            pool = mp.Pool(ncpus)
+
+        try:
+            if pool:
+                reduced = pool.map(_get_reduced_structure,
+                                   [(self, s) for s in s_list])
+            else:
+                reduced = [self._get_reduced_structure(s) for s in s_list]
+            invariants = np.array([self._get_group_invariants(s)
+                                   for s in reduced])
+            # Without supercells, only structures with the same number of
+            # sites and compatible lattices can match.
+            use_invariants = not self._supercell
+            tol = (1 + self.ltol) * (1 + 1e-6)
+
+            # Use structure hash to pre-group structures
+            if anonymous:
+                c_hash = lambda c: c.anonymized_formula
+            else:
+                c_hash = self._comparator.get_hash
+            s_hash = lambda i: c_hash(s_list[i].composition)
+            sorted_inds = sorted(range(len(s_list)), key=s_hash)
+            all_groups = []
+
+            # For each pre-grouped list of structures, perform actual
+            # matching.
+            for k, g in itertools.groupby(sorted_inds, key=s_hash):
+                unmatched = np.array(list(g), dtype=np.int)
+                while len(unmatched) > 0:
+                    i, unmatched = unmatched[0], unmatched[1:]
+                    if use_invariants:
+                        inv = invariants[unmatched]
+                        candidates = unmatched[np.logical_and(
+                            inv[:, 0] == invariants[i, 0],
+                            inv[:, 2] * tol > invariants[i, 1])]
+                    else:
+                        candidates = unmatched
+                    fits = self._fit_many(reduced, i, candidates, anonymous,
+                                          pool, ncpus)
+                    matched = candidates[fits]
+                    all_groups.append([original_s_list[j]
+                                       for j in [i] + matched.tolist()])
+                    unmatched = unmatched[np.logical_not(
+                        np.in1d(unmatched, matched))]
+        finally:
+            if pool:
+                pool.close()
+                pool.join()
 
         return all_groups
 
+    def _fit_many(self, reduced, i, candidates, anonymous, pool, ncpus):
+        """
+        Fits reduced[i] against reduced[j] for all j in candidates,
+        optionally using a multiprocessing pool.
+
+        Returns:
+            Boolean numpy array.
+        """
+        if len(candidates) == 0:
+            return np.zeros(0, dtype=np.bool)
+        if pool and len(candidates) > 1:
+            nchunks = min(len(candidates), 4 * ncpus)
+            chunks = np.array_split(candidates, nchunks)
+            fits = pool.map(_fit_reduced,
+                            [(self, reduced[i], [reduced[j] for j in c],
+                              anonymous) for c in chunks])
+            return np.array(list(itertools.chain(*fits)), dtype=np.bool)
+        return np.array([self._fit_reduced(reduced[i], reduced[j], anonymous)
+                         for j in candidates], dtype=np.bool)
+
     def as_dict(self):
         return {"version": __version__, "@module": self.__class__.__module__,
                 "@class": self.__class__.__name__,
@@ -830,8 +985,10 @@ class StructureMatcher(MSONable):
             struct1 to struct2. (None, None) is returned if the minimax_rms
             exceeds the threshold.
         """
-        struct1, struct2 = self._process_species([struct1, struct2])
-        struct1, struct2, fu, s1_supercell = self._preprocess(struct1, struct2)
+        struct1 = self._get_cached_reduced_structure(struct1)[1]
+        struct2 = self._get_cached_reduced_structure(struct2)[1]
+        struct1, struct2, fu, s1_supercell = self._scale_reduced(struct1,
+                                                                 struct2)
 
         matches = self._anonymous_match(struct1, struct2, fu, s1_supercell,
                                         use_rms=True, break_on_match=False)
@@ -914,9 +1071,10 @@ class StructureMatcher(MSONable):
         Returns:
             True/False: Whether a species mapping can map struct1 to stuct2
         """
-        struct1, struct2 = self._process_species([struct1, struct2])
-        struct1, struct2, fu, s1_supercell = self._preprocess(struct1, struct2,
-                                                              niggli)
+        struct1 = self._get_cached_reduced_structure(struct1, niggli)[1]
+        struct2 = self._get_cached_reduced_structure(struct2, niggli)[1]
+        struct1, struct2, fu, s1_supercell = self._scale_reduced(struct1,
+                                                                 struct2)
 
         matches = self._anonymous_match(struct1, struct2, fu, s1_supercell,
                                         break_on_match=True, single_match=True)
@@ -1075,3 +1233,33 @@ class StructureMatcher(MSONable):
             return None
 
         return match[4]
+
+
+def _get_structure_key(structure):
+    """
+    Returns a hashable key identifying a structure by its lattice,
+    fractional coordinates and species, for StructureMatcher's cache of
+    reduced structures.
+    """
+    return (np.array(structure.lattice.matrix).tostring(),
+            np.array(structure.frac_coords).tostring(),
+            tuple(tuple(site.species_and_occu.items()) for site in structure))
+
+
+def _get_reduced_structure(args):
+    """
+    Helper for StructureMatcher.group_structures, defined at the module
+    level so that it can be used with multiprocessing.
+    """
+    matcher, structure = args
+    return matcher._get_reduced_structure(structure)
+
+
+def _fit_reduced(args):
+    """
+    Helper for StructureMatcher.group_structures, defined at the module
+    level so that it can be used with multiprocessing.
+    """
+    matcher, struct1, others, anonymous = args
+    return [matcher._fit_reduced(struct1, struct2, anonymous)
+            for struct2 in others]
@@ -8,7 +8,8 @@ import unittest2 as unittest
 import os
 import warnings
 
-from pymatgen.analysis.ewald import EwaldSummation, EwaldMinimizer
+from pymatgen.analysis.ewald import EwaldSummation, EwaldMinimizer, \
+    IncrementalEwaldSummation
 from pymatgen.io.vasp.inputs import Poscar
 import numpy as np
 
@@ -62,6 +63,82 @@ class EwaldSummationTest(unittest.TestCase):
         ham2 = EwaldSummation(original_s)
         self.assertAlmostEqual(ham2.real_space_energy, -502.23549897772602, 4)
 
+    def test_blocks_and_symmetry(self):
+        filepath = os.path.join(test_dir, 'POSCAR')
+        s = Poscar.from_file(filepath).structure
+        s.add_oxidation_state_by_element({"Li": 1, "Fe": 2,
+                                          "P": 5, "O": -2})
+        ham = EwaldSummation(s, compute_forces=True)
+        self.assertTrue(np.allclose(ham.real_space_energy_matrix,
+                                    ham.real_space_energy_matrix.T))
+        # Net force on the cell vanishes.
+        self.assertTrue(np.allclose(np.sum(ham.forces, axis=0), 0,
+                                    atol=1e-6))
+        block_size = EwaldSummation.BLOCK_SIZE
+        try:
+            EwaldSummation.BLOCK_SIZE = 100
+            ham2 = EwaldSummation(s, compute_forces=True)
+        finally:
+            EwaldSummation.BLOCK_SIZE = block_size
+        self.assertTrue(np.allclose(ham.reciprocal_space_energy_matrix,
+                                    ham2.reciprocal_space_energy_matrix))
+        self.assertTrue(np.allclose(ham.forces, ham2.forces))
+
+
+class IncrementalEwaldSummationTest(unittest.TestCase):
+
+    def setUp(self):
+        filepath = os.path.join(test_dir, 'POSCAR')
+        self.p = Poscar.from_file(filepath)
+        self.s = self.p.structure.copy()
+        self.s.add_oxidation_state_by_element({"Li": 1, "Fe": 2,
+                                               "P": 5, "O": -2})
+        self.ewald = EwaldSummation(self.s)
+
+    def test_energy(self):
+        inc = IncrementalEwaldSummation(self.ewald)
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            self.assertAlmostEqual(inc.energy, self.ewald.total_energy, 6)
+        self.assertRaises(ValueError, IncrementalEwaldSummation,
+                          EwaldSummation(self.p.structure.copy(
+                              site_properties={"charge": [0] * len(self.s)})))
+
+    def test_swap(self):
+        inc = IncrementalEwaldSummation(self.ewald)
+        e0 = inc.energy
+        # Swap an Fe and a P site.
+        i, j = 0, 4
+        self.assertEqual(self.s[i].specie.symbol, "Fe")
+        self.assertEqual(self.s[j].specie.symbol, "P")
+        expected = inc.get_swap_energy(i, j)
+        delta = inc.swap(i, j)
+        self.assertAlmostEqual(delta, expected)
+        s = self.s.copy()
+        sp_i, sp_j = s[i].specie, s[j].specie
+        s.replace(i, sp_j)
+        s.replace(j, sp_i)
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            self.assertAlmostEqual(inc.energy, EwaldSummation(s).total_energy,
+                                   6)
+        self.assertAlmostEqual(inc.swap(i, j), -delta)
+        self.assertAlmostEqual(inc.energy, e0)
+
+    def test_set_charge_and_remove(self):
+        inc = IncrementalEwaldSummation(self.ewald)
+        for i in [0, 1, 5]:
+            inc.remove(i)
+        self.assertAlmostEqual(
+            inc.energy, self.ewald.compute_partial_energy([0, 1, 5]), 6)
+        self.assertEqual(list(inc.charges[[0, 1, 5]]), [0, 0, 0])
+        delta = inc.set_charge(0, 2)
+        self.assertAlmostEqual(
+            inc.energy, self.ewald.compute_partial_energy([1, 5]), 6)
+        self.assertAlmostEqual(inc.get_charge_change_energy(0, 0), -delta)
+        self.assertTrue(np.allclose(
+            inc.potentials, np.dot(inc.interaction_matrix, inc.charges)))
+
 
 class EwaldMinimizerTest(unittest.TestCase):
 
@@ -295,6 +295,42 @@ class StructureMatcherTest(PymatgenTest):
         out = sm.group_structures(self.struct_list, anonymous=True)
         self.assertEqual(list(map(len, out)), [4, 1, 1, 1, 1, 1, 1, 1, 2, 2, 1])
 
+    def test_group_structures_ncpus(self):
+        sm = StructureMatcher()
+        out = sm.group_structures(self.struct_list)
+        out2 = sm.group_structures(self.struct_list, ncpus=2)
+        self.assertEqual([[self.struct_list.index(s) for s in g] for g in out],
+                         [[self.struct_list.index(s) for s in g]
+                          for g in out2])
+        # Invariants are independent of the choice of cell.
+        s = self.struct_list[0].copy()
+        inv = sm._get_group_invariants(sm._get_reduced_structure(s))
+        s.make_supercell([[1, 1, 0], [0, 1, 0], [0, 0, 2]])
+        s.scale_lattice(s.volume * 1.2)
+        inv2 = sm._get_group_invariants(sm._get_reduced_structure(s))
+        self.assertTrue(np.allclose(inv, inv2))
+
+    def test_cache(self):
+        sm = StructureMatcher(cache_size=2)
+        sm_nocache = StructureMatcher(cache_size=0)
+        s1 = self.struct_list[0]
+        for s2 in self.struct_list:
+            self.assertEqual(sm.fit(s1, s2), sm_nocache.fit(s1, s2))
+            self.assertEqual(sm.get_rms_dist(s1, s2),
+                             sm_nocache.get_rms_dist(s1, s2))
+        self.assertEqual(len(sm._reduced_cache), 2)
+        self.assertEqual(len(sm_nocache._reduced_cache), 0)
+        # Modified structures must not be taken from the cache.
+        s2 = s1.copy()
+        self.assertTrue(sm.fit(s1, s2))
+        s2.replace_species({"Ti": "Zr"})
+        self.assertFalse(sm.fit(s1, s2))
+        s2 = s1.copy()
+        s2.apply_strain(0.5)
+        sm = StructureMatcher(scale=False)
+        self.assertTrue(sm.fit(s1, s1.copy()))
+        self.assertFalse(sm.fit(s1, s2))
+
     def test_mix(self):
         structures = [self.get_structure("Li2O"),
                       self.get_structure("Li2O2"),
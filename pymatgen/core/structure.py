@@ -42,7 +42,7 @@ from pymatgen.core.sites import Site, PeriodicSite
 from pymatgen.core.bonds import CovalentBond, get_bond_length
 from pymatgen.core.composition import Composition
 from pymatgen.util.coord_utils import get_angle, all_distances, \
-    lattice_points_in_supercell
+    lattice_points_in_supercell, find_points_in_spheres
 from pymatgen.core.units import Mass, Length, ArrayWithUnit
 from pymatgen.symmetry.groups import SpaceGroup
 from monty.io import zopen
@@ -706,7 +706,8 @@ class IStructure(SiteCollection, MSONable):
         """
         return self[i].distance(self[j], jimage)
 
-    def get_sites_in_sphere(self, pt, r, include_index=False):
+    def get_sites_in_sphere(self, pt, r, include_index=False,
+                            method="cell_list"):
         """
         Find all sites within a sphere from the point. This includes sites
         in other periodic images.
@@ -728,23 +729,27 @@ class IStructure(SiteCollection, MSONable):
             r (float): Radius of sphere.
             include_index (bool): Whether the non-supercell site index
                 is included in the returned data
+            method (str): Neighbor search algorithm, either "cell_list"
+                (default) or "kdtree". See
+                :func:`pymatgen.util.coord_utils.find_points_in_spheres`.
 
         Returns:
             [(site, dist) ...] since most of the time, subsequent processing
             requires the distance.
         """
         site_fcoords = np.mod(self.frac_coords, 1)
+        _, inds, images, dists = find_points_in_spheres(
+            self._lattice, site_fcoords, pt, r, method=method)
         neighbors = []
-        for fcoord, dist, i in self._lattice.get_points_in_sphere(
-                site_fcoords, pt, r):
+        for i, image, dist in zip(inds, images, dists):
             nnsite = PeriodicSite(self[i].species_and_occu,
-                                  fcoord, self._lattice,
+                                  site_fcoords[i] + image, self._lattice,
                                   properties=self[i].properties)
             neighbors.append((nnsite, dist) if not include_index
                              else (nnsite, dist, i))
         return neighbors
 
-    def get_neighbors(self, site, r, include_index=False):
+    def get_neighbors(self, site, r, include_index=False, method="cell_list"):
         """
         Get all neighbors to a site within a sphere of radius r.  Excludes the
         site itself.
@@ -757,16 +762,20 @@ class IStructure(SiteCollection, MSONable):
             include_index:
                 boolean that determines whether the non-supercell site index
                 is included in the returned data
+            method:
+                Neighbor search algorithm, either "cell_list" (default) or
+                "kdtree".
 
         Returns:
             [(site, dist) ...] since most of the time, subsequent processing
             requires the distance.
         """
         nn = self.get_sites_in_sphere(site.coords, r,
-                                      include_index=include_index)
+                                      include_index=include_index,
+                                      method=method)
         return [d for d in nn if site != d[0]]
 
-    def get_all_neighbors(self, r, include_index=False):
+    def get_all_neighbors(self, r, include_index=False, method="cell_list"):
         """
         Get neighbors for each atom in the unit cell, out to a distance r
         Returns a list of list of neighbors for each site in structure.
@@ -779,10 +788,16 @@ class IStructure(SiteCollection, MSONable):
         The return type is a [(site, dist) ...] since most of the time,
         subsequent processing requires the distance.
 
+        The pairs are found with a linked-cell list (or a kd-tree) over the
+        periodic images near the unit cell, so the cost scales linearly with
+        the number of sites for a fixed r.
+
         Args:
             r (float): Radius of sphere.
             include_index (bool): Whether to include the non-supercell site
                 in the returned data
+            method (str): Neighbor search algorithm, either "cell_list"
+                (default) or "kdtree".
 
         Returns:
             A list of a list of nearest neighbors for each site, i.e.,
@@ -792,37 +807,48 @@ class IStructure(SiteCollection, MSONable):
             structure. This is needed for ewaldmatrix by keeping track of which
             sites contribute to the ewald sum.
         """
-        # Use same algorithm as get_sites_in_sphere to determine supercell but
-        # loop over all atoms in crystal
-        recp_len = np.array(self.lattice.reciprocal_lattice.abc)
-        maxr = np.ceil((r + 0.15) * recp_len / (2 * math.pi))
-        nmin = np.floor(np.min(self.frac_coords, axis=0)) - maxr
-        nmax = np.ceil(np.max(self.frac_coords, axis=0)) + maxr
-
-        all_ranges = [np.arange(x, y) for x, y in zip(nmin, nmax)]
-
         latt = self._lattice
         neighbors = [list() for i in range(len(self._sites))]
-        all_fcoords = np.mod(self.frac_coords, 1)
-        coords_in_cell = latt.get_cartesian_coords(all_fcoords)
-        site_coords = self.cart_coords
-
-        indices = np.arange(len(self))
-        for image in itertools.product(*all_ranges):
-            coords = latt.get_cartesian_coords(image) + coords_in_cell
-            all_dists = all_distances(coords, site_coords)
-            all_within_r = np.bitwise_and(all_dists <= r, all_dists > 1e-8)
-
-            for (j, d, within_r) in zip(indices, all_dists, all_within_r):
-                nnsite = PeriodicSite(self[j].species_and_occu, coords[j],
-                                      latt, properties=self[j].properties,
-                                      coords_are_cartesian=True)
-                for i in indices[within_r]:
-                    item = (nnsite, d[i], j) if include_index else (
-                        nnsite, d[i])
-                    neighbors[i].append(item)
+        centers, inds, images, dists = self.get_neighbor_list(r, method=method)
+        nnsites = {}
+        for i, j, image, d in zip(centers, inds, images, dists):
+            key = (j, tuple(image))
+            if key not in nnsites:
+                nnsites[key] = PeriodicSite(
+                    self[j].species_and_occu, self[j].frac_coords + image,
+                    latt, properties=self[j].properties)
+            nnsite = nnsites[key]
+            neighbors[i].append((nnsite, d, j) if include_index
+                                else (nnsite, d))
         return neighbors
 
+    def get_neighbor_list(self, r, method="cell_list"):
+        """
+        Get the neighbor pairs of all sites within a distance r as flat
+        arrays, without constructing any PeriodicSite objects. This is the
+        array-based equivalent of get_all_neighbors and is much cheaper in
+        both time and memory for large structures.
+
+        Args:
+            r (float): Radius of sphere.
+            method (str): Neighbor search algorithm, either "cell_list"
+                (default) or "kdtree".
+
+        Returns:
+            (center_indices, neighbor_indices, images, distances). The
+            neighbor of site center_indices[k] is the image of site
+            neighbor_indices[k] located at the fractional coordinates
+            frac_coords[neighbor_indices[k]] + images[k], at a distance
+            distances[k]. A site is not considered a neighbor of itself,
+            but its periodic images are.
+        """
+        centers, inds, images, dists = find_points_in_spheres(
+            self._lattice, self.frac_coords, self.cart_coords, r,
+            method=method)
+        not_self = dists > 1e-8
+        return centers[not_self], inds[not_self], images[not_self], \
+            dists[not_self]
+
     def get_neighbors_in_shell(self, origin, r, dr, include_index=False):
         """
         Returns all sites in a shell centered on origin (coords) between radii
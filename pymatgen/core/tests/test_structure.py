@@ -14,6 +14,7 @@ from pymatgen.core.lattice import Lattice
 import random
 import warnings
 import os
+import numpy as np
 
 
 class IStructureTest(PymatgenTest):
@@ -337,8 +338,10 @@ class IStructureTest(PymatgenTest):
 
         r = random.uniform(3, 6)
         all_nn = s.get_all_neighbors(r, True)
+        kd_nn = s.get_all_neighbors(r, True, method="kdtree")
         for i in range(len(s)):
             self.assertEqual(len(all_nn[i]), len(s.get_neighbors(s[i], r)))
+            self.assertEqual(len(all_nn[i]), len(kd_nn[i]))
 
         for site, nns in zip(s, all_nn):
             for nn in nns:
@@ -351,6 +354,27 @@ class IStructureTest(PymatgenTest):
         self.assertEqual(sum(map(len, s.get_all_neighbors(3))), 976)
 
 
+    def test_get_neighbor_list(self):
+        s = self.struct
+        r = random.uniform(3, 6)
+        all_nn = s.get_all_neighbors(r, True)
+        centers, inds, images, dists = s.get_neighbor_list(r)
+        self.assertEqual(len(centers), sum(map(len, all_nn)))
+        for i, nns in enumerate(all_nn):
+            self.assertArrayAlmostEqual(sorted(dists[centers == i]),
+                                        sorted([nn[1] for nn in nns]))
+        coords = s.lattice.get_cartesian_coords(s.frac_coords[inds] + images)
+        self.assertArrayAlmostEqual(
+            np.sum((coords - s.cart_coords[centers]) ** 2, axis=1) ** 0.5,
+            dists)
+
+        s = Structure(Lattice.cubic(2), ['Li', 'Li', 'Li', 'Si'],
+                      [[3.1] * 3, [0.11] * 3, [-1.91] * 3, [0.5] * 3])
+        centers, inds, images, dists = s.get_neighbor_list(0.2)
+        self.assertEqual(list(centers), [0, 0, 1, 1, 2, 2])
+        self.assertEqual(list(inds), [1, 2, 0, 2, 0, 1])
+        self.assertArrayEqual(images[0], [3, 3, 3])
+
     def test_get_all_neighbors_outside_cell(self):
         s = Structure(Lattice.cubic(2), ['Li', 'Li', 'Li', 'Si'],
                       [[3.1] * 3, [0.11] * 3, [-1.91] * 3, [0.5] * 3])
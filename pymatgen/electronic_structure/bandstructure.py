@@ -19,8 +19,10 @@ __date__ = "March 14, 2012"
 
 import numpy as np
 import math
-import itertools
 import collections
+import json
+
+import six
 
 from pymatgen.core.structure import Structure
 from pymatgen.core.lattice import Lattice
@@ -152,46 +154,60 @@ class BandStructure(object):
             associated with the band structure. This is needed if we
             provide projections to the band structure
         projections: dict of orbital projections for spin up and spin down
-            {Spin.up:[][{Orbital:[]}],Spin.down:[][{Orbital:[]}]. The
-            format follows the one from eigenvals: The first index of the
-            array refers to the band and the second to the index of the
-            kpoint. The kpoints are ordered according to the order of the
-            kpoints array. For each band and kpoint, we associate a
-            dictionary indicating projections on orbitals and on different
-            sites the keys of the dictionary are Orbital objects and the
-            values are the projections on each site ordered as in the
-            structure object. If the band structure is not spin polarized,
-            we only store one data set under Spin.up.
+            {Spin.up: array, Spin.down: array}. Each array has shape
+            (nb_bands, nkpoints, norbitals, nsites): the first index
+            refers to the band, the second to the index of the kpoint
+            (ordered as the kpoints array), the third to the orbital (the
+            value of the corresponding Orbital, e.g., Orbital.s.value) and
+            the last to the site, ordered as in the structure object. The
+            older nested format {Spin.up:[][{Orbital:[]}]}, with a
+            dictionary of projections on each site for each orbital and for
+            each band and kpoint, is also accepted. If the band structure is
+            not spin polarized, we only store one data set under Spin.up.
     """
 
     def __init__(self, kpoints, eigenvals, lattice, efermi, labels_dict=None,
                  coords_are_cartesian=False, structure=None, projections=None):
         self._efermi = efermi
         self._lattice_rec = lattice
-        self._kpoints = []
         self._labels_dict = {}
         self._structure = structure
-        self._projections = projections if projections else {}
+        # projections are converted to arrays (or read from the npz file,
+        # see from_npz) on first use, see the projections property
+        self._raw_projections = projections if projections else {}
+        self._projections = None
         if labels_dict is None:
             labels_dict = {}
 
-        if len(self._projections) != 0 and self._structure is None:
+        if len(self._raw_projections) != 0 and self._structure is None:
             raise Exception("if projections are provided a structure object"
                             " needs also to be given")
 
-        for k in kpoints:
-            #let see if this kpoint has been assigned a label
-            label = None
-            for c in labels_dict:
-                if np.linalg.norm(k - np.array(labels_dict[c])) < 0.0001:
-                    label = c
-                    self._labels_dict[label] = Kpoint(
-                        k, lattice, label=label,
-                        coords_are_cartesian=coords_are_cartesian)
-            self._kpoints.append(
-                Kpoint(k, lattice, label=label,
-                       coords_are_cartesian=coords_are_cartesian))
-        self._bands = eigenvals
+        coords = np.array(kpoints, dtype=float).reshape((-1, 3))
+        # let see which kpoints have been assigned a label. If several labels
+        # match a kpoint, the last one wins.
+        self._kpoint_labels = np.array([None] * len(coords), dtype=object)
+        for c in labels_dict:
+            match = np.linalg.norm(coords - np.array(labels_dict[c]),
+                                   axis=1) < 0.0001
+            if np.any(match):
+                self._kpoint_labels[match] = c
+                self._labels_dict[c] = Kpoint(
+                    coords[np.where(match)[0][-1]], lattice, label=c,
+                    coords_are_cartesian=coords_are_cartesian)
+        if coords_are_cartesian:
+            coords = lattice.get_fractional_coords(coords)
+        self._frac_coords = coords
+        # Kpoint objects are only created when the kpoints property is used.
+        self._kpoints = None
+        # indices of the kpoints having each label
+        self._label_indices = collections.defaultdict(list)
+        for i, label in enumerate(self._kpoint_labels):
+            if label is not None:
+                self._label_indices[label].append(i)
+
+        self._bands = {spin: np.array(eigenvals[spin], dtype=float)
+                       for spin in eigenvals}
         self._nb_bands = len(eigenvals[Spin.up])
 
         self._is_spin_polarized = False
@@ -203,8 +219,40 @@ class BandStructure(object):
         """
         the list of kpoints (as Kpoint objects) in the band structure
         """
+        if self._kpoints is None:
+            self._kpoints = [Kpoint(k, self._lattice_rec, label=label)
+                             for k, label in zip(self._frac_coords,
+                                                 self._kpoint_labels)]
         return self._kpoints
 
+    @property
+    def kpoint_frac_coords(self):
+        """
+        the fractional coordinates of all kpoints as a (nkpoints, 3) numpy
+        array, ordered as the kpoints
+        """
+        return self._frac_coords
+
+    def _get_kpoint(self, index):
+        """
+        Returns the Kpoint object for a kpoint index without building the
+        full list of kpoints.
+        """
+        if self._kpoints is not None:
+            return self._kpoints[index]
+        return Kpoint(self._frac_coords[index], self._lattice_rec,
+                      label=self._kpoint_labels[index])
+
+    def _get_equivalent_indices(self, index):
+        """
+        Returns the indices of all kpoints with the same label as the kpoint
+        index, or only index if the kpoint has no label.
+        """
+        label = self._kpoint_labels[index]
+        if label is None:
+            return [index]
+        return list(self._label_indices[label])
+
     @property
     def lattice(self):
         """
@@ -255,10 +303,66 @@ class BandStructure(object):
     @property
     def projections(self):
         """
-        returns the raw projections dict
+        returns the projections as a dict {spin: array}, each array having
+        the shape (nb_bands, nkpoints, norbitals, nsites). The orbital index
+        is the value of the corresponding Orbital.
         """
+        if self._projections is None:
+            self._projections = {
+                spin: _get_projection_array(self._raw_projections[spin])
+                for spin in self._raw_projections}
+            self._raw_projections = None
         return self._projections
 
+    def to_npz(self, filename):
+        """
+        Writes the band structure to a compressed numpy .npz file. This is
+        much smaller and faster to read than the json representation for
+        band structures with projections.
+
+        Args:
+            filename: Name of the file, conventionally ending in .npz.
+        """
+        arrays = {"bands_%d" % int(spin): self._bands[spin]
+                  for spin in self._bands}
+        arrays.update({"projections_%d" % int(spin): proj
+                       for spin, proj in self.projections.items()})
+        labels_dict = {c: k.frac_coords.tolist()
+                       for c, k in self._labels_dict.items()}
+        structure = self._structure.as_dict() if self._structure else None
+        np.savez_compressed(
+            filename, kpoints=self._frac_coords,
+            lattice_rec=self._lattice_rec.matrix, efermi=self._efermi,
+            labels_dict=json.dumps(labels_dict),
+            structure=json.dumps(structure), **arrays)
+
+    @classmethod
+    def from_npz(cls, filename):
+        """
+        Reads a band structure written by to_npz. The projections are read
+        from the file only when they are used, so the file must still exist
+        at that point.
+
+        Args:
+            filename: Name of the .npz file.
+
+        Returns:
+            A BandStructure (or BandStructureSymmLine if called on this class)
+        """
+        with np.load(filename) as data:
+            bands = {Spin(int(k.split("_")[1])): data[k]
+                     for k in data.files if k.startswith("bands_")}
+            projections = _NpzProjections(filename, {
+                Spin(int(k.split("_")[1])): k
+                for k in data.files if k.startswith("projections_")})
+            structure = json.loads(str(data["structure"]))
+            if structure is not None:
+                structure = Structure.from_dict(structure)
+            return cls(data["kpoints"], bands, Lattice(data["lattice_rec"]),
+                       float(data["efermi"]),
+                       json.loads(str(data["labels_dict"])),
+                       structure=structure, projections=projections)
+
     def get_projection_on_elements(self):
         """
         Method returning a dictionary of projections on elements.
@@ -269,23 +373,19 @@ class BandStructure(object):
             if there is no projections in the band structure
             returns an empty dict
         """
-        if len(self._projections) == 0:
+        if len(self.projections) == 0:
             return {}
-        if self.is_spin_polarized:
-            result = {Spin.up: [], Spin.down: []}
-        else:
-            result = {Spin.up: []}
-        structure = self._structure
-        for spin in result:
-            result[spin] = [[collections.defaultdict(float)
-                             for i in range(len(self._kpoints))]
-                            for j in range(self._nb_bands)]
-            for i, j, k in itertools.product(list(range(self._nb_bands)),
-                                             list(range(len(self._kpoints))),
-                                             list(range(structure.num_sites))):
-                for orb in self._projections[Spin.up][i][j]:
-                    result[spin][i][j][str(structure[k].specie)] += \
-                        self._projections[spin][i][j][orb][k]
+        elements = [str(site.specie) for site in self._structure]
+        names = sorted(set(elements))
+        # (nsites, nelements) matrix summing the sites of each element
+        site_to_element = np.array([[1.0 if e == n else 0.0 for n in names]
+                                    for e in elements])
+        result = {}
+        for spin, proj in self.projections.items():
+            proj_elts = np.einsum("bkos,se->bke", proj,
+                                  site_to_element).tolist()
+            result[spin] = [[dict(zip(names, proj_k)) for proj_k in proj_b]
+                            for proj_b in proj_elts]
         return result
 
     def get_projections_on_elts_and_orbitals(self, dictio):
@@ -305,30 +405,47 @@ class BandStructure(object):
             if there is no projections in the band structure returns an empty
             dict.
         """
-        if len(self._projections) == 0:
+        if len(self.projections) == 0:
             return {}
-        if self.is_spin_polarized:
-            result = {Spin.up: [], Spin.down: []}
-        else:
-            result = {Spin.up: []}
-        structure = self._structure
-        for spin in result:
-            result[spin] = [[{str(e): collections.defaultdict(float)
-                            for e in dictio}
-                            for i in range(len(self._kpoints))]
-                            for j in range(self._nb_bands)]
-
-            for i, j, k in itertools.product(
-                    list(range(self._nb_bands)), list(range(len(self._kpoints))),
-                    list(range(structure.num_sites))):
-                for orb in self._projections[Spin.up][i][j]:
-                    if str(structure[k].specie) in dictio:
-                        if str(orb)[0] in dictio[str(structure[k].specie)]:
-                            result[spin][i][j][str(structure[k].specie)]\
-                                [str(orb)[0]] += \
-                                self._projections[spin][i][j][orb][k]
+        elements = np.array([str(site.specie) for site in self._structure])
+        norb = list(self.projections.values())[0].shape[2]
+        orb_types = np.array([str(Orbital(i))[0] for i in range(norb)])
+        # masks of the (site, orbital) pairs summed for each element and
+        # orbital type
+        keys = []
+        masks = []
+        for e in dictio:
+            for o in dictio[e]:
+                site_mask = elements == str(e)
+                orb_mask = orb_types == o
+                if np.any(site_mask) and np.any(orb_mask):
+                    keys.append((str(e), o))
+                    masks.append(np.outer(orb_mask, site_mask))
+        masks = np.array(masks, dtype=float).reshape((-1, norb,
+                                                      len(elements)))
+        result = {}
+        for spin, proj in self.projections.items():
+            proj_elts = np.einsum("bkos,mos->bkm", proj, masks).tolist()
+            result[spin] = []
+            for proj_b in proj_elts:
+                result[spin].append([])
+                for proj_k in proj_b:
+                    d = {str(e): collections.defaultdict(float)
+                         for e in dictio}
+                    for (e, o), v in zip(keys, proj_k):
+                        d[e][o] = v
+                    result[spin][-1].append(d)
         return result
 
+    def _get_fermi_crossing_bands(self, spin):
+        """
+        Returns a boolean array of size nb_bands telling which bands of the
+        given spin cross the fermi level.
+        """
+        bands = self._bands[spin]
+        return np.any(bands < self._efermi, axis=1) & \
+            np.any(bands > self._efermi, axis=1)
+
     def is_metal(self):
         """
         Check if the band structure indicates a metal by looking if the fermi
@@ -337,27 +454,8 @@ class BandStructure(object):
         Returns:
             True if a metal, False if not
         """
-        for i in range(self._nb_bands):
-            below = False
-            above = False
-            for j in range(len(self._kpoints)):
-                if self._bands[Spin.up][i][j] < self._efermi:
-                    below = True
-                if self._bands[Spin.up][i][j] > self._efermi:
-                    above = True
-            if above and below:
-                return True
-            if self.is_spin_polarized:
-                below = False
-                above = False
-                for j in range(len(self._kpoints)):
-                    if self._bands[Spin.down][i][j] < self._efermi:
-                        below = True
-                    if self._bands[Spin.down][i][j] > self._efermi:
-                        above = True
-                if above and below:
-                    return True
-        return False
+        return any(np.any(self._get_fermi_crossing_bands(spin))
+                   for spin in self._bands)
 
     def get_vbm(self):
         """
@@ -369,7 +467,7 @@ class BandStructure(object):
             indices of the band containing the VBM (please note that you
             can have several bands sharing the VBM) {Spin.up:[],
             Spin.down:[]}
-            - "kpoint_index": The list of indices in self._kpoints for the
+            - "kpoint_index": The list of indices in self.kpoints for the
             kpoint vbm. Please note that there can be several
             kpoint_indices relating to the same kpoint (e.g., Gamma can
             occur at different spots in the band structure line plot)
@@ -384,41 +482,28 @@ class BandStructure(object):
         if self.is_metal():
             return {"band_index": [], "kpoint_index": [],
                     "kpoint": [], "energy": None, "projections": {}}
-        max_tmp = -float("inf")
-        index = None
-        kpointvbm = None
-        for i in range(self._nb_bands):
-            for j in range(len(self._kpoints)):
-                for spin in self._bands:
-                    if self._bands[spin][i][j] < self._efermi:
-                        if self._bands[spin][i][j] > max_tmp:
-                            max_tmp = self._bands[spin][i][j]
-                            index = j
-                            kpointvbm = self._kpoints[j]
-
-        list_ind_kpts = []
-        if kpointvbm.label is not None:
-            for i in range(len(self._kpoints)):
-                if self._kpoints[i].label == kpointvbm.label:
-                    list_ind_kpts.append(i)
-        else:
-            list_ind_kpts.append(index)
+        # energies ordered as (band, kpoint, spin) so that argmax returns
+        # the first of several degenerate maxima in that order
+        energies = np.array([self._bands[spin] for spin in self._bands])
+        energies = np.where(energies < self._efermi, energies,
+                            -np.inf).transpose((1, 2, 0))
+        i, index, s = np.unravel_index(np.argmax(energies), energies.shape)
+        max_tmp = float(energies[i, index, s])
+        index = int(index)
+        kpointvbm = self._get_kpoint(index)
+        list_ind_kpts = self._get_equivalent_indices(index)
         # get all other bands sharing the vbm
-        list_ind_band = {Spin.up: []}
-        if self.is_spin_polarized:
-            list_ind_band = {Spin.up: [], Spin.down: []}
-        for spin in self._bands:
-            for i in range(self._nb_bands):
-                if math.fabs(self._bands[spin][i][index] - max_tmp) < 0.001:
-                    list_ind_band[spin].append(i)
+        list_ind_band = {
+            spin: np.where(np.abs(self._bands[spin][:, index] - max_tmp)
+                           < 0.001)[0].tolist()
+            for spin in self._bands}
         proj = {}
-        if len(self._projections) != 0:
-            for spin in list_ind_band:
-                if len(list_ind_band[spin]) == 0:
-                    continue
-                proj[spin] =\
-                    self._projections[spin][list_ind_band[spin][0]][
-                        list_ind_kpts[0]]
+        for spin in self.projections:
+            if len(list_ind_band[spin]) == 0:
+                continue
+            proj[spin] = _get_orbital_projections(
+                self.projections[spin][list_ind_band[spin][0],
+                                       list_ind_kpts[0]])
         return {'band_index': list_ind_band,
                 'kpoint_index': list_ind_kpts,
                 'kpoint': kpointvbm, 'energy': max_tmp,
@@ -434,7 +519,7 @@ class BandStructure(object):
             indices of the band containing the VBM (please note that you
             can have several bands sharing the VBM) {Spin.up:[],
             Spin.down:[]}
-            - "kpoint_index": The list of indices in self._kpoints for the
+            - "kpoint_index": The list of indices in self.kpoints for the
             kpoint vbm. Please note that there can be several
             kpoint_indices relating to the same kpoint (e.g., Gamma can
             occur at different spots in the band structure line plot)
@@ -449,41 +534,28 @@ class BandStructure(object):
         if self.is_metal():
             return {"band_index": [], "kpoint_index": [],
                     "kpoint": [], "energy": None, "projections": {}}
-        max_tmp = float("inf")
-
-        index = None
-        kpointcbm = None
-        for spin in self._bands:
-            for i in range(self._nb_bands):
-                for j in range(len(self._kpoints)):
-                    if self._bands[spin][i][j] > self._efermi:
-                        if self._bands[spin][i][j] < max_tmp:
-                            max_tmp = self._bands[spin][i][j]
-                            index = j
-                            kpointcbm = self._kpoints[j]
-        list_index_kpoints = []
-        if kpointcbm.label is not None:
-            for i in range(len(self._kpoints)):
-                if self._kpoints[i].label == kpointcbm.label:
-                    list_index_kpoints.append(i)
-        else:
-            list_index_kpoints.append(index)
-        #get all other bands sharing the vbm
-        list_index_band = {Spin.up: []}
-        if self.is_spin_polarized:
-            list_index_band = {Spin.up: [], Spin.down: []}
-        for spin in self._bands:
-            for i in range(self._nb_bands):
-                if math.fabs(self._bands[spin][i][index] - max_tmp) < 0.001:
-                    list_index_band[spin].append(i)
+        # energies ordered as (spin, band, kpoint) so that argmin returns
+        # the first of several degenerate minima in that order
+        energies = np.array([self._bands[spin] for spin in self._bands])
+        energies = np.where(energies > self._efermi, energies, np.inf)
+        s, i, index = np.unravel_index(np.argmin(energies), energies.shape)
+        max_tmp = float(energies[s, i, index])
+        index = int(index)
+        kpointcbm = self._get_kpoint(index)
+        list_index_kpoints = self._get_equivalent_indices(index)
+        #get all other bands sharing the cbm
+        list_index_band = {
+            spin: np.where(np.abs(self._bands[spin][:, index] - max_tmp)
+                           < 0.001)[0].tolist()
+            for spin in self._bands}
 
         proj = {}
-        if len(self._projections) != 0:
-            for spin in list_index_band:
-                if len(list_index_band[spin]) == 0:
-                    continue
-                proj[spin] = self._projections[spin][list_index_band[spin][0]][
-                    list_index_kpoints[0]]
+        for spin in self.projections:
+            if len(list_index_band[spin]) == 0:
+                continue
+            proj[spin] = _get_orbital_projections(
+                self.projections[spin][list_index_band[spin][0],
+                                       list_index_kpoints[0]])
 
         return {'band_index': list_index_band,
                 'kpoint_index': list_index_kpoints,
@@ -530,31 +602,14 @@ class BandStructure(object):
         """
         if self.is_metal():
             return 0.0
-        lowest_conduction_band = []
-        highest_valence_band = []
-        for j in range(len(self._bands[Spin.up])):
-            for i in range(len(self.kpoints)):
-                if self._bands[Spin.up][j][i] > self._efermi:
-                    lowest_conduction_band.append(self._bands[Spin.up][j][i])
-                    highest_valence_band.append(self._bands[Spin.up][j-1][i])
-        if self.is_spin_polarized:
-            lowest_conduction_band_d = []
-            highest_valence_band_d = []
-            for j in range(len(self._bands[Spin.down])):
-                for i in range(len(self.kpoints)):
-                    if self._bands[Spin.down][j][i] > self._efermi:
-                        lowest_conduction_band_d.append(self._bands[Spin.down][j][i])
-                        highest_valence_band_d.append(self._bands[Spin.down][j-1][i])
-            diff = []
-            for i in range(len(self.kpoints)):
-                diff.append(min([lowest_conduction_band[i],lowest_conduction_band_d[i]])
-                            - max([highest_valence_band[i],highest_valence_band_d[i]]))
-            return min(diff)
-
-        diff = []
-        for i in range(len(self.kpoints)):
-            diff.append(lowest_conduction_band[i] - highest_valence_band[i])
-        return min(diff)
+        # highest occupied and lowest unoccupied energies at each kpoint,
+        # over all bands and spins
+        energies = np.array([self._bands[spin] for spin in self._bands])
+        lowest_conduction_band = np.min(
+            np.where(energies > self._efermi, energies, np.inf), axis=(0, 1))
+        highest_valence_band = np.max(
+            np.where(energies > self._efermi, -np.inf, energies), axis=(0, 1))
+        return float(np.min(lowest_conduction_band - highest_valence_band))
 
     def as_dict(self):
         """
@@ -562,13 +617,11 @@ class BandStructure(object):
         """
         d = {"@module": self.__class__.__module__,
              "@class": self.__class__.__name__,
-             "lattice_rec": self._lattice_rec.as_dict(), "efermi": self._efermi,
-             "kpoints": []}
+             "lattice_rec": self._lattice_rec.as_dict(), "efermi": self._efermi}
         #kpoints are not kpoint objects dicts but are frac coords (this makes
         #the dict smaller and avoids the repetition of the lattice
-        for k in self._kpoints:
-            d["kpoints"].append(k.as_dict()["fcoords"])
-        d["bands"] = {str(int(spin)): self._bands[spin]
+        d["kpoints"] = self._frac_coords.tolist()
+        d["bands"] = {str(int(spin)): self._bands[spin].tolist()
                       for spin in self._bands}
         d["is_metal"] = self.is_metal()
         vbm = self.get_vbm()
@@ -595,17 +648,12 @@ class BandStructure(object):
         for c in self._labels_dict:
             d['labels_dict'][c] = self._labels_dict[c].as_dict()['fcoords']
         d['projections'] = {}
-        if len(self._projections) != 0:
+        if len(self.projections) != 0:
             d['structure'] = self._structure.as_dict()
-            d['projections'] = {
-                str(int(spin)): [
-                    [{str(orb): [
-                        self._projections[spin][i][j][orb][k]
-                        for k in range(len(self._projections[spin][i][j][orb]))]
-                      for orb in self._projections[spin][i][j]}
-                     for j in range(len(self._projections[spin][i]))]
-                    for i in range(len(self._projections[spin]))]
-                for spin in self._projections}
+            # dense nested lists of shape (nb_bands, nkpoints, norbitals,
+            # nsites), much smaller than one dict per band and kpoint
+            d['projections'] = {str(int(spin)): self.projections[spin].tolist()
+                                for spin in self.projections}
         return d
 
     @classmethod
@@ -625,15 +673,9 @@ class BandStructure(object):
         if 'structure' in d:
             structure = Structure.from_dict(d['structure'])
         if 'projections' in d and len(d['projections']) != 0:
-            projections = {
-                Spin.from_int(int(spin)): [
-                    [{Orbital[orb]: [
-                        d['projections'][spin][i][j][orb][k]
-                        for k in range(len(d['projections'][spin][i][j][orb]))]
-                      for orb in d['projections'][spin][i][j]}
-                     for j in range(len(d['projections'][spin][i]))]
-                    for i in range(len(d['projections'][spin]))]
-                for spin in d['projections']}
+            # converted to arrays only when the projections are used
+            projections = {Spin(int(spin)): d['projections'][spin]
+                           for spin in d['projections']}
 
         return BandStructure(
             d['kpoints'], {Spin(int(k)): d['bands'][k]
@@ -668,16 +710,16 @@ class BandStructureSymmLine(BandStructure, MSONable):
             associated with the band structure. This is needed if we
             provide projections to the band structure.
         projections: dict of orbital projections for spin up and spin down
-            {Spin.up:[][{Orbital:[]}],Spin.down:[][{Orbital:[]}]. The
-            format follows the one from eigenvals: the first index of the
-            array refers to the band and the second to the index of the
-            kpoint. The kpoints are ordered according to the order of the
-            kpoints array. For each band and kpoint, we associate a
-            dictionary indicating projections on orbitals and on different
-            sites the keys of the dictionary are Orbital objects and the
-            values are the projections on each site ordered as in the
-            structure object. If the band structure is not spin polarized,
-            we only store one data set under Spin.up.
+            {Spin.up: array, Spin.down: array}. Each array has shape
+            (nb_bands, nkpoints, norbitals, nsites): the first index
+            refers to the band, the second to the index of the kpoint
+            (ordered as the kpoints array), the third to the orbital (the
+            value of the corresponding Orbital, e.g., Orbital.s.value) and
+            the last to the site, ordered as in the structure object. The
+            older nested format {Spin.up:[][{Orbital:[]}]}, with a
+            dictionary of projections on each site for each orbital and for
+            each band and kpoint, is also accepted. If the band structure is
+            not spin polarized, we only store one data set under Spin.up.
     """
 
     def __init__(self, kpoints, eigenvals, lattice, efermi, labels_dict,
@@ -686,26 +728,22 @@ class BandStructureSymmLine(BandStructure, MSONable):
         super(BandStructureSymmLine, self).__init__(
             kpoints, eigenvals, lattice, efermi, labels_dict,
             coords_are_cartesian, structure, projections)
-        self._distance = []
         self._branches = []
         one_group = []
         branches_tmp = []
-        #get labels and distance for each kpoint
-        previous_kpoint = self._kpoints[0]
-        previous_distance = 0.0
-
-        previous_label = self._kpoints[0].label
-        for i in range(len(self._kpoints)):
-            label = self._kpoints[i].label
-            if label is not None and previous_label is not None:
-                self._distance.append(previous_distance)
-            else:
-                self._distance.append(
-                    np.linalg.norm(self._kpoints[i].cart_coords -
-                                   previous_kpoint.cart_coords) +
-                    previous_distance)
-            previous_kpoint = self._kpoints[i]
-            previous_distance = self._distance[i]
+        labels = self._kpoint_labels
+        #get distance for each kpoint, two consecutive labelled kpoints
+        #(e.g., the end and start of two branches) are at the same distance
+        cart_coords = lattice.get_cartesian_coords(self._frac_coords)
+        steps = np.zeros(len(cart_coords))
+        steps[1:] = np.linalg.norm(cart_coords[1:] - cart_coords[:-1],
+                                   axis=1)
+        is_labelled = np.array([l is not None for l in labels], dtype=bool)
+        steps[1:][is_labelled[1:] & is_labelled[:-1]] = 0.0
+        self._distance = np.cumsum(steps).tolist()
+
+        previous_label = labels[0]
+        for i, label in enumerate(labels):
             if label:
                 if previous_label:
                     if len(one_group) != 0:
@@ -716,11 +754,14 @@ class BandStructureSymmLine(BandStructure, MSONable):
 
         if len(one_group) != 0:
             branches_tmp.append(one_group)
+        # indices in self._branches of the branches containing each kpoint
+        self._kpoint_branches = [[] for i in range(len(labels))]
         for b in branches_tmp:
+            for i in b:
+                self._kpoint_branches[i].append(len(self._branches))
             self._branches.append(
                 {"start_index": b[0], "end_index": b[-1],
-                "name": str(self._kpoints[b[0]].label) + "-" +
-                        str(self._kpoints[b[-1]].label)})
+                "name": str(labels[b[0]]) + "-" + str(labels[b[-1]])})
 
         self._is_spin_polarized = False
         if len(self._bands) == 2:
@@ -743,15 +784,7 @@ class BandStructureSymmLine(BandStructure, MSONable):
         #if the kpoint has no label it can"t have a repetition along the band
         #structure line object
 
-        if self._kpoints[index].label is None:
-            return [index]
-
-        list_index_kpoints = []
-        for i in range(len(self._kpoints)):
-            if self._kpoints[i].label == self._kpoints[index].label:
-                list_index_kpoints.append(i)
-
-        return list_index_kpoints
+        return self._get_equivalent_indices(index)
 
     def get_branch(self, index):
         """
@@ -769,12 +802,12 @@ class BandStructureSymmLine(BandStructure, MSONable):
         """
         to_return = []
         for i in self.get_equivalent_kpoints(index):
-            for b in self._branches:
-                    if b["start_index"] <= i <= b["end_index"]:
-                        to_return.append({"name": b["name"],
-                                          "start_index": b["start_index"],
-                                          "end_index": b["end_index"],
-                                          "index": i})
+            for j in self._kpoint_branches[i]:
+                b = self._branches[j]
+                to_return.append({"name": b["name"],
+                                  "start_index": b["start_index"],
+                                  "end_index": b["end_index"],
+                                  "index": i})
         return to_return
 
     def apply_scissor(self, new_band_gap):
@@ -793,52 +826,28 @@ class BandStructureSymmLine(BandStructure, MSONable):
             #moves then the highest index band crossing the fermi level
             #find this band...
             max_index = -1000
-            #spin_index = None
-            for i in range(self._nb_bands):
-                below = False
-                above = False
-                for j in range(len(self._kpoints)):
-                    if self._bands[Spin.up][i][j] < self._efermi:
-                        below = True
-                    if self._bands[Spin.up][i][j] > self._efermi:
-                        above = True
-                if above and below:
-                    if i > max_index:
-                        max_index = i
-                        #spin_index = Spin.up
-                if self.is_spin_polarized:
-                    below = False
-                    above = False
-                    for j in range(len(self._kpoints)):
-                        if self._bands[Spin.down][i][j] < self._efermi:
-                            below = True
-                        if self._bands[Spin.down][i][j] > self._efermi:
-                            above = True
-                    if above and below:
-                        if i > max_index:
-                            max_index = i
-                            #spin_index = Spin.down
-            old_dict = self.as_dict()
+            for spin in self._bands:
+                crossing = np.where(self._get_fermi_crossing_bands(spin))[0]
+                if len(crossing) != 0:
+                    max_index = max(max_index, int(crossing[-1]))
             shift = new_band_gap
-            for spin in old_dict['bands']:
-                for k in range(len(old_dict['bands'][spin])):
-                    for v in range(len(old_dict['bands'][spin][k])):
-                        if k >= max_index:
-                            old_dict['bands'][spin][k][v] = \
-                                old_dict['bands'][spin][k][v] + shift
+            is_shifted = np.arange(self._nb_bands)[:, None] >= max_index
+            bands = {spin: np.where(is_shifted, self._bands[spin] + shift,
+                                    self._bands[spin])
+                     for spin in self._bands}
+            efermi = self._efermi
         else:
-
             shift = new_band_gap - self.get_band_gap()['energy']
-            old_dict = self.as_dict()
-            for spin in old_dict['bands']:
-                for k in range(len(old_dict['bands'][spin])):
-                    for v in range(len(old_dict['bands'][spin][k])):
-                        if old_dict['bands'][spin][k][v] >= \
-                                old_dict['cbm']['energy']:
-                            old_dict['bands'][spin][k][v] = \
-                                old_dict['bands'][spin][k][v] + shift
-            old_dict['efermi'] = old_dict['efermi'] + shift
-            return BandStructureSymmLine.from_dict(old_dict)
+            cbm_energy = self.get_cbm()['energy']
+            bands = {spin: np.where(self._bands[spin] >= cbm_energy,
+                                    self._bands[spin] + shift,
+                                    self._bands[spin])
+                     for spin in self._bands}
+            efermi = self._efermi + shift
+        return BandStructureSymmLine(
+            self._frac_coords, bands, self._lattice_rec, efermi,
+            {k: v.frac_coords for k, v in self._labels_dict.items()},
+            structure=self._structure, projections=self.projections)
 
     def as_dict(self):
         """
@@ -847,14 +856,12 @@ class BandStructureSymmLine(BandStructure, MSONable):
 
         d = {"@module": self.__class__.__module__,
              "@class": self.__class__.__name__,
-             "lattice_rec": self._lattice_rec.as_dict(), "efermi": self._efermi,
-             "kpoints": []}
+             "lattice_rec": self._lattice_rec.as_dict(), "efermi": self._efermi}
         #kpoints are not kpoint objects dicts but are frac coords (this makes
         #the dict smaller and avoids the repetition of the lattice
-        for k in self._kpoints:
-            d["kpoints"].append(k.as_dict()["fcoords"])
+        d["kpoints"] = self._frac_coords.tolist()
         d["branches"] = self._branches
-        d["bands"] = {str(int(spin)): self._bands[spin]
+        d["bands"] = {str(int(spin)): self._bands[spin].tolist()
                       for spin in self._bands}
         d["is_metal"] = self.is_metal()
         vbm = self.get_vbm()
@@ -883,17 +890,12 @@ class BandStructureSymmLine(BandStructure, MSONable):
             mongo_key = c if not c.startswith("$") else " " + c
             d['labels_dict'][mongo_key] = self._labels_dict[c].as_dict()['fcoords']
         d['projections'] = {}
-        if len(self._projections) != 0:
+        if len(self.projections) != 0:
             d['structure'] = self._structure.as_dict()
-            d['projections'] = {
-                str(int(spin)): [
-                    [{str(orb): [
-                        self._projections[spin][i][j][orb][k]
-                        for k in range(len(self._projections[spin][i][j][orb]))]
-                      for orb in self._projections[spin][i][j]}
-                     for j in range(len(self._projections[spin][i]))]
-                    for i in range(len(self._projections[spin]))]
-                for spin in self._projections}
+            # dense nested lists of shape (nb_bands, nkpoints, norbitals,
+            # nsites), much smaller than one dict per band and kpoint
+            d['projections'] = {str(int(spin)): self.projections[spin].tolist()
+                                for spin in self.projections}
         return d
 
     @classmethod
@@ -912,15 +914,9 @@ class BandStructureSymmLine(BandStructure, MSONable):
         structure = None
         if 'projections' in d and len(d['projections']) != 0:
             structure = Structure.from_dict(d['structure'])
-            projections = {
-                Spin(int(spin)): [
-                    [{Orbital[orb]: [
-                        d['projections'][spin][i][j][orb][k]
-                        for k in range(len(d['projections'][spin][i][j][orb]))]
-                      for orb in d['projections'][spin][i][j]}
-                     for j in range(len(d['projections'][spin][i]))]
-                    for i in range(len(d['projections'][spin]))]
-                for spin in d['projections']}
+            # converted to arrays only when the projections are used
+            projections = {Spin(int(spin)): d['projections'][spin]
+                           for spin in d['projections']}
 
         return BandStructureSymmLine(
             d['kpoints'], {Spin(int(k)): d['bands'][k]
@@ -951,43 +947,22 @@ def get_reconstructed_band_structure(list_bs, efermi=None):
         if efermi is None:
             efermi = sum([b.efermi for b in list_bs]) / len(list_bs)
 
-        kpoints = []
         labels_dict = {}
         rec_lattice = list_bs[0]._lattice_rec
         nb_bands = min([list_bs[i]._nb_bands for i in range(len(list_bs))])
 
+        kpoints = np.concatenate([bs._frac_coords for bs in list_bs])
         for bs in list_bs:
-            for k in bs._kpoints:
-                kpoints.append(k.frac_coords)
             for k, v in bs._labels_dict.items():
                 labels_dict[k] = v.frac_coords
-        eigenvals = {Spin.up: [list_bs[0]._bands[Spin.up][i]
-                               for i in range(nb_bands)]}
-        for i in range(nb_bands):
-            for bs in list_bs[1:]:
-                for e in bs._bands[Spin.up][i]:
-                    eigenvals[Spin.up][i].append(e)
-        if list_bs[0].is_spin_polarized:
-            eigenvals[Spin.down] = [list_bs[0]._bands[Spin.down][i]
-                                    for i in range(nb_bands)]
-            for i in range(nb_bands):
-                for bs in list_bs[1:]:
-                    for e in bs._bands[Spin.down][i]:
-                        eigenvals[Spin.down][i].append(e)
+        eigenvals = {spin: np.concatenate(
+            [bs._bands[spin][:nb_bands] for bs in list_bs], axis=1)
+            for spin in list_bs[0]._bands}
         projections = {}
-        if len(list_bs[0]._projections) != 0:
-            projections = {Spin.up: [list_bs[0]._projections[Spin.up][i]
-                           for i in range(nb_bands)]}
-            for i in range(nb_bands):
-                for bs in list_bs[1:]:
-                    projections[Spin.up][i].extend(bs._projections[Spin.up][i])
-            if list_bs[0].is_spin_polarized:
-                projections[Spin.down] = [list_bs[0]._projections[Spin.down][i]
-                                          for i in range(nb_bands)]
-                for i in range(nb_bands):
-                    for bs in list_bs[1:]:
-                        projections[Spin.down][i].extend(
-                            bs._projections[Spin.down][i])
+        if len(list_bs[0].projections) != 0:
+            projections = {spin: np.concatenate(
+                [bs.projections[spin][:nb_bands] for bs in list_bs], axis=1)
+                for spin in list_bs[0].projections}
 
         if isinstance(list_bs[0], BandStructureSymmLine):
             return BandStructureSymmLine(kpoints, eigenvals, rec_lattice,
@@ -998,3 +973,55 @@ def get_reconstructed_band_structure(list_bs, efermi=None):
             return BandStructure(kpoints, eigenvals, rec_lattice, efermi,
                                  labels_dict, structure=list_bs[0]._structure,
                                  projections=projections)
+
+
+def _get_projection_array(projections):
+    """
+    Converts the projections of one spin to an array of shape
+    (nb_bands, nkpoints, norbitals, nsites). The projections can be given as
+    an array (or nested lists) with this shape or in the older
+    [band][kpoint]{Orbital: [projection on each site]} format, where the
+    orbitals can also be given by their names.
+    """
+    if isinstance(projections, np.ndarray) or \
+            not isinstance(projections[0][0], dict):
+        return np.array(projections, dtype=float)
+    orbitals = {(Orbital[o] if isinstance(o, six.string_types) else o).value:
+                o for o in projections[0][0]}
+    nsites = len(list(projections[0][0].values())[0])
+    array = np.zeros((len(projections), len(projections[0]),
+                      max(orbitals) + 1, nsites))
+    for i, o in orbitals.items():
+        array[:, :, i, :] = [[proj_k[o] for proj_k in proj_b]
+                             for proj_b in projections]
+    return array
+
+
+class _NpzProjections(object):
+    """
+    Read-only mapping {spin: array} reading the projections from a .npz
+    file written by BandStructure.to_npz only when they are accessed.
+    """
+
+    def __init__(self, filename, keys):
+        self._filename = filename
+        self._keys = keys
+
+    def __len__(self):
+        return len(self._keys)
+
+    def __iter__(self):
+        return iter(self._keys)
+
+    def __getitem__(self, spin):
+        with np.load(self._filename) as data:
+            return data[self._keys[spin]]
+
+
+def _get_orbital_projections(projections):
+    """
+    Converts an array of projections of shape (norbitals, nsites) at one
+    band and kpoint to a dict {Orbital: [projection on each site]}.
+    """
+    return {Orbital(i): projections[i].tolist()
+            for i in range(len(projections))}
@@ -319,7 +319,7 @@ class BoltztrapRunner(object):
         # because x_trans script overwrite BoltzTraP.def
         for o in Orbital:
             for site_nb in range(0, len(self._bs.structure.sites)):
-                if o in self._bs._projections[Spin.up][0][0]:
+                if o.value < self._bs.projections[Spin.up].shape[2]:
                     with open(output_file_proj + "_" + str(site_nb) + "_" + str(o),
                               'w') as f:
                         f.write(self._bs.structure.composition.formula + "\n")
@@ -329,8 +329,8 @@ class BoltztrapRunner(object):
                             for j in range(
                                     int(math.floor(self._bs.nb_bands * 0.9))):
                                 tmp_proj.append(
-                                    self._bs._projections[Spin(self.spin)][j][
-                                        i][o][site_nb])
+                                    self._bs.projections[Spin(self.spin)][
+                                        j, i, o.value, site_nb])
                             # TODO deal with the sorting going on at
                             # the energy level!!!
                             # tmp_proj.sort()
@@ -376,7 +376,7 @@ class BoltztrapRunner(object):
             i = 1000
             for o in Orbital:
                 for site_nb in range(0, len(self._bs.structure.sites)):
-                    if o in self._bs._projections[Spin.up][0][0]:
+                    if o.value < self._bs.projections[Spin.up].shape[2]:
                         f.write(str(i) + ",\'" + "boltztrap.proj_" + str(
                             site_nb) + "_" + str(o.name) +
                                 "\' \'old\', \'formatted\',0\n")
@@ -1531,65 +1531,41 @@ class BoltztrapAnalyzer(object):
             tuple - (DOS, dict of partial DOS)
         """
 
-        data_dos = {'total': [], 'partial': {}}
+        ry_to_ev = Energy(1, "Ry").to("eV")
         # parse the total DOS data
         ## format is energy, DOS, integrated DOS
-        with open(os.path.join(path_dir, "boltztrap.transdos"), 'r') as f:
-            count_series = 0  # TODO: why is count_series needed?
-            for line in f:
-                if line.lstrip().startswith("#"):
-                    count_series += 1
-                    if count_series > 1:
-                        break
-                else:
-                    data_dos['total'].append(
-                        [Energy(float(line.split()[0]), "Ry").to("eV"),
-                         float(line.split()[1])])
-                    total_elec = float(line.split()[2])
+        total = _load_table(os.path.join(path_dir, "boltztrap.transdos"),
+                            max_headers=1)
+        energies = total[:, 0] * ry_to_ev
+        densities = total[:, 1]
 
         if trim_dos:
             # Francesco knows what this does
             # It has something to do with a trick of adding fake energies
             # at the endpoints of the DOS, and then re-trimming it. This is
             # to get the same energy scale for up and down spin DOS.
-            tmp_data = np.array(data_dos['total'])
-            tmp_den = np.trim_zeros(tmp_data[:, 1], 'f')[1:]
-            lw_l = len(tmp_data[:, 1]) - len(tmp_den)
-            tmp_ene = tmp_data[lw_l:, 0]
+            tmp_den = np.trim_zeros(densities, 'f')[1:]
+            lw_l = len(densities) - len(tmp_den)
+            tmp_ene = energies[lw_l:]
             tmp_den = np.trim_zeros(tmp_den, 'b')[:-1]
             hg_l = len(tmp_ene) - len(tmp_den)
-            tmp_ene = tmp_ene[:-hg_l]
-            tmp_data = np.vstack((tmp_ene, tmp_den)).T
-            data_dos['total'] = tmp_data.tolist()
+            energies = tmp_ene[:-hg_l]
+            densities = tmp_den
 
         # parse partial DOS data
+        dos_partial = {}
         for file_name in os.listdir(path_dir):
             if file_name.endswith(
                     "transdos") and file_name != 'boltztrap.transdos':
                 tokens = file_name.split(".")[1].split("_")
                 site = tokens[1]
                 orb = '_'.join(tokens[2:])
-                with open(os.path.join(path_dir, file_name), 'r') as f:
-                    for line in f:
-                        if not line.lstrip().startswith(" #"):
-                            if site not in data_dos['partial']:
-                                data_dos['partial'][site] = {}
-                            if orb not in data_dos['partial'][site]:
-                                data_dos['partial'][site][orb] = []
-                            data_dos['partial'][site][orb].append(
-                                float(line.split()[1]))
-                data_dos['partial'][site][orb] = data_dos['partial'][site][
-                                                     orb][lw_l:-hg_l]
-
-        dos_full = {'energy': [], 'density': []}
-
-        for t in data_dos['total']:
-            dos_full['energy'].append(t[0])
-            dos_full['density'].append(t[1])
-
-        dos = Dos(efermi, dos_full['energy'],
-                  {Spin(dos_spin): dos_full['density']})
-        dos_partial = data_dos['partial']  # TODO: make this real DOS object?
+                partial = _load_table(os.path.join(path_dir, file_name))[:, 1]
+                if trim_dos:
+                    partial = partial[lw_l:-hg_l]
+                dos_partial.setdefault(site, {})[orb] = partial.tolist()
+
+        dos = Dos(efermi, energies, {Spin(dos_spin): densities})
 
         return dos, dos_partial
 
@@ -1620,78 +1596,33 @@ class BoltztrapAnalyzer(object):
         Returns:
             mu_steps, cond, seebeck, kappa, hall, pn_doping_levels,
             mu_doping, seebeck_doping, cond_doping, kappa_doping,
-            hall_doping, carrier_conc
+            hall_doping, carrier_conc. The tensors are given for each
+            temperature (and doping type) as arrays of shape (n, 3, 3),
+            or (n, 3, 3, 3) for the Hall tensor, with n the number of mu
+            steps (or of doping levels).
         """
 
-        # Step 1: parse raw data but do not convert to final format
-        t_steps = set()
-        mu_steps = set()
-        data_full = []
-        data_hall = []
-        data_doping_full = []
-        data_doping_hall = []
         doping_levels = doping_levels or []
+        ry_to_ev = Energy(1, "Ry").to("eV")
 
-        # parse the full conductivity/Seebeck/kappa0/etc data
-        ## also initialize t_steps and mu_steps
-        with open(os.path.join(path_dir, "boltztrap.condtens"), 'r') as f:
-            for line in f:
-                if not line.startswith("#"):
-                    mu_steps.add(float(line.split()[0]))
-                    t_steps.add(int(float(line.split()[1])))
-                    data_full.append([float(c) for c in line.split()])
-
-        # parse the full Hall tensor
-        with open(os.path.join(path_dir, "boltztrap.halltens"), 'r') as f:
-            for line in f:
-                if not line.startswith("#"):
-                    data_hall.append([float(c) for c in line.split()])
+        # parse the full conductivity/Seebeck/kappa0/etc data and Hall
+        # tensor. Columns are mu, T, N and then 27 tensor coefficients.
+        data_full = _load_table(os.path.join(path_dir, "boltztrap.condtens"))
+        data_hall = _load_table(os.path.join(path_dir, "boltztrap.halltens"))
 
         if len(doping_levels) != 0:
-            # parse doping levels version of full cond. tensor, etc.
-            with open(
-                    os.path.join(path_dir, "boltztrap.condtens_fixdoping"),
-                    'r') as f:
-                for line in f:
-                    if not line.startswith("#") and len(line) > 2:
-                        data_doping_full.append([float(c)
-                                                 for c in line.split()])
-
-            # parse doping levels version of full hall tensor
-            with open(
-                    os.path.join(path_dir, "boltztrap.halltens_fixdoping"),
-                    'r') as f:
-                for line in f:
-                    if not line.startswith("#") and len(line) > 2:
-                        data_doping_hall.append(
-                            [float(c) for c in line.split()])
-
-        # Step 2: convert raw data to final format
-
-        # sort t and mu_steps (b/c they are sets not lists)
-        # and convert to correct energy
-        t_steps = sorted([t for t in t_steps])
-        mu_steps = sorted([Energy(m, "Ry").to("eV") for m in mu_steps])
-
-        # initialize output variables - could use defaultdict instead
-        # I am leaving things like this for clarity
-        cond = {t: [] for t in t_steps}
-        seebeck = {t: [] for t in t_steps}
-        kappa = {t: [] for t in t_steps}
-        hall = {t: [] for t in t_steps}
-        carrier_conc = {t: [] for t in t_steps}
-        dos_full = {'energy': [], 'density': []}
-
-        mu_doping = {'p': {t: [] for t in t_steps},
-                     'n': {t: [] for t in t_steps}}
-        seebeck_doping = {'p': {t: [] for t in t_steps},
-                          'n': {t: [] for t in t_steps}}
-        cond_doping = {'p': {t: [] for t in t_steps},
-                       'n': {t: [] for t in t_steps}}
-        kappa_doping = {'p': {t: [] for t in t_steps},
-                        'n': {t: [] for t in t_steps}}
-        hall_doping = {'p': {t: [] for t in t_steps},
-                       'n': {t: [] for t in t_steps}}
+            # parse doping levels version of full cond. tensor and hall
+            # tensor. Columns are T, N, 27 tensor coefficients and mu.
+            data_doping_full = _load_table(
+                os.path.join(path_dir, "boltztrap.condtens_fixdoping"))
+            data_doping_hall = _load_table(
+                os.path.join(path_dir, "boltztrap.halltens_fixdoping"))
+        else:
+            data_doping_full = np.zeros((0, 30))
+            data_doping_hall = np.zeros((0, 30))
+
+        t_steps = sorted(set(int(t) for t in data_full[:, 1]))
+        mu_steps = (np.unique(data_full[:, 0]) * ry_to_ev).tolist()
 
         # process doping levels
         pn_doping_levels = {'p': [], 'n': []}
@@ -1701,43 +1632,42 @@ class BoltztrapAnalyzer(object):
             else:
                 pn_doping_levels['n'].append(-d)
 
-        # process raw conductivity data, etc.
-        for d in data_full:
-            temp, doping = d[1], d[2]
-            carrier_conc[temp].append(doping)
-
-            cond[temp].append(np.reshape(d[3:12], (3, 3)).tolist())
-            seebeck[temp].append(np.reshape(d[12:21], (3, 3)).tolist())
-            kappa[temp].append(np.reshape(d[21:30], (3, 3)).tolist())
-
-        # process raw Hall data
-        for d in data_hall:
-            temp, doping = d[1], d[2]
-            hall_tens = [np.reshape(d[3:12], (3, 3)).tolist(),
-                         np.reshape(d[12:21], (3, 3)).tolist(),
-                         np.reshape(d[21:30], (3, 3)).tolist()]
-            hall[temp].append(hall_tens)
-
-        # process doping conductivity data, etc.
-        for d in data_doping_full:
-            temp, doping, mu = d[0], d[1], d[-1]
-            pn = 'p' if doping > 0 else 'n'
-            mu_doping[pn][temp].append(Energy(mu, "Ry").to("eV"))
-            cond_doping[pn][temp].append(
-                np.reshape(d[2:11], (3, 3)).tolist())
-            seebeck_doping[pn][temp].append(
-                np.reshape(d[11:20], (3, 3)).tolist())
-            kappa_doping[pn][temp].append(
-                np.reshape(d[20:29], (3, 3)).tolist())
-
-        # process doping Hall data
-        for d in data_doping_hall:
-            temp, doping, mu = d[0], d[1], d[-1]
-            pn = 'p' if doping > 0 else 'n'
-            hall_tens = [np.reshape(d[2:11], (3, 3)).tolist(),
-                         np.reshape(d[11:20], (3, 3)).tolist(),
-                         np.reshape(d[20:29], (3, 3)).tolist()]
-            hall_doping[pn][temp].append(hall_tens)
+        # (rows, 3, 3, 3) arrays of the cond, seebeck and kappa tensors (or
+        # of the 3 3x3 blocks of the Hall tensor) of each row
+        tensors = data_full[:, 3:30].reshape((-1, 3, 3, 3))
+        hall_tensors = data_hall[:, 3:30].reshape((-1, 3, 3, 3))
+        doping_tensors = data_doping_full[:, 2:29].reshape((-1, 3, 3, 3))
+        doping_hall_tensors = data_doping_hall[:, 2:29].reshape(
+            (-1, 3, 3, 3))
+
+        # split the rows by temperature (and by doping type), keeping the
+        # order of the rows, i.e., of mu or of the doping levels
+        cond, seebeck, kappa, hall, carrier_conc = {}, {}, {}, {}, {}
+        for t in t_steps:
+            rows = data_full[:, 1] == t
+            cond[t] = tensors[rows, 0]
+            seebeck[t] = tensors[rows, 1]
+            kappa[t] = tensors[rows, 2]
+            carrier_conc[t] = data_full[rows, 2]
+            hall[t] = hall_tensors[data_hall[:, 1] == t]
+
+        mu_doping = {'p': {}, 'n': {}}
+        seebeck_doping = {'p': {}, 'n': {}}
+        cond_doping = {'p': {}, 'n': {}}
+        kappa_doping = {'p': {}, 'n': {}}
+        hall_doping = {'p': {}, 'n': {}}
+        for pn, is_p in [('p', True), ('n', False)]:
+            for t in t_steps:
+                rows = (data_doping_full[:, 0] == t) & \
+                    ((data_doping_full[:, 1] > 0) == is_p)
+                mu_doping[pn][t] = \
+                    (data_doping_full[rows, -1] * ry_to_ev).tolist()
+                cond_doping[pn][t] = doping_tensors[rows, 0]
+                seebeck_doping[pn][t] = doping_tensors[rows, 1]
+                kappa_doping[pn][t] = doping_tensors[rows, 2]
+                rows = (data_doping_hall[:, 0] == t) & \
+                    ((data_doping_hall[:, 1] > 0) == is_p)
+                hall_doping[pn][t] = doping_hall_tensors[rows]
 
         return mu_steps, cond, seebeck, kappa, hall, pn_doping_levels, \
                mu_doping, seebeck_doping, cond_doping, kappa_doping, \
@@ -1831,68 +1761,70 @@ class BoltztrapAnalyzer(object):
                    'warning': self.warning}
         return jsanitize(results)
 
+    @staticmethod
+    def from_dirs(path_dirs, dos_spin=1, ncpus=None):
+        """
+        Get BoltztrapAnalyzer objects from several boltztrap run
+        directories, e.g., for high-throughput screening.
+
+        Args:
+            path_dirs ([str]): directories where the boltztrap files are
+            dos_spin: in DOS mode, set to 1 for spin up and -1 for spin down
+            ncpus (int): Number of cpus to use. Default of None means serial
+                processing. Otherwise, the directories are distributed over
+                a multiprocessing pool of ncpus processes.
+
+        Returns:
+            [BoltztrapAnalyzer] in the same order as path_dirs
+        """
+        args = [(path_dir, dos_spin) for path_dir in path_dirs]
+        if ncpus:
+            import multiprocessing as mp
+            p = mp.Pool(ncpus)
+            try:
+                return p.map(_from_files, args)
+            finally:
+                p.close()
+                p.join()
+        return [_from_files(a) for a in args]
+
     @staticmethod
     def from_dict(data):
-        def _make_float_array(a):
-            res = [[0.0, 0.0, 0.0], [0.0, 0.0, 0.0], [0.0, 0.0, 0.0]]
-            for i in range(3):
-                for j in range(3):
-                    res[i][j] = float(a[i][j])
-            return res
+        def _make_tensors(a, shape=(3, 3)):
+            return np.array(a, dtype=float).reshape((-1,) + shape)
 
-        def _make_float_hall(a):
-            return [i for i in a[:27]]
+        def _make_tensors_dict(d, shape=(3, 3)):
+            return {int(t): _make_tensors(v, shape) for t, v in d.items()}
 
         gap = data.get('gap')
         mu_steps = [float(d) for d in data['mu_steps']] if \
             'mu_steps' in data else None
-        cond = {int(d): [_make_float_array(v) for v in data['cond'][d]]
-             for d in data['cond']} if 'cond' in data else None
-        seebeck = {int(d): [_make_float_array(v) for v in data['seebeck'][d]]
-                   for d in data['seebeck']} if 'seebeck' in data else None
-        kappa = {int(d): [_make_float_array(v) for v in data['kappa'][d]]
-                 for d in data['kappa']} if 'kappa' in data else None
-        hall = {int(d): [_make_float_hall(v) for v in data['hall'][d]]
-                for d in data['hall']} if 'hall' in data else None
+        cond = _make_tensors_dict(data['cond']) if 'cond' in data else None
+        seebeck = _make_tensors_dict(data['seebeck']) if 'seebeck' in data \
+            else None
+        kappa = _make_tensors_dict(data['kappa']) if 'kappa' in data else None
+        hall = _make_tensors_dict(data['hall'], (3, 3, 3)) if 'hall' in data \
+            else None
         doping = {'p': [float(d) for d in data['doping']['p']],
                   'n': [float(d) for d in data['doping']['n']]} if \
             'doping' in data else None
 
-        mu_doping = {'p': {int(d): [
-            float(v) for v in data['mu_doping']['p'][d]] for d in
-                           data['mu_doping']['p']}, 'n':
-            {int(d): [float(v) for v in data['mu_doping']['n'][d]]
-             for d in data['mu_doping']['n']}} if 'mu_doping' in data else None
-
-        seebeck_doping = {'p': {int(d): [
-            _make_float_array(v) for v in data['seebeck_doping']['p'][d]]
-                                for d in data['seebeck_doping']['p']}, 'n':
-            {int(d): [_make_float_array(v) for v in
-                      data['seebeck_doping']['n'][d]] for d in
-             data['seebeck_doping']['n']}} if 'seebeck_doping' in data \
-            else None
-
-        cond_doping = {'p': {int(d): [_make_float_array(v)
-                                      for v in data['cond_doping']['p'][d]]
-                             for d in data['cond_doping']['p']}, 'n':
-            {int(d): [_make_float_array(v) for v in
-                      data['cond_doping']['n'][d]] for
-             d in data['cond_doping']['n']}} if 'cond_doping' in data else None
-
-        kappa_doping = {'p': {int(d): [_make_float_array(v)
-                                       for v in data['kappa_doping']['p'][d]]
-                              for d in data['kappa_doping']['p']},
-                        'n': {int(d): [_make_float_array(v) for v in
-                                       data['kappa_doping']['n'][d]]
-                              for d in data['kappa_doping']['n']}}\
+        mu_doping = {pn: {int(t): [float(v) for v in mu]
+                          for t, mu in data['mu_doping'][pn].items()}
+                     for pn in ['p', 'n']} if 'mu_doping' in data else None
+        seebeck_doping = {pn: _make_tensors_dict(data['seebeck_doping'][pn])
+                          for pn in ['p', 'n']} \
+            if 'seebeck_doping' in data else None
+        cond_doping = {pn: _make_tensors_dict(data['cond_doping'][pn])
+                       for pn in ['p', 'n']} \
+            if 'cond_doping' in data else None
+        kappa_doping = {pn: _make_tensors_dict(data['kappa_doping'][pn])
+                        for pn in ['p', 'n']} \
             if 'kappa_doping' in data else None
-
-        hall_doping = {'p': {int(d): [_make_float_hall(v) for v in
-                                      data['hall_doping']['p'][d]] for d in
-                             data['hall_doping']['p']}, 'n':
-            {int(d): [_make_float_hall(v) for v in
-                      data['hall_doping']['n'][d]] for d in
-             data['hall_doping']['n']}} if "hall_doping" in data else None
+        hall_doping = {pn: _make_tensors_dict(data['hall_doping'][pn],
+                                              (3, 3, 3))
+                       for pn in ['p', 'n']} \
+            if 'hall_doping' in data else None
 
         dos = Dos.from_dict(data['dos']) if 'dos' in data else None
         dos_partial = data.get('dos_partial')
@@ -1906,6 +1838,43 @@ class BoltztrapAnalyzer(object):
                                  dos_partial, carrier_conc, vol, warning)
 
 
+def _load_table(filename, max_headers=None):
+    """
+    Loads the numbers of a BoltzTraP output file in a 2D array, one row per
+    line. Comment lines starting with # and blank lines are skipped.
+
+    Args:
+        filename: Name of the file.
+        max_headers: If not None, stops reading at the comment line after
+            max_headers comment lines, e.g., 1 to only read the first data
+            series of .transdos files.
+
+    Returns:
+        numpy array of shape (number of rows, number of columns)
+    """
+    rows = []
+    nheaders = 0
+    with open(filename, 'r') as f:
+        for line in f:
+            if line.lstrip().startswith("#"):
+                nheaders += 1
+                if max_headers is not None and nheaders > max_headers:
+                    break
+            elif len(line.strip()) > 0:
+                rows.append(line)
+    # converting all the numbers at once is much faster than line by line
+    data = np.array(" ".join(rows).split(), dtype=float)
+    return data.reshape((len(rows), -1)) if rows else data.reshape((0, 0))
+
+
+def _from_files(args):
+    """
+    Helper for BoltztrapAnalyzer.from_dirs, defined at the module level so
+    that it can be used with multiprocessing.
+    """
+    return BoltztrapAnalyzer.from_files(*args)
+
+
 def compare_sym_bands(bands_obj, bands_ref_obj, nb=None):
     """
         Compute the mean of correlation between bzt and vasp bandstructure on
@@ -3,11 +3,11 @@
 # Distributed under the terms of the MIT License.
 
 from __future__ import division, unicode_literals
-import numpy as np
+import json
 
-import six
+import numpy as np
 
-from pymatgen.electronic_structure.core import Spin, Orbital
+from pymatgen.electronic_structure.core import Spin, Orbital, OrbitalType
 from pymatgen.core.periodic_table import get_el_sp
 from pymatgen.core.structure import Structure
 from pymatgen.util.coord_utils import get_linear_interpolated_value
@@ -268,6 +268,12 @@ class CompleteDos(Dos):
     a vasprun.xml file. You are unlikely to try to generate this object
     manually.
 
+    The partial densities are stored in a single array of shape (nsites,
+    norbitals, nspins, nenergies), and the element and orbital projected
+    densities are computed as sums over groups of sites and orbitals of this
+    array. Those sums are cached, so the pdos should not be modified after
+    the CompleteDos is created.
+
     Args:
         structure: Structure associated with this particular DOS.
         total_dos: total Dos for structure
@@ -286,8 +292,106 @@ class CompleteDos(Dos):
         super(CompleteDos, self).__init__(
             total_dos.efermi, energies=total_dos.energies,
             densities={k: np.array(d) for k, d in total_dos.densities.items()})
-        self.pdos = pdoss
         self.structure = structure
+        self._site_indices = {site: i for i, site in enumerate(structure)}
+        self._spins = list(self.densities.keys())
+
+        orbitals = []
+        for atom_dos in pdoss.values():
+            for orb in atom_dos:
+                if orb not in orbitals:
+                    orbitals.append(orb)
+        pdos = np.zeros((len(structure), len(orbitals), len(self._spins),
+                         len(self.energies)))
+        # which orbitals of which sites have a pdos
+        has_pdos = np.zeros((len(structure), len(orbitals)), dtype=bool)
+        for site, atom_dos in pdoss.items():
+            i = self._site_indices[site]
+            for orb, densities in atom_dos.items():
+                j = orbitals.index(orb)
+                has_pdos[i, j] = True
+                for k, spin in enumerate(self._spins):
+                    pdos[i, j, k] = densities[spin]
+        self._set_pdos(orbitals, pdos, has_pdos)
+
+    def _set_pdos(self, orbitals, pdos, has_pdos):
+        """
+        Sets the array of partial densities, of shape (nsites, norbitals,
+        nspins, nenergies), and resets the cached sums.
+        """
+        self._orbitals = orbitals
+        self._pdos_array = pdos
+        self._has_pdos = has_pdos
+        self._pdos = None
+        self._sum_cache = {}
+
+    @property
+    def pdos(self):
+        """
+        Dict of partial densities of the form {Site:{Orbital:{Spin:Densities}}}.
+        The densities are views of the underlying array.
+        """
+        if self._pdos is None:
+            self._pdos = {}
+            for i, site in enumerate(self.structure):
+                if not np.any(self._has_pdos[i]):
+                    continue
+                self._pdos[site] = {
+                    orb: {spin: self._pdos_array[i, j, k]
+                          for k, spin in enumerate(self._spins)}
+                    for j, orb in enumerate(self._orbitals)
+                    if self._has_pdos[i, j]}
+        return self._pdos
+
+    def _get_dos(self, densities):
+        """
+        Returns a Dos from an array of densities of shape (nspins,
+        nenergies).
+        """
+        return Dos(self.efermi, self.energies,
+                   {spin: densities[k] for k, spin in enumerate(self._spins)})
+
+    def _get_grouped_densities(self, key, site_groups, orbital_groups):
+        """
+        Sums the partial densities over groups of sites and orbitals, using
+        cached results for the same key.
+
+        Args:
+            key: Key of the sum in the cache.
+            site_groups: dict of {group: boolean mask of the sites}.
+            orbital_groups: dict of {group: boolean mask of the orbitals}.
+
+        Returns:
+            dict of {(site group, orbital group): densities array of shape
+            (nspins, nenergies)}, only for the groups having a pdos.
+        """
+        if key not in self._sum_cache:
+            site_keys = list(site_groups.keys())
+            orb_keys = list(orbital_groups.keys())
+            site_masks = np.array([site_groups[k] for k in site_keys],
+                                  dtype=float).reshape((-1, len(self.structure)))
+            orb_masks = np.array([orbital_groups[k] for k in orb_keys],
+                                 dtype=float).reshape((-1, len(self._orbitals)))
+            # sum over the sites, then over the orbitals of each group
+            sums = np.tensordot(site_masks, self._pdos_array, axes=(1, 0))
+            sums = np.tensordot(orb_masks, sums,
+                                axes=(1, 1)).transpose((1, 0, 2, 3))
+            present = site_masks.dot(self._has_pdos).dot(orb_masks.T) > 0
+            self._sum_cache[key] = {
+                (sk, ok): sums[g, h]
+                for g, sk in enumerate(site_keys)
+                for h, ok in enumerate(orb_keys) if present[g, h]}
+        return self._sum_cache[key]
+
+    def _get_orbital_type_groups(self):
+        orb_types = [_get_orb_type(orb) for orb in self._orbitals]
+        return {t: np.array([o == t for o in orb_types])
+                for t in set(orb_types)}
+
+    def _get_site_mask(self, site):
+        mask = np.zeros(len(self.structure), dtype=bool)
+        mask[self._site_indices[site]] = True
+        return mask
 
     def get_site_orbital_dos(self, site, orbital):
         """
@@ -300,7 +404,8 @@ class CompleteDos(Dos):
         Returns:
             Dos containing densities for orbital of site.
         """
-        return Dos(self.efermi, self.energies, self.pdos[site][orbital])
+        return self._get_dos(self._pdos_array[self._site_indices[site],
+                                              self._orbitals.index(orbital)])
 
     def get_site_dos(self, site):
         """
@@ -312,8 +417,8 @@ class CompleteDos(Dos):
         Returns:
             Dos containing summed orbital densities for site.
         """
-        site_dos = six.moves.reduce(add_densities, self.pdos[site].values())
-        return Dos(self.efermi, self.energies, site_dos)
+        return self._get_dos(
+            np.sum(self._pdos_array[self._site_indices[site]], axis=0))
 
     def get_site_spd_dos(self, site):
         """
@@ -325,15 +430,12 @@ class CompleteDos(Dos):
         Returns:
             dict of {orbital: Dos}, e.g. {"s": Dos object, ...}
         """
-        spd_dos = dict()
-        for orb, pdos in self.pdos[site].items():
-            orbital_type = _get_orb_type(orb)
-            if orbital_type in spd_dos:
-                spd_dos[orbital_type] = add_densities(spd_dos[orbital_type], pdos)
-            else:
-                spd_dos[orbital_type] = pdos
-        return {orb: Dos(self.efermi, self.energies, densities)
-                for orb, densities in spd_dos.items()}
+        sums = self._get_grouped_densities(
+            ("site_spd", self._site_indices[site]),
+            {None: self._get_site_mask(site)},
+            self._get_orbital_type_groups())
+        return {orb: self._get_dos(densities)
+                for (_, orb), densities in sums.items()}
 
     def get_site_t2g_eg_resolved_dos(self, site):
         """
@@ -346,19 +448,14 @@ class CompleteDos(Dos):
             A dict {"e_g": Dos, "t2g": Dos} containing summed e_g and t2g DOS
             for the site.
         """
-        t2g_dos = []
-        eg_dos = []
-        for s, atom_dos in self.pdos.items():
-            if s == site:
-                for orb, pdos in atom_dos.items():
-                    if orb in (Orbital.dxy, Orbital.dxz, Orbital.dyz):
-                        t2g_dos.append(pdos)
-                    elif orb in (Orbital.dx2, Orbital.dz2):
-                        eg_dos.append(pdos)
-        return {"t2g": Dos(self.efermi, self.energies,
-                           six.moves.reduce(add_densities, t2g_dos)),
-                "e_g": Dos(self.efermi, self.energies,
-                           six.moves.reduce(add_densities, eg_dos))}
+        groups = {
+            "t2g": np.array([orb in (Orbital.dxy, Orbital.dxz, Orbital.dyz)
+                             for orb in self._orbitals]),
+            "e_g": np.array([orb in (Orbital.dx2, Orbital.dz2)
+                             for orb in self._orbitals])}
+        atom_dos = self._pdos_array[self._site_indices[site]]
+        return {name: self._get_dos(np.sum(atom_dos[mask], axis=0))
+                for name, mask in groups.items()}
 
     def get_spd_dos(self):
         """
@@ -367,17 +464,11 @@ class CompleteDos(Dos):
         Returns:
             dict of {orbital: Dos}, e.g. {"s": Dos object, ...}
         """
-        spd_dos = {}
-        for atom_dos in self.pdos.values():
-            for orb, pdos in atom_dos.items():
-                orbital_type = _get_orb_type(orb)
-                if orbital_type not in spd_dos:
-                    spd_dos[orbital_type] = pdos
-                else:
-                    spd_dos[orbital_type] = \
-                        add_densities(spd_dos[orbital_type], pdos)
-        return {orb: Dos(self.efermi, self.energies, densities)
-                for orb, densities in spd_dos.items()}
+        sums = self._get_grouped_densities(
+            "spd", {None: np.ones(len(self.structure), dtype=bool)},
+            self._get_orbital_type_groups())
+        return {orb: self._get_dos(densities)
+                for (_, orb), densities in sums.items()}
 
     def get_element_dos(self):
         """
@@ -386,17 +477,13 @@ class CompleteDos(Dos):
         Returns:
             dict of {Element: Dos}
         """
-
-        el_dos = {}
-        for site, atom_dos in self.pdos.items():
-            el = site.specie
-            for pdos in atom_dos.values():
-                if el not in el_dos:
-                    el_dos[el] = pdos
-                else:
-                    el_dos[el] = add_densities(el_dos[el], pdos)
-        return {el: Dos(self.efermi, self.energies, densities)
-                for el, densities in el_dos.items()}
+        species = [site.specie for site in self.structure]
+        sums = self._get_grouped_densities(
+            "element", {el: np.array([sp == el for sp in species])
+                        for el in set(species)},
+            {None: np.ones(len(self._orbitals), dtype=bool)})
+        return {el: self._get_dos(densities)
+                for (el, _), densities in sums.items()}
 
     def get_element_spd_dos(self, el):
         """
@@ -409,19 +496,12 @@ class CompleteDos(Dos):
             dict of {Element: {"S": densities, "P": densities, "D": densities}}
         """
         el = get_el_sp(el)
-        el_dos = {}
-        for site, atom_dos in self.pdos.items():
-            if site.specie == el:
-                for orb, pdos in atom_dos.items():
-                    orbital_type = _get_orb_type(orb)
-                    if orbital_type not in el_dos:
-                        el_dos[orbital_type] = pdos
-                    else:
-                        el_dos[orbital_type] = \
-                            add_densities(el_dos[orbital_type], pdos)
-
-        return {orb: Dos(self.efermi, self.energies, densities)
-                for orb, densities in el_dos.items()}
+        sums = self._get_grouped_densities(
+            ("element_spd", el),
+            {el: np.array([site.specie == el for site in self.structure])},
+            self._get_orbital_type_groups())
+        return {orb: self._get_dos(densities)
+                for (_, orb), densities in sums.items()}
 
     @classmethod
     def from_dict(cls, d):
@@ -448,24 +528,68 @@ class CompleteDos(Dos):
         d = {"@module": self.__class__.__module__,
              "@class": self.__class__.__name__, "efermi": self.efermi,
              "structure": self.structure.as_dict(),
-             "energies": list(self.energies),
-             "densities": {str(spin): list(dens)
+             "energies": self.energies.tolist(),
+             "densities": {str(spin): dens.tolist()
                            for spin, dens in self.densities.items()},
              "pdos": []}
-        if len(self.pdos) > 0:
-            for at in self.structure:
-                dd = {}
-                for orb, pdos in self.pdos[at].items():
-                    dd[str(orb)] = {"densities": {str(int(spin)): list(dens)
-                                                  for spin,
-                                                  dens in pdos.items()}}
-                d["pdos"].append(dd)
+        if np.any(self._has_pdos):
+            pdos = self._pdos_array.tolist()
+            for i in range(len(self.structure)):
+                d["pdos"].append({
+                    str(orb): {"densities": {
+                        str(int(spin)): pdos[i][j][k]
+                        for k, spin in enumerate(self._spins)}}
+                    for j, orb in enumerate(self._orbitals)
+                    if self._has_pdos[i, j]})
             d["atom_dos"] = {str(at): dos.as_dict() for at,
                              dos in self.get_element_dos().items()}
             d["spd_dos"] = {str(orb): dos.as_dict() for orb,
                             dos in self.get_spd_dos().items()}
         return d
 
+    def to_npz(self, filename):
+        """
+        Writes the CompleteDos to a compressed numpy .npz file. This is much
+        smaller and faster to read than the json representation for large
+        structures with lm-decomposed pdos.
+
+        Args:
+            filename: Name of the file, conventionally ending in .npz.
+        """
+        np.savez_compressed(
+            filename, efermi=self.efermi, energies=self.energies,
+            densities=np.array([self.densities[spin] for spin in self._spins]),
+            spins=np.array([int(spin) for spin in self._spins]),
+            orbitals=np.array([orb.value for orb in self._orbitals],
+                              dtype=int),
+            orbitals_lm=np.array([isinstance(orb, Orbital)
+                                  for orb in self._orbitals], dtype=bool),
+            pdos=self._pdos_array, has_pdos=self._has_pdos,
+            structure=json.dumps(self.structure.as_dict()))
+
+    @classmethod
+    def from_npz(cls, filename):
+        """
+        Reads a CompleteDos written by to_npz.
+
+        Args:
+            filename: Name of the .npz file.
+
+        Returns:
+            CompleteDos
+        """
+        with np.load(filename) as data:
+            spins = [Spin(int(i)) for i in data["spins"]]
+            tdos = Dos(float(data["efermi"]), data["energies"],
+                       dict(zip(spins, data["densities"])))
+            struct = Structure.from_dict(json.loads(str(data["structure"])))
+            dos = cls(struct, tdos, {})
+            orbitals = [Orbital(int(i)) if lm else OrbitalType(int(i))
+                        for i, lm in zip(data["orbitals"],
+                                         data["orbitals_lm"])]
+            dos._set_pdos(orbitals, data["pdos"], data["has_pdos"])
+        return dos
+
     def __str__(self):
         return "Complete DOS for " + str(self.structure)
 
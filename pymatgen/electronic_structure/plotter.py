@@ -345,26 +345,13 @@ class BSPlotter(object):
         if not zero_to_efermi:
             zero_energy = 0.0
 
+        ticks = self.get_ticks()
         for b in self._bs._branches:
-
-            if self._bs.is_spin_polarized:
-                energy.append({str(Spin.up): [], str(Spin.down): []})
-            else:
-                energy.append({str(Spin.up): []})
-            distance.append([self._bs._distance[j]
-                             for j in range(b['start_index'],
-                                            b['end_index'] + 1)])
-            ticks = self.get_ticks()
-
-            for i in range(self._nb_bands):
-                energy[-1][str(Spin.up)].append(
-                    [self._bs._bands[Spin.up][i][j] - zero_energy
-                     for j in range(b['start_index'], b['end_index'] + 1)])
-            if self._bs.is_spin_polarized:
-                for i in range(self._nb_bands):
-                    energy[-1][str(Spin.down)].append(
-                        [self._bs._bands[Spin.down][i][j] - zero_energy
-                         for j in range(b['start_index'], b['end_index'] + 1)])
+            branch = slice(b['start_index'], b['end_index'] + 1)
+            distance.append(self._bs._distance[branch])
+            energy.append({str(spin): (self._bs._bands[spin][:, branch]
+                                       - zero_energy).tolist()
+                           for spin in self._bs._bands})
 
         vbm = self._bs.get_vbm()
         cbm = self._bs.get_cbm()
@@ -603,16 +590,13 @@ class BSPlotter(object):
         """
         tick_distance = []
         tick_labels = []
-        previous_label = self._bs._kpoints[0].label
+        previous_label = self._bs.kpoints[0].label
         previous_branch = self._bs._branches[0]['name']
-        for i, c in enumerate(self._bs._kpoints):
+        for i, c in enumerate(self._bs.kpoints):
             if c.label is not None:
                 tick_distance.append(self._bs._distance[i])
-                this_branch = None
-                for b in self._bs._branches:
-                    if b['start_index'] <= i <= b['end_index']:
-                        this_branch = b['name']
-                        break
+                this_branch = \
+                    self._bs._branches[self._bs._kpoint_branches[i][0]]['name']
                 if c.label != previous_label \
                         and previous_branch != this_branch:
                     label1 = c.label
@@ -691,7 +675,7 @@ class BSPlotterProjected(BSPlotter):
     """
 
     def __init__(self, bs):
-        if len(bs._projections) == 0:
+        if len(bs.projections) == 0:
             raise ValueError("try to plot projections"
                              " on a band structure without any")
         super(BSPlotterProjected, self).__init__(bs)
@@ -9,10 +9,14 @@ import os
 import json
 from io import open
 
+import numpy as np
+from monty.tempfile import ScratchDir
+
 from pymatgen.electronic_structure.bandstructure import Kpoint
 from pymatgen import Lattice
 from pymatgen.electronic_structure.core import Spin, Orbital
-from pymatgen.electronic_structure.bandstructure import BandStructureSymmLine
+from pymatgen.electronic_structure.bandstructure import BandStructureSymmLine, \
+    BandStructure
 
 test_dir = os.path.join(os.path.dirname(__file__), "..", "..", "..",
                         'test_files')
@@ -38,6 +42,45 @@ class KpointTest(unittest.TestCase):
         self.assertEqual(self.kpoint.label, "X")
 
 
+class BandStructureTest(unittest.TestCase):
+
+    def setUp(self):
+        self.bs = BandStructure(
+            [[0.0, 0.0, 0.0], [0.5, 0.0, 0.0]],
+            {Spin.up: [[-1.0, -2.0], [1.0, 3.0]]},
+            Lattice.cubic(1.0).reciprocal_lattice, 0.0,
+            labels_dict={"\\Gamma": [0.0, 0.0, 0.0], "X": [0.5, 0.0, 0.0]})
+
+    def test_kpoints(self):
+        self.assertIsNone(self.bs._kpoints)
+        self.assertEqual(self.bs.kpoint_frac_coords.shape, (2, 3))
+        self.assertEqual(self.bs.kpoints[1].label, "X")
+        self.assertEqual(self.bs.kpoints[1].frac_coords[0], 0.5)
+
+    def test_band_edges(self):
+        self.assertFalse(self.bs.is_metal())
+        vbm = self.bs.get_vbm()
+        self.assertEqual(vbm["energy"], -1.0)
+        self.assertEqual(vbm["kpoint_index"], [0])
+        self.assertEqual(vbm["band_index"], {Spin.up: [0]})
+        cbm = self.bs.get_cbm()
+        self.assertEqual(cbm["energy"], 1.0)
+        self.assertEqual(cbm["kpoint"].label, "\\Gamma")
+        bg = self.bs.get_band_gap()
+        self.assertEqual(bg["energy"], 2.0)
+        self.assertTrue(bg["direct"])
+        self.assertEqual(self.bs.get_direct_band_gap(), 2.0)
+        bs = BandStructure.from_dict(json.loads(json.dumps(self.bs.as_dict())))
+        self.assertEqual(bs.get_band_gap(), bg)
+
+    def test_is_metal(self):
+        bs = BandStructure([[0.0, 0.0, 0.0], [0.5, 0.0, 0.0]],
+                           {Spin.up: [[-1.0, -2.0], [1.0, 3.0]]},
+                           Lattice.cubic(1.0).reciprocal_lattice, -1.5)
+        self.assertTrue(bs.is_metal())
+        self.assertEqual(bs.get_direct_band_gap(), 0.0)
+
+
 class BandStructureSymmLine_test(unittest.TestCase):
 
     def setUp(self):
@@ -45,8 +88,11 @@ class BandStructureSymmLine_test(unittest.TestCase):
                   "r", encoding='utf-8') as f:
             d = json.load(f)
             self.bs = BandStructureSymmLine.from_dict(d)
-            self.assertListEqual(self.bs._projections[Spin.up][10][12][Orbital.s], [0.0, 0.0, 0.0, 0.0, 0.0, 0.0], "wrong projections")
-            self.assertListEqual(self.bs._projections[Spin.up][25][0][Orbital.dyz], [0.0, 0.0, 0.0011, 0.0219, 0.0219, 0.069], "wrong projections")
+            self.assertListEqual(self.bs.projections[Spin.up][10, 12, Orbital.s.value].tolist(), [0.0, 0.0, 0.0, 0.0, 0.0, 0.0], "wrong projections")
+            self.assertListEqual(self.bs.projections[Spin.up][25, 0, Orbital.dyz.value].tolist(), [0.0, 0.0, 0.0011, 0.0219, 0.0219, 0.069], "wrong projections")
+            self.assertEqual(self.bs.projections[Spin.up].shape[:2], (self.bs.nb_bands, len(self.bs.kpoints)))
+            bs = BandStructureSymmLine.from_dict(self.bs.as_dict())
+            self.assertTrue(np.allclose(bs.projections[Spin.up], self.bs.projections[Spin.up]))
             self.assertAlmostEqual(self.bs.get_projection_on_elements()[Spin.up][25][10]['O'], 0.0328)
             self.assertAlmostEqual(self.bs.get_projection_on_elements()[Spin.up][22][25]['Cu'], 0.8327)
             self.assertAlmostEqual(self.bs.get_projections_on_elts_and_orbitals({'Cu':['s','d']})[Spin.up][25][0]['Cu']['s'], 0.0027)
@@ -93,6 +139,43 @@ class BandStructureSymmLine_test(unittest.TestCase):
     def test_get_branch(self):
         self.assertAlmostEqual(self.bs.get_branch(110)[0]['name'], "U-W")
 
+    def test_get_equivalent_kpoints(self):
+        for i in [0, 15, 31, 79, 110]:
+            label = self.bs.kpoints[i].label
+            expected = [j for j, k in enumerate(self.bs.kpoints)
+                        if label is not None and k.label == label] or [i]
+            self.assertEqual(self.bs.get_equivalent_kpoints(i), expected)
+            self.assertEqual([b['index'] for b in self.bs.get_branch(i)][0],
+                             expected[0])
+
+    def test_npz(self):
+        with open(os.path.join(test_dir, "Cu2O_361_bandstructure.json"),
+                  "r", encoding='utf-8') as f:
+            bs_proj = BandStructureSymmLine.from_dict(json.load(f))
+        with ScratchDir("."):
+            for ref in (bs_proj, self.bs_spin):
+                ref.to_npz("bs.npz")
+                bs = BandStructureSymmLine.from_npz("bs.npz")
+                # the projections are read only when they are used
+                self.assertIsNone(bs._projections)
+                self.assertEqual(bs._branches, ref._branches)
+                self.assertEqual(bs.efermi, ref.efermi)
+                self.assertEqual(bs.get_band_gap(), ref.get_band_gap())
+                for spin in ref.bands:
+                    self.assertTrue(np.allclose(bs.bands[spin],
+                                                ref.bands[spin]))
+                self.assertEqual(set(bs.projections), set(ref.projections))
+                for spin in ref.projections:
+                    self.assertTrue(np.allclose(bs.projections[spin],
+                                                ref.projections[spin]))
+                self.assertEqual(bs.structure, ref.structure)
+
+    def test_apply_scissor(self):
+        bs = self.bs.apply_scissor(5.0)
+        self.assertAlmostEqual(bs.get_band_gap()['energy'], 5.0)
+        self.assertEqual(bs.get_band_gap()['transition'], "\\Gamma-X")
+        self.assertEqual(bs._branches, self.bs._branches)
+
     def test_is_metal(self):
         self.assertFalse(self.bs.is_metal(), "wrong metal assignment")
         self.assertFalse(self.bs_spin.is_metal(), "wrong metal assignment")
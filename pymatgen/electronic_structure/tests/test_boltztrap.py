@@ -77,6 +77,28 @@ class BoltztrapAnalyzerTest(unittest.TestCase):
         #                        (121,121, 65))
         # self.assertAlmostEqual(self.bz_fermi.fermi_surface_data[0][21][79][19],-0.138412)
 
+    def test_from_dirs(self):
+        bzs = BoltztrapAnalyzer.from_dirs(
+            [os.path.join(test_dir, "boltztrap/transp/"),
+             os.path.join(test_dir, "boltztrap/dos_up/")])
+        self.assertEqual(len(bzs), 2)
+        self.assertEqual(bzs[0]._cond[300].shape,
+                         (len(self.bz.mu_steps), 3, 3))
+        self.assertEqual(bzs[0]._hall[400].shape,
+                         (len(self.bz.mu_steps), 3, 3, 3))
+        self.assertEqual(bzs[0]._seebeck_doping['p'][600].shape,
+                         (len(self.bz.doping['p']), 3, 3))
+        self.assertAlmostEqual(bzs[1]._dos_partial['0']['pz'][2562],
+                               0.023862958)
+
+    def test_to_from_dict(self):
+        bz = BoltztrapAnalyzer.from_dict(self.bz.as_dict())
+        self.assertAlmostEqual(bz._cond[300][102][2][2], 1.7133249e+19)
+        self.assertAlmostEqual(bz._hall[400][68][1][2][2], 6.5106975e-10)
+        self.assertAlmostEqual(bz._hall_doping['n'][700][-1][2][2][2],
+                               5.0136483e-26)
+        self.assertAlmostEqual(bz.mu_doping['p'][300][2], 0.1553770018406)
+
     def test_get_seebeck(self):
         ref = [-768.99078999999995, -724.43919999999991, -686.84682999999973]
         for i in range(0, 3):
@@ -8,6 +8,9 @@ import unittest2 as unittest
 import os
 import json
 
+import numpy as np
+from monty.tempfile import ScratchDir
+
 from pymatgen.electronic_structure.core import Spin, Orbital, OrbitalType
 from pymatgen.electronic_structure.dos import CompleteDos
 
@@ -126,6 +129,46 @@ class CompleteDosTest(unittest.TestCase):
         self.assertTrue((abs(sum_spd.energies
                              - sum_element.energies) < 0.0001).all())
 
+    def test_pdos(self):
+        site = self.dos.structure[4]
+        pdos = self.dos.pdos[site]
+        self.assertTrue(np.allclose(
+            self.dos.get_site_orbital_dos(site, Orbital.dxy).densities[
+                Spin.up], pdos[Orbital.dxy][Spin.up]))
+        spd = self.dos.get_site_spd_dos(site)
+        d = sum(pdos[o][Spin.down] for o in (Orbital.dxy, Orbital.dyz,
+                                             Orbital.dz2, Orbital.dxz,
+                                             Orbital.dx2))
+        self.assertTrue(np.allclose(spd[OrbitalType.d].densities[Spin.down],
+                                    d))
+        el = site.specie
+        el_spd = self.dos.get_element_spd_dos(el)
+        el_dos = self.dos.get_element_dos()[el]
+        self.assertTrue(np.allclose(
+            sum(dos.densities[Spin.up] for dos in el_spd.values()),
+            el_dos.densities[Spin.up]))
+        # Cached sums are not affected by changes to the returned Dos.
+        el_dos.densities[Spin.up] += 1
+        self.assertFalse(np.allclose(
+            self.dos.get_element_dos()[el].densities[Spin.up],
+            el_dos.densities[Spin.up]))
+
+    def test_npz(self):
+        with ScratchDir("."):
+            self.dos.to_npz("complete_dos.npz")
+            dos = CompleteDos.from_npz("complete_dos.npz")
+        self.assertEqual(dos.structure, self.dos.structure)
+        self.assertAlmostEqual(dos.efermi, self.dos.efermi)
+        for spin in (Spin.up, Spin.down):
+            self.assertTrue(np.allclose(dos.densities[spin],
+                                        self.dos.densities[spin]))
+        site = dos.structure[4]
+        self.assertEqual(set(dos.pdos[site].keys()),
+                         set(self.dos.pdos[site].keys()))
+        self.assertTrue(np.allclose(
+            dos.get_spd_dos()[OrbitalType.p].densities[Spin.up],
+            self.dos.get_spd_dos()[OrbitalType.p].densities[Spin.up]))
+
     def test_str(self):
         self.assertIsNotNone(str(self.dos))
 
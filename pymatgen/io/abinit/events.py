@@ -26,12 +26,13 @@ from monty.json import MontyDecoder
 from pymatgen.core import Structure
 from monty.json import MSONable
 from pymatgen.serializers.json_coders import pmg_serialize
-from .abiinspect import YamlTokenizer
+from .abiinspect import YamlTokenizer, YamlDoc
 
 logger = logging.getLogger(__name__)
 
 __all__ = [
     "EventsParser",
+    "IncrementalEventsParser",
 ]
 
 
@@ -409,6 +410,9 @@ class EventsParser(object):
     """
     Error = EventsParserError
 
+    # Tags of the YAML documents associated to events.
+    EVENT_TAGS = WildCard("*Error|*Warning|*Comment|*Bug|*ERROR|*WARNING|*COMMENT|*BUG")
+
     def parse(self, filename, verbose=0):
         """
         Parse the given file. Return :class:`EventReport`.
@@ -417,34 +421,10 @@ class EventsParser(object):
         filename = os.path.abspath(filename)
         report = EventReport(filename)
 
-        w = WildCard("*Error|*Warning|*Comment|*Bug|*ERROR|*WARNING|*COMMENT|*BUG")
-
         with YamlTokenizer(filename) as tokens:
             for doc in tokens:
-                if w.match(doc.tag):
-                    #print("got doc.tag", doc.tag,"--")
-                    try:
-                        #print(doc.text)
-                        event = yaml.load(doc.text)
-                        #print(event.yaml_tag, type(event))
-                    except:
-                        #raise
-                        # Wrong YAML doc. Check tha doc tag and instantiate the proper event.
-                        message = "Malformatted YAML document at line: %d\n" % doc.lineno
-                        message += doc.text
-
-                        # This call is very expensive when we have many exceptions due to malformatted YAML docs.
-                        if verbose:
-                            message += "Traceback:\n %s" % straceback()
-
-                        if "error" in doc.tag.lower():
-                            print("It seems an error", doc.tag)
-                            event = AbinitYamlError(message=message, src_file=__file__, src_line=0)
-                        else:
-                            event = AbinitYamlWarning(message=message, src_file=__file__, src_line=0)
-
-                    event.lineno = doc.lineno
-                    report.append(event)
+                if self.EVENT_TAGS.match(doc.tag):
+                    report.append(self.event_from_doc(doc, verbose=verbose))
 
                 # Check whether the calculation completed.
                 if doc.tag == "!FinalSummary":
@@ -457,6 +437,31 @@ class EventsParser(object):
         report.set_run_completed(run_completed, start_datetime, end_datetime)
         return report
 
+    def event_from_doc(self, doc, verbose=0):
+        """
+        Build the :class:`AbinitEvent` from the :class:`YamlDoc` doc.
+        Malformatted documents are converted to :class:`AbinitYamlError` or :class:`AbinitYamlWarning`.
+        """
+        try:
+            event = yaml.load(doc.text)
+        except:
+            # Wrong YAML doc. Check tha doc tag and instantiate the proper event.
+            message = "Malformatted YAML document at line: %d\n" % doc.lineno
+            message += doc.text
+
+            # This call is very expensive when we have many exceptions due to malformatted YAML docs.
+            if verbose:
+                message += "Traceback:\n %s" % straceback()
+
+            if "error" in doc.tag.lower():
+                print("It seems an error", doc.tag)
+                event = AbinitYamlError(message=message, src_file=__file__, src_line=0)
+            else:
+                event = AbinitYamlWarning(message=message, src_file=__file__, src_line=0)
+
+        event.lineno = doc.lineno
+        return event
+
     def report_exception(self, filename, exc):
         """
         This method is used when self.parser raises an Exception so that
@@ -467,6 +472,116 @@ class EventsParser(object):
         return EventReport(filename, events=[event])
 
 
+class IncrementalEventsParser(EventsParser):
+    """
+    :class:`EventsParser` that keeps track of the position reached in the file
+    so that only the text appended since the previous call is scanned.
+    Useful for the log file of a running calculation that is parsed several times.
+
+    .. note::
+
+        The parser is associated to a single file. The internal state is reset
+        if parse is called with a different file or if the file has been truncated or rewritten.
+    """
+    # Number of bytes at the beginning of the file used to detect files that have been rewritten.
+    HEAD_SIZE = 256
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        """Reset the internal state. The next call to parse will read the file from the beginning."""
+        self.filename = None
+        # Offset (bytes) and number of lines parsed so far.
+        self._offset, self._linepos = 0, 0
+        self._head = b""
+        self._stat_key = None
+        self._events = []
+        self._run_completed, self._start_datetime, self._end_datetime = False, None, None
+
+    def parse(self, filename, verbose=0):
+        """
+        Parse the text added to filename since the last call. Return :class:`EventReport`
+        with all the events found so far.
+        """
+        filename = os.path.abspath(filename)
+        if filename != self.filename:
+            self.reset()
+            self.filename = filename
+
+        stat = os.stat(filename)
+        stat_key = (stat.st_ino, stat.st_size, stat.st_mtime)
+
+        if stat_key != self._stat_key:
+            with open(filename, "rb") as fh:
+                if self._offset and (stat.st_ino != self._stat_key[0] or stat.st_size < self._offset or
+                                     fh.read(len(self._head)) != self._head):
+                    # File has been replaced, truncated or rewritten.
+                    self.reset()
+                    self.filename = filename
+
+                if not self._offset:
+                    self._head = fh.read(self.HEAD_SIZE)
+
+                fh.seek(self._offset)
+                self._parse_bytes(fh.read(), verbose=verbose)
+
+            self._stat_key = stat_key
+
+        report = EventReport(filename, events=self._events)
+        report.set_run_completed(self._run_completed, self._start_datetime, self._end_datetime)
+        return report
+
+    def _parse_bytes(self, data, verbose=0):
+        """
+        Extract the events from the bytes data that starts at self._offset.
+        Only complete lines are considered. The offset is moved to the end of the last
+        complete YAML document so that documents that are still being written are parsed again.
+        """
+        offset, linepos = self._offset, self._linepos
+        in_doc, lines, doc_tag, lineno = False, [], None, None
+        start = 0
+
+        while True:
+            end = data.find(b"\n", start)
+            if end == -1: break
+            end += 1
+            line = data[start:end].decode("utf-8", "ignore")
+            start = end
+            linepos += 1
+
+            if line.startswith("---"):
+                # Include only lines in the form "--- !tag" or "---"
+                l = line[3:].strip()
+                in_doc, lines = False, []
+                if l.startswith("!"):
+                    in_doc, doc_tag = True, l
+                elif not l:
+                    in_doc, doc_tag = True, None
+                if in_doc:
+                    lineno = linepos
+
+            if not in_doc:
+                offset, self._linepos = self._offset + end, linepos
+                continue
+
+            lines.append(line)
+            if line.startswith("..."):
+                doc = YamlDoc(text="".join(lines), lineno=lineno, tag=doc_tag)
+                in_doc, lines = False, []
+                offset, self._linepos = self._offset + end, linepos
+
+                if self.EVENT_TAGS.match(doc.tag):
+                    self._events.append(self.event_from_doc(doc, verbose=verbose))
+
+                if doc.tag == "!FinalSummary":
+                    d = doc.as_dict()
+                    self._run_completed = True
+                    self._start_datetime, self._end_datetime = d["start_datetime"], d["end_datetime"]
+
+        self._offset = offset
+
+
 class EventHandler(six.with_metaclass(abc.ABCMeta, object)):
     """
     Abstract base class defining the interface for an EventHandler.
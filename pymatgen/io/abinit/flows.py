@@ -43,6 +43,7 @@ from .utils import File, Directory, Editor
 from .abiinspect import yaml_read_irred_perts
 from .works import NodeContainer, Work, BandStructureWork, PhononWork, BecWork, G0W0Work, QptdmWork
 from .events import EventsParser # autodoc_event_handlers
+from .statusdb import FlowStatusDatabase
 
 
 import logging
@@ -109,9 +110,11 @@ class Flow(Node, NodeContainer, MSONable):
         allocate: propagate the workdir and manager of the flow to all the registered tasks
         build:
         build_and_pickle_dump:
+        set_status_db: store the status of the nodes in a SQLite database updated incrementally by status_dump
     """
     VERSION = "0.1"
     PICKLE_FNAME = "__AbinitFlow__.pickle"
+    STATUS_DB_FNAME = "__AbinitFlow__.sqlite"
 
     Error = FlowError
 
@@ -312,6 +315,11 @@ class Flow(Node, NodeContainer, MSONable):
             with open(filepath, "rb") as fh:
                 flow = pmg_pickle_load(fh)
 
+            # Restore the status of the nodes that have been saved after the pickle file.
+            flow._pickled_graph = flow._get_graph_signature()
+            if flow.status_db is not None and os.path.exists(flow.status_db_file):
+                flow.status_db.load_nodes(flow.iflat_nodes())
+
         # Check if versions match.
         if flow.VERSION != cls.VERSION:
             msg = ("File flow version %s != latest version %s\n."
@@ -401,6 +409,55 @@ class Flow(Node, NodeContainer, MSONable):
         """The path of the pickle file."""
         return os.path.join(self.workdir, self.PICKLE_FNAME)
 
+    @property
+    def status_db_file(self):
+        """The path of the SQLite database with the status of the nodes."""
+        return os.path.join(self.workdir, self.STATUS_DB_FNAME)
+
+    def set_status_db(self, use=True):
+        """
+        Store the status of the nodes in a SQLite database. The pickle file is written only when the
+        structure of the flow changes while `status_dump` writes only the nodes that have changed.
+        This is useful for very large flows where re-pickling the entire flow at each update is expensive.
+        """
+        self._use_status_db = bool(use)
+        if not use: self._status_db = None
+
+    @property
+    def status_db(self):
+        """
+        :class:`FlowStatusDatabase` with the status of the nodes or None if the flow does not use it.
+        """
+        if not getattr(self, "_use_status_db", False):
+            return None
+        if getattr(self, "_status_db", None) is None:
+            self._status_db = FlowStatusDatabase(self.status_db_file, protocol=self.pickle_protocol)
+        return self._status_db
+
+    def _get_graph_signature(self):
+        """Tuple with the number of tasks in each work, used to detect changes in the structure of the flow."""
+        return tuple(len(work) for work in self)
+
+    def _get_task_map(self):
+        """Dictionary node_id --> task. Rebuilt only when the structure of the flow changes."""
+        graph = self._get_graph_signature()
+        cache = getattr(self, "_task_map", None)
+        if cache is None or cache[0] != graph:
+            cache = self._task_map = (graph, {task.node_id: task for task in self.iflat_tasks()})
+        return cache[1]
+
+    def _update_status_index(self, task):
+        """Write the new status of task to the status database (if the flow uses it)."""
+        if self.status_db is None or self.in_spectator_mode: return
+        self.status_db.update_status(task)
+
+    def __getstate__(self):
+        """
+        Return state is pickled as the contents for the instance.
+        The status database is not pickled, the connection is opened again when needed.
+        """
+        return {k: v for k, v in self.__dict__.items() if k not in ("_status_db", "_pickled_graph", "_task_map")}
+
     @property
     def mongo_id(self):
         return self._mongo_id
@@ -777,8 +834,25 @@ class Flow(Node, NodeContainer, MSONable):
             show: True to show the status of the flow.
             kwargs: keyword arguments passed to show_status
         """
-        for work in self:
-            work.check_status()
+        if self.status_db is not None and getattr(self, "_pickled_graph", None) == self._get_graph_signature():
+            # Only the tasks that are not completed or locked must be checked.
+            # The database is kept up to date by Task.set_status and status_dump.
+            task_map = self._get_task_map()
+            task_ids = self.status_db.get_task_ids(status=[self.S_OK, self.S_LOCKED], op="not in")
+            tasks = [task_map[tid] for tid in task_ids if tid in task_map]
+
+            for task in tasks:
+                if task.status in (task.S_OK, task.S_LOCKED): continue
+                task.check_status()
+
+            # Take into account possible dependencies (same logic as in Work.check_status).
+            for task in tasks:
+                if task.status == task.S_LOCKED: continue
+                if task.status < task.S_SUB and all(status == task.S_OK for status in task.deps_status):
+                    task.set_status(task.S_READY, "Status set to Ready")
+        else:
+            for work in self:
+                work.check_status()
 
         if kwargs.pop("show", False):
             self.show_status(**kwargs)
@@ -1611,6 +1685,27 @@ class Flow(Node, NodeContainer, MSONable):
             with AtomicFile(self.pickle_file, mode="wb") as fh:
                 pmg_pickle_dump(self, fh, protocol=protocol)
 
+            if self.status_db is not None:
+                self.status_db.dump_nodes(self.iflat_nodes(), force=True)
+                self._pickled_graph = self._get_graph_signature()
+
+        return 0
+
+    @check_spectator
+    def status_dump(self):
+        """
+        Save the status of the flow. If the flow uses the status database and its structure
+        has not changed since the last `pickle_dump`, only the nodes that have changed are written
+        to the database, otherwise the entire flow is saved with `pickle_dump`.
+        Returns 0 if success
+        """
+        if (self.status_db is None or self.has_chrooted or
+            getattr(self, "_pickled_graph", None) != self._get_graph_signature()):
+            return self.pickle_dump()
+
+        with FileLock(self.pickle_file):
+            self.status_db.dump_nodes(self.iflat_nodes())
+
         return 0
 
     def pickle_dumps(self, protocol=None):
@@ -178,7 +178,7 @@ class PyLauncher(object):
             tasks[0].start()
             num_launched += 1
 
-            self.flow.pickle_dump()
+            self.flow.status_dump()
 
         return num_launched
 
@@ -226,7 +226,7 @@ class PyLauncher(object):
                     break
 
         # Update the database.
-        self.flow.pickle_dump()
+        self.flow.status_dump()
 
         return num_launched
 
@@ -312,6 +312,8 @@ class PyFlowScheduler(object):
                 completed successfully. (DEFAULT: "no")
             killjobs_if_errors: "yes" if the scheduler should try to kill all the runnnig jobs
                 before exiting due to an error. (DEFAULT: "yes")
+            use_status_db: "yes" if the status of the tasks should be saved incrementally in the
+                SQLite database of the flow instead of pickling the entire flow at each iteration. (DEFAULT: "no")
         """
         # Options passed to the scheduler.
         self.sched_options = AttrDict(
@@ -342,6 +344,7 @@ class PyFlowScheduler(object):
         self.fix_qcritical = as_bool(kwargs.pop("fix_qcritical", True))
         self.rmflow = as_bool(kwargs.pop("rmflow", False))
         self.killjobs_if_errors = as_bool(kwargs.pop("killjobs_if_errors", True))
+        self.use_status_db = as_bool(kwargs.pop("use_status_db", False))
 
         self.customer_service_dir = kwargs.pop("customer_service_dir", None)
         if self.customer_service_dir is not None:
@@ -463,6 +466,7 @@ class PyFlowScheduler(object):
         # Check if we are already using a scheduler to run this flow
         flow.check_pid_file()
         flow.set_spectator_mode(False)
+        if self.use_status_db: flow.set_status_db(True)
 
         # Build dirs and files (if not yet done)
         flow.build()
@@ -615,7 +619,7 @@ class PyFlowScheduler(object):
                     max_nlaunch -= 1
                     if max_nlaunch == 0:
                         logger.info("Restart: too many jobs in the queue, returning")
-                        flow.pickle_dump()
+                        flow.status_dump()
                         return
 
             except task.RestartError:
@@ -633,7 +637,7 @@ class PyFlowScheduler(object):
         if nfixed: print("Fixed %d AbiCritical error(s)" % nfixed)
 
         # update database
-        flow.pickle_dump()
+        flow.status_dump()
 
         # Submit the tasks that are ready.
         try:
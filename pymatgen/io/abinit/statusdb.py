@@ -0,0 +1,206 @@
+# coding: utf-8
+# Copyright (c) Pymatgen Development Team.
+# Distributed under the terms of the MIT License.
+"""
+SQLite database used to store the runtime state of the nodes of a :class:`Flow`.
+"""
+from __future__ import unicode_literals, division, print_function
+
+import sqlite3
+
+from io import BytesIO
+from contextlib import contextmanager
+from pymatgen.serializers.pickle_coders import pmg_pickle_load, pmg_pickle_dump
+from .nodes import Status
+
+import logging
+logger = logging.getLogger(__name__)
+
+__author__ = "Matteo Giantomassi"
+__copyright__ = "Copyright 2013, The Materials Project"
+__version__ = "0.1"
+__maintainer__ = "Matteo Giantomassi"
+
+
+__all__ = [
+    "FlowStatusDatabase",
+]
+
+
+class FlowStatusDatabase(object):
+    """
+    SQLite database with the runtime state of the nodes (flow, works and tasks) of a :class:`Flow`.
+
+    Each node is stored in a row containing its status and a pickle with the attributes
+    that change during the execution (status, history, datetimes, input, manager ...).
+    The structure of the flow is still saved in the pickle file of the :class:`Flow`.
+    Only the nodes that have changed since the last call to `dump_nodes` are written
+    so that the cost of an update is proportional to the number of nodes that have changed
+    and not to the size of the flow.
+    """
+    # Attributes of the nodes that are modified during the execution of the flow.
+    NODE_ATTRS = ("_status", "_finalized", "history", "_corrections")
+
+    TASK_ATTRS = NODE_ATTRS + ("datetimes", "num_restarts", "_qjob", "queue_errors", "abi_errors",
+                               "_returncode", "_input", "manager", "mem_scales", "load_scales")
+
+    # Mapping string operator --> SQL operator.
+    _SQL_OPS = {"==": "=", "!=": "!=", "<": "<", "<=": "<=", ">": ">", ">=": ">="}
+
+    def __init__(self, filepath, protocol=-1):
+        """
+        Args:
+            filepath: Path of the SQLite file. Created if it does not exist.
+            protocol: Pickle protocol used for the state of the nodes.
+        """
+        self.filepath = filepath
+        self.protocol = protocol
+
+        # Signatures of the nodes that have been written, used to detect the nodes that have changed.
+        self._signatures = {}
+
+        with self._connect() as conn:
+            conn.execute("CREATE TABLE IF NOT EXISTS nodes ("
+                         "node_id INTEGER PRIMARY KEY, "
+                         "work_id INTEGER, "
+                         "is_task INTEGER, "
+                         "status INTEGER, "
+                         "state BLOB)")
+            conn.execute("CREATE INDEX IF NOT EXISTS nodes_status ON nodes (status)")
+
+    def __str__(self):
+        return "<%s at %s>" % (self.__class__.__name__, self.filepath)
+
+    @contextmanager
+    def _connect(self):
+        """Context manager returning a connection. The transaction is committed on exit."""
+        conn = sqlite3.connect(self.filepath)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    @staticmethod
+    def _is_task(node):
+        # Only tasks have datetimes.
+        return hasattr(node, "datetimes")
+
+    @staticmethod
+    def node_signature(node):
+        """
+        Cheap signature of the runtime state of the node. It changes whenever
+        the status of the node changes or a new entry is added to its history.
+        """
+        history = node.history
+        return (int(node._status), node._finalized, len(history),
+                id(history[-1]) if history else None, getattr(node, "num_restarts", None))
+
+    def get_node_state(self, node):
+        """Dictionary with the attributes of node that are stored in the database."""
+        attrs = self.TASK_ATTRS if self._is_task(node) else self.NODE_ATTRS
+        return {k: node.__dict__[k] for k in attrs if k in node.__dict__}
+
+    def dump_nodes(self, nodes, force=False):
+        """
+        Write the state of the nodes that have changed since the last call.
+
+        Args:
+            nodes: Iterable with the nodes of the flow.
+            force: True if all the nodes must be written.
+
+        Returns:
+            Number of rows written.
+        """
+        rows, signatures = [], {}
+        for node in nodes:
+            sig = self.node_signature(node)
+            if not force and self._signatures.get(node.node_id) == sig:
+                continue
+            is_task = self._is_task(node)
+            work_id = node.work.node_id if is_task else None
+            # Use PmgPickler so that the rows are deserialized in the same way as the pickle file of the flow.
+            buf = BytesIO()
+            pmg_pickle_dump(self.get_node_state(node), buf, protocol=self.protocol)
+            rows.append((node.node_id, work_id, int(is_task), int(node._status), sqlite3.Binary(buf.getvalue())))
+            signatures[node.node_id] = sig
+
+        if rows:
+            with self._connect() as conn:
+                conn.executemany("INSERT OR REPLACE INTO nodes VALUES (?, ?, ?, ?, ?)", rows)
+            self._signatures.update(signatures)
+
+        logger.debug("%s: %d rows written" % (self, len(rows)))
+        return len(rows)
+
+    def update_status(self, node):
+        """
+        Write the status of the node without the rest of its state. Used to keep the status
+        column up to date between two calls to `dump_nodes` so that the queries return the current status.
+        """
+        is_task = self._is_task(node)
+        work_id = node.work.node_id if is_task else None
+        with self._connect() as conn:
+            cursor = conn.execute("UPDATE nodes SET status = ? WHERE node_id = ?", (int(node._status), node.node_id))
+            if cursor.rowcount == 0:
+                conn.execute("INSERT INTO nodes VALUES (?, ?, ?, ?, NULL)",
+                             (node.node_id, work_id, int(is_task), int(node._status)))
+
+    def load_nodes(self, nodes):
+        """
+        Restore the state of the nodes from the database.
+        Nodes that are not in the database are left unchanged.
+
+        Returns:
+            Number of nodes updated.
+        """
+        nodes = {node.node_id: node for node in nodes}
+        with self._connect() as conn:
+            rows = conn.execute("SELECT node_id, state FROM nodes").fetchall()
+
+        count = 0
+        for node_id, state in rows:
+            node = nodes.get(node_id)
+            # Skip the rows written by update_status before the first dump of the node.
+            if node is None or state is None: continue
+            node.__dict__.update(pmg_pickle_load(BytesIO(bytes(state))))
+            self._signatures[node_id] = self.node_signature(node)
+            count += 1
+
+        return count
+
+    def get_task_ids(self, status=None, op="=="):
+        """
+        Return the node identifiers of the tasks whose status satisfies the condition (status op value).
+        If status is None, all the tasks are returned. status can be either one of the flags defined
+        in the :class:`Task` class (e.g Task.S_OK), a string e.g "S_OK" or a list when op is "in" or "not in".
+        """
+        query, args = "SELECT node_id FROM nodes WHERE is_task = 1", []
+        if status is not None:
+            cond, args = self._status_condition(status, op)
+            query += " AND " + cond
+
+        with self._connect() as conn:
+            return [row[0] for row in conn.execute(query, args)]
+
+    def get_work_ids(self, status=None, op="=="):
+        """
+        Return the node identifiers of the works containing at least one task
+        whose status satisfies the condition (status op value).
+        """
+        query, args = "SELECT DISTINCT work_id FROM nodes WHERE is_task = 1", []
+        if status is not None:
+            cond, args = self._status_condition(status, op)
+            query += " AND " + cond
+
+        with self._connect() as conn:
+            return [row[0] for row in conn.execute(query, args)]
+
+    def _status_condition(self, status, op):
+        """SQL condition on the status column and the corresponding arguments."""
+        if op in ("in", "not in"):
+            status = [int(Status.as_status(s)) for s in status]
+            cond = "status %s (%s)" % (op.upper(), ", ".join("?" * len(status)))
+            return cond, status
+
+        return "status %s ?" % self._SQL_OPS[op], [int(Status.as_status(status))]
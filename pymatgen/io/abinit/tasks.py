@@ -1348,8 +1348,10 @@ class Task(six.with_metaclass(abc.ABCMeta, Node)):
         In this case we just remove the process since Subprocess objects cannot be pickled.
         This is the reason why we have to store the returncode in self._returncode instead
         of using self.process.returncode.
+        The caches used by check_status are removed as well.
         """
-        return {k: v for k, v in self.__dict__.items() if k not in ["_process"]}
+        return {k: v for k, v in self.__dict__.items()
+                if k not in ["_process", "_events_parsers", "_last_status_check"]}
 
     #@check_spectator
     def set_workdir(self, workdir, chroot=False):
@@ -1683,6 +1685,7 @@ class Task(six.with_metaclass(abc.ABCMeta, Node)):
         self.start_lockfile.remove()
         self.qerr_file.remove()
         self.qout_file.remove()
+        self._reset_status_cache()
 
         self.set_status(self.S_INIT, msg="Reset on %s" % time.asctime())
         self.set_qjob(None)
@@ -1745,6 +1748,7 @@ class Task(six.with_metaclass(abc.ABCMeta, Node)):
             raise ValueError("Trying to lock a task with status %s" % self.status)
 
         self._status = self.S_LOCKED
+        self._update_status_index()
         self.history.info("Locked by node %s", source_node)
 
     def unlock(self, source_node, check_status=True):
@@ -1757,9 +1761,16 @@ class Task(six.with_metaclass(abc.ABCMeta, Node)):
             raise RuntimeError("Trying to unlock a task with status %s" % self.status)
 
         self._status = self.S_READY
+        self._update_status_index()
         if check_status: self.check_status()
         self.history.info("Unlocked by %s", source_node)
 
+    def _update_status_index(self):
+        """Propagate the new status to the status database of the flow (if any)."""
+        flow = getattr(getattr(self, "_work", None), "_flow", None)
+        if flow is not None:
+            flow._update_status_index(self)
+
     #@check_spectator
     def set_status(self, status, msg):
         """
@@ -1796,6 +1807,7 @@ class Task(six.with_metaclass(abc.ABCMeta, Node)):
 
         # Add new entry to history only if the status has changed.
         if changed:
+            self._update_status_index()
             if status == self.S_SUB:
                 self.datetimes.submission = datetime.datetime.now()
                 self.history.info("Submitted with MPI=%s, Omp=%s, Memproc=%.1f [Gb] %s " % (
@@ -1831,11 +1843,49 @@ class Task(six.with_metaclass(abc.ABCMeta, Node)):
 
         return status
 
+    def _reset_status_cache(self):
+        """Remove the caches used by check_status e.g. before starting a new run."""
+        self.__dict__.pop("_events_parsers", None)
+        self.__dict__.pop("_last_status_check", None)
+
+    def _get_files_signature(self):
+        """
+        Tuple with the returncode and the size and the modification time of the files
+        inspected by check_status. None is used for the files that do not exist.
+        """
+        sig = [self.returncode]
+        for f in (self.output_file, self.log_file, self.stderr_file, self.qerr_file,
+                  self.qout_file, self.mpiabort_file):
+            try:
+                stat = os.stat(f.path)
+                sig.append((stat.st_size, stat.st_mtime))
+            except OSError:
+                sig.append(None)
+
+        return tuple(sig)
+
     def check_status(self):
         """
         This function checks the status of the task by inspecting the output and the
         error files produced by the application and by the queue manager.
+
+        The files are analyzed only if they have changed since the previous call
+        (or if the status has been changed by someone else), otherwise the previous status is returned.
+        Submitted and running tasks are always analyzed since their status may change even if
+        the files do not (e.g. frozen tasks or tasks that exceeded the walltime).
         """
+        sig = self._get_files_signature()
+        last = getattr(self, "_last_status_check", None)
+        if last is not None and last == (sig, self.status) and self.status not in (self.S_SUB, self.S_RUN):
+            return self.status
+
+        status = self._check_status()
+        # Use the status of the node because _check_status does not always return it.
+        self._last_status_check = (sig, self.status)
+        return status
+
+    def _check_status(self):
+        """Inspect the output and the error files. Called by check_status."""
         # 1) see it the job is blocked
         # 2) see if an error occured at submitting the job the job was submitted, TODO these problems can be solved
         # 3) see if there is output
@@ -2121,14 +2171,18 @@ class Task(six.with_metaclass(abc.ABCMeta, Node)):
             "output": self.output_file,
             "log": self.log_file}[source]
 
-        parser = events.EventsParser()
+        # Files are parsed incrementally: only the text added since the last call is scanned.
+        if not hasattr(self, "_events_parsers"): self._events_parsers = {}
+        if source not in self._events_parsers:
+            self._events_parsers[source] = events.IncrementalEventsParser()
+        parser = self._events_parsers[source]
 
         if not ofile.exists:
             if not self.mpiabort_file.exists:
                 return None
             else:
                 # ABINIT abort file without log!
-                abort_report = parser.parse(self.mpiabort_file.path)
+                abort_report = events.EventsParser().parse(self.mpiabort_file.path)
                 return abort_report
 
         try:
@@ -2138,7 +2192,7 @@ class Task(six.with_metaclass(abc.ABCMeta, Node)):
             # Add events found in the ABI_MPIABORTFILE.
             if self.mpiabort_file.exists:
                 logger.critical("Found ABI_MPIABORTFILE!!!!!")
-                abort_report = parser.parse(self.mpiabort_file.path)
+                abort_report = events.EventsParser().parse(self.mpiabort_file.path)
                 if len(abort_report) != 1:
                     logger.critical("Found more than one event in ABI_MPIABORTFILE")
 
@@ -2161,6 +2215,7 @@ class Task(six.with_metaclass(abc.ABCMeta, Node)):
             # Return a report with an error entry with info on the exception.
             msg = "%s: Exception while parsing ABINIT events:\n %s" % (ofile, str(exc))
             self.set_status(self.S_ABICRITICAL, msg=msg)
+            parser.reset()
             return parser.report_exception(ofile.path, exc)
 
     def get_results(self, **kwargs):
@@ -2364,6 +2419,7 @@ class Task(six.with_metaclass(abc.ABCMeta, Node)):
             return 0
 
         self.start_lockfile.write("Started on %s" % time.asctime())
+        self._reset_status_cache()
 
         self.build()
         self._setup()
@@ -65,6 +65,38 @@ class EventsParserTest(PymatgenTest):
         assert len(report.get_events_of_type(events.AbinitYamlError)) == 1
         #assert 0
 
+    def test_incremental_parser(self):
+        """Parsing a log file that is being written."""
+        from monty.tempfile import ScratchDir
+        ref_report = events.EventsParser().parse(ref_file("mgb2_nscf.log"))
+        with open(ref_file("mgb2_nscf.log"), "rb") as fh:
+            data = fh.read()
+
+        with ScratchDir(".") as tmpdir:
+            path = os.path.join(tmpdir, "run.log")
+            parser = events.IncrementalEventsParser()
+
+            # Write the file in chunks whose boundaries do not coincide with the end of lines.
+            with open(path, "wb") as fh:
+                step = len(data) // 7 + 1
+                for start in range(0, len(data), step):
+                    fh.write(data[start:start+step])
+                    fh.flush()
+                    report = parser.parse(path)
+                    assert len(report) <= len(ref_report)
+
+            report = parser.parse(path)
+            assert (report.num_errors, report.num_warnings, report.num_comments) == (0, 2, 0)
+            assert [e.lineno for e in report] == [e.lineno for e in ref_report]
+            assert report.run_completed == ref_report.run_completed
+
+            # The file is rewritten: the parser should start again from the beginning.
+            with open(path, "wb") as fh:
+                fh.write(open(ref_file("mgb2_scf.log"), "rb").read())
+            report = parser.parse(path)
+            assert (report.num_errors, report.num_warnings, report.num_comments) == (0, 0, 0)
+            assert report.run_completed
+
 
 class EventHandlersTest(PymatgenTest):
     def test_events(self):
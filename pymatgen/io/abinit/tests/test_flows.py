@@ -211,6 +211,80 @@ class FlowTest(FlowUnitTest):
         flow.show_status()
         flow.show_event_handlers()
 
+    def test_status_db(self):
+        """Testing the incremental update of the status of the Flow with the SQLite database..."""
+        aequal, atrue = self.assertEqual, self.assertTrue
+        flow = Flow(workdir=self.workdir, manager=self.manager)
+        flow.register_task(self.fake_input)
+        flow.register_task(self.fake_input)
+        flow.set_status_db(True)
+        flow.build_and_pickle_dump()
+        atrue(os.path.exists(flow.status_db_file))
+        aequal(len(flow.status_db.get_task_ids()), 2)
+
+        # Only the task that has changed is written and the pickle file is not updated.
+        with open(flow.pickle_file, "rb") as fh:
+            pickle_data = fh.read()
+        task = flow[1][0]
+        task.set_status(task.S_RUN, msg="Running")
+        # set_status updates the status column so that the database can be queried before the next dump.
+        aequal(flow.status_db.get_task_ids(status=task.S_RUN), [task.node_id])
+        aequal(flow.status_db.dump_nodes(flow.iflat_nodes()), 1)
+        aequal(flow.status_db.dump_nodes(flow.iflat_nodes()), 0)
+        task.history.info("Hello %s", "world")
+        aequal(flow.status_dump(), 0)
+        with open(flow.pickle_file, "rb") as fh:
+            aequal(fh.read(), pickle_data)
+        aequal(flow.status_db.get_task_ids(status=task.S_RUN), [task.node_id])
+        aequal(flow.status_db.get_work_ids(status=task.S_RUN), [flow[1].node_id])
+
+        # The status is restored when the flow is loaded from file.
+        same_flow = Flow.pickle_load(self.workdir)
+        same_task = same_flow[1][0]
+        aequal(same_task.status, task.S_RUN)
+        aequal(same_task.history[-1].get_message(asctime=False), "Hello world")
+        aequal(same_flow[0][0].status, task.S_INIT)
+
+        # check_status visits only the tasks that are not completed or locked according to the database.
+        checked = []
+        for t in flow.iflat_tasks():
+            t.check_status = lambda t=t: checked.append(t.node_id)
+        flow[0][0].lock(source_node=flow)
+        aequal(flow.status_db.get_task_ids(status=task.S_LOCKED), [flow[0][0].node_id])
+        flow.check_status()
+        aequal(checked, [task.node_id])
+        for t in flow.iflat_tasks():
+            del t.check_status
+
+        # Adding a new work changes the structure of the flow: the pickle file is written again.
+        flow.register_task(self.fake_input)
+        flow.allocate()
+        flow.status_dump()
+        aequal(len(Flow.pickle_load(self.workdir)), 3)
+
+    def test_check_status_frozen(self):
+        """Testing that check_status detects frozen tasks even if the files do not change..."""
+        aequal = self.assertEqual
+        flow = Flow(workdir=self.workdir, manager=self.manager)
+        task = flow.register_task(self.fake_input)[0]
+        flow.allocate()
+
+        # A running task whose output file is not modified anymore.
+        for f in (task.output_file, task.log_file):
+            f.write("")
+        task.set_status(task.S_RUN, msg="Running")
+        policy = task.manager.policy
+        policy.frozen_timeout = 3600
+        aequal(task.check_status(), task.S_RUN)
+
+        # Same files but the output is now older than frozen_timeout.
+        policy.frozen_timeout = -1
+        aequal(task.check_status(), task.S_ERROR)
+        aequal(task.status, task.S_ERROR)
+
+        # Tasks that are not running use the cached status if the files did not change.
+        aequal(task.check_status(), task.S_ERROR)
+
     def test_workdir(self):
         """Testing if one can use workdir=None in flow.__init__ and then flow.allocate(workdir)."""
         flow = Flow(workdir=None, manager=self.manager)
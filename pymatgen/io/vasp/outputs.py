@@ -5,7 +5,9 @@
 from __future__ import division, unicode_literals, print_function
 
 import glob
+import hashlib
 import itertools
+import json
 import logging
 import math
 import os
@@ -13,7 +15,6 @@ import re
 import warnings
 import xml.etree.cElementTree as ET
 from collections import defaultdict
-from io import StringIO
 
 import numpy as np
 from monty.io import zopen, reverse_readfile
@@ -120,6 +121,18 @@ def _parse_varray(elem):
     return [[_vasprun_float(i) for i in v.text.split()] for v in elem]
 
 
+def _parse_r_block(elem):
+    """
+    Parses the values of all the <r> rows below elem into a flat array in a
+    single pass.
+    """
+    tokens = " ".join(r.text for r in elem.iter("r")).split()
+    try:
+        return np.array(tokens, dtype=np.float)
+    except ValueError:
+        return np.array([_vasprun_float(t) for t in tokens])
+
+
 def _parse_from_incar(filename, key):
     """
     Helper function to parse a parameter from the INCAR.
@@ -136,6 +149,40 @@ def _parse_from_incar(filename, key):
     return None
 
 
+IONIC_STEP_FIELDS = ("energies", "structure", "forces", "stress",
+                     "electronic_steps")
+
+
+def _filter_ionic_step(istep, fields):
+    """
+    Returns a copy of an ionic step dict that only keeps the requested fields.
+    Energies are the float entries of the dict. Entries that do not belong
+    to any of IONIC_STEP_FIELDS (e.g., dielectric tensors of DFPT runs) are
+    always kept.
+    """
+    if fields is None:
+        return istep
+    d = {}
+    for k, v in istep.items():
+        if k in IONIC_STEP_FIELDS:
+            keep = k in fields
+        elif isinstance(v, float):
+            keep = "energies" in fields
+        else:
+            keep = True
+        if keep:
+            d[k] = v
+    return d
+
+
+def _check_ionic_step_fields(fields):
+    if fields is not None:
+        for f in fields:
+            if f not in IONIC_STEP_FIELDS:
+                raise ValueError("Unknown ionic step field %s. Valid fields "
+                                 "are %s." % (f, ", ".join(IONIC_STEP_FIELDS)))
+
+
 def _vasprun_float(f):
     """
     Large numbers are often represented as ********* in the vasprun.
@@ -173,7 +220,17 @@ class Vasprun(MSONable):
             set ionic_step_skip to 10 and ionic_step_offset to 3. Main use
             case is when doing statistical structure analysis with
             extremely long time scale multiple VASP calculations of
-            varying numbers of steps.
+            varying numbers of steps. The ionic steps are skipped while
+            streaming through the file, so the file is never read into
+            memory as a whole.
+        ionic_step_fields (list): If set, only the listed fields are kept for
+            all ionic steps except the last one, which is always kept
+            complete. Valid fields are "energies", "structure", "forces",
+            "stress" and "electronic_steps". Defaults to None, i.e., all
+            fields are kept. Combined with ionic_step_skip, this keeps the
+            memory used for very long runs (e.g., AIMD) small. See also
+            :meth:`Vasprun.iter_ionic_steps` to stream over the ionic steps
+            of a run without keeping them at all.
         parse_dos (bool): Whether to parse the dos. Defaults to True. Set
             to False to shave off significant time from the parsing if you
             are not interested in getting those data.
@@ -231,15 +288,18 @@ class Vasprun(MSONable):
     .. attribute:: eigenvalues
 
         Available only if parse_eigen=True. Final eigenvalues as a dict of
-        {(spin, kpoint index):[[eigenvalue, occu]]}.
+        {spin: array of shape (nkpoints, nbands, 2)}, where the last axis
+        holds the [eigenvalue, occu] pairs.
         This representation is based on actual ordering in VASP and is meant as
         an intermediate representation to be converted into proper objects. The
         kpoint index is 0-based (unlike the 1-based indexing in VASP).
 
     .. attribute:: projected_eigenvalues
 
-        Final projected eigenvalues as a dict of
-        {(atom index, band index, kpoint index, Orbital, Spin):float}
+        Final projected eigenvalues as a dict of {spin: array of shape
+        (nkpoints, nbands, natoms, norbitals)}. The orbital index is the
+        value of the corresponding Orbital, e.g.,
+        projected_eigenvalues[Spin.up][kpoint, band, atom, Orbital.s.value].
         This representation is based on actual ordering in VASP and is meant as
         an intermediate representation to be converted into proper objects. The
         kpoint, band and atom indices are 0-based (unlike the 1-based indexing
@@ -346,7 +406,7 @@ class Vasprun(MSONable):
                  ionic_step_offset=0, parse_dos=True,
                  parse_eigen=True, parse_projected_eigen=False,
                  parse_potcar_file=True, occu_tol=1e-8,
-                 exception_on_bad_xml=True):
+                 exception_on_bad_xml=True, ionic_step_fields=None):
         self.filename = filename
         self.ionic_step_skip = ionic_step_skip
         self.ionic_step_offset = ionic_step_offset
@@ -354,30 +414,9 @@ class Vasprun(MSONable):
         self.exception_on_bad_xml = exception_on_bad_xml
 
         with zopen(filename, "rt") as f:
-            if ionic_step_skip or ionic_step_offset:
-                # remove parts of the xml file and parse the string
-                run = f.read()
-                steps = run.split("<calculation>")
-                # The text before the first <calculation> is the preamble!
-                preamble = steps.pop(0)
-                self.nionic_steps = len(steps)
-                new_steps = steps[ionic_step_offset::int(ionic_step_skip)]
-                # add the tailing informat in the last step from the run
-                to_parse = "<calculation>".join(new_steps)
-                if steps[-1] != new_steps[-1]:
-                    to_parse = "{}<calculation>{}{}".format(
-                        preamble, to_parse,
-                        steps[-1].split("</calculation>")[-1])
-                else:
-                    to_parse = "{}<calculation>{}".format(preamble, to_parse)
-                self._parse(StringIO(to_parse), parse_dos=parse_dos,
-                            parse_eigen=parse_eigen,
-                            parse_projected_eigen=parse_projected_eigen)
-            else:
-                self._parse(f, parse_dos=parse_dos, parse_eigen=parse_eigen,
-                            parse_projected_eigen=parse_projected_eigen)
-                self.nionic_steps = len(self.ionic_steps)
-
+            self._parse(f, parse_dos=parse_dos, parse_eigen=parse_eigen,
+                        parse_projected_eigen=parse_projected_eigen,
+                        ionic_step_fields=ionic_step_fields)
             if parse_potcar_file:
                 self.update_potcar_spec(parse_potcar_file)
 
@@ -388,15 +427,88 @@ class Vasprun(MSONable):
             msg += "Ionic convergence reached: %s." % self.converged_ionic
             warnings.warn(msg, UnconvergedVASPWarning)
 
-    def _parse(self, stream, parse_dos, parse_eigen, parse_projected_eigen):
+    @classmethod
+    def iter_ionic_steps(cls, filename, ionic_step_skip=None,
+                         ionic_step_offset=0, ionic_step_fields=None,
+                         exception_on_bad_xml=True):
+        """
+        Streams over the ionic steps of a vasprun.xml file without keeping
+        them in memory, e.g., to process AIMD runs that are too large to be
+        loaded with Vasprun. Eigenvalues, dos and other end-of-run data are
+        not parsed.
+
+        Args:
+            filename (str): Filename to parse
+            ionic_step_skip (int): Only yield every ionic_step_skip ionic
+                steps. Same meaning as in Vasprun.
+            ionic_step_offset (int): Offset of the first ionic step yielded.
+                Same meaning as in Vasprun.
+            ionic_step_fields (list): Fields to keep for each ionic step.
+                Valid fields are "energies", "structure", "forces", "stress"
+                and "electronic_steps". Defaults to None, i.e., all fields.
+            exception_on_bad_xml (bool): Whether to throw a ParseException if
+                a malformed XML is detected. If False, iteration stops at the
+                last complete ionic step.
+
+        Yields:
+            Ionic steps as dicts, in the same format as Vasprun.ionic_steps.
+        """
+        _check_ionic_step_fields(ionic_step_fields)
+        vrun = cls.__new__(cls)
+        vrun.filename = filename
+        vrun.ionic_step_skip = ionic_step_skip
+        vrun.ionic_step_offset = ionic_step_offset
+        vrun.exception_on_bad_xml = exception_on_bad_xml
+        with zopen(filename, "rt") as f:
+            for istep in vrun._iterparse(f, parse_dos=False, parse_eigen=False,
+                                         parse_projected_eigen=False,
+                                         ionic_step_fields=ionic_step_fields):
+                yield _filter_ionic_step(istep, ionic_step_fields)
+
+    def _parse(self, stream, parse_dos, parse_eigen, parse_projected_eigen,
+               ionic_step_fields=None):
+        _check_ionic_step_fields(ionic_step_fields)
+        ionic_steps = []
+        for istep in self._iterparse(stream, parse_dos, parse_eigen,
+                                     parse_projected_eigen):
+            # Only the final ionic step is kept complete.
+            if ionic_steps:
+                ionic_steps[-1] = _filter_ionic_step(ionic_steps[-1],
+                                                     ionic_step_fields)
+            ionic_steps.append(istep)
+        self.ionic_steps = ionic_steps
+        if not (self.ionic_step_skip or self.ionic_step_offset):
+            # Chemical shift calculations are split into several steps.
+            self.nionic_steps = len(ionic_steps)
+        self.vasp_version = self.generator["version"]
+
+    def _iterparse(self, stream, parse_dos, parse_eigen,
+                   parse_projected_eigen, ionic_step_fields=None):
+        """
+        Generator over the ionic steps retained after applying
+        ionic_step_skip and ionic_step_offset. All other data is set as
+        attributes while parsing. Processed elements are removed from the
+        tree, so that memory use does not grow with the length of the run.
+        ionic_step_fields is only used to avoid parsing the electronic steps
+        and structures when they are not needed.
+        """
         self.efermi = None
         self.eigenvalues = None
         self.projected_eigenvalues = None
         self.other_dielectric = {}
-        ionic_steps = []
+        self.nionic_steps = 0
+        skip = int(self.ionic_step_skip or 1)
+        offset = self.ionic_step_offset or 0
         parsed_header = False
+        root = None
         try:
-            for event, elem in ET.iterparse(stream):
+            # Event names must be native strings for cElementTree in py2.
+            events = (str("start"), str("end"))
+            for event, elem in ET.iterparse(stream, events=events):
+                if root is None:
+                    root = elem
+                if event != "end":
+                    continue
                 tag = elem.tag
                 if not parsed_header:
                     if tag == "generator":
@@ -420,10 +532,19 @@ class Vasprun(MSONable):
                                             p in self.potcar_symbols]
                 if tag == "calculation":
                     parsed_header = True
-                    if not self.parameters.get("LCHIMAG", False):
-                        ionic_steps.append(self._parse_calculation(elem))
-                    else:
-                        ionic_steps.extend(self._parse_chemical_shift_calculation(elem))
+                    i = self.nionic_steps
+                    self.nionic_steps += 1
+                    if i >= offset and (i - offset) % skip == 0:
+                        if not self.parameters.get("LCHIMAG", False):
+                            yield self._parse_calculation(elem,
+                                                          ionic_step_fields)
+                        else:
+                            for istep in \
+                                    self._parse_chemical_shift_calculation(
+                                        elem):
+                                yield istep
+                    elem.clear()
+                    root.clear()
                 elif parse_dos and tag == "dos":
                     try:
                         self.tdos, self.idos, self.pdos = self._parse_dos(elem)
@@ -466,8 +587,6 @@ class Vasprun(MSONable):
                 warnings.warn(
                     "XML is malformed. Parsing has stopped but partial data"
                     "is available.", UserWarning)
-        self.ionic_steps = ionic_steps
-        self.vasp_version = self.generator["version"]
 
     @property
     def structures(self):
@@ -699,35 +818,18 @@ class Vasprun(MSONable):
 
         kpoints = [np.array(self.actual_kpoints[i])
                    for i in range(len(self.actual_kpoints))]
-        dict_eigen = self.as_dict()['output']['eigenvalues']
-        dict_p_eigen = {}
-        if 'projected_eigenvalues' in self.as_dict()['output']:
-            dict_p_eigen = self.as_dict()['output']['projected_eigenvalues']
-
         p_eigenvals = defaultdict(list)
         eigenvals = defaultdict(list)
 
-        neigenvalues = [len(v['1']) for v in dict_eigen.values()]
-        min_eigenvalues = min(neigenvalues)
-        for i in range(min_eigenvalues):
-            eigenvals[Spin.up].append([dict_eigen[str(j)]['1'][i][0]
-                                       for j in range(len(kpoints))])
-            if len(dict_p_eigen) != 0:
-                p_eigenvals[Spin.up].append(
-                    [{Orbital[orb]: dict_p_eigen[j]['1'][i][orb]
-                      for orb in dict_p_eigen[j]['1'][i]}
-                     for j in range(len(kpoints))])
-        if "1" in dict_eigen["0"] and "-1" in dict_eigen["0"] \
-                and self.incar['ISPIN'] == 2:
-            for i in range(min_eigenvalues):
-                eigenvals[Spin.down].append([dict_eigen[str(j)]['-1'][i][0]
-                                             for j in range(len(kpoints))])
-                if len(dict_p_eigen) != 0:
-                    p_eigenvals[Spin.down].append(
-                        [{Orbital[orb]: dict_p_eigen[j]['-1'][i][orb]
-                          for orb in dict_p_eigen[j]['-1'][i]}
-                         for j in range(len(kpoints))]
-                    )
+        spins = [Spin.up]
+        if Spin.down in self.eigenvalues and self.incar['ISPIN'] == 2:
+            spins.append(Spin.down)
+        for spin in spins:
+            eigenvals[spin] = self.eigenvalues[spin][:, :, 0].T.tolist()
+            if self.projected_eigenvalues:
+                # (nbands, nkpoints, norbitals, natoms) as in BandStructure
+                p_eigenvals[spin] = np.transpose(
+                    self.projected_eigenvalues[spin], (1, 0, 3, 2))
 
         # check if we have an hybrid band structure computation
         # for this we look at the presence of the LHFCALC tag
@@ -766,6 +868,8 @@ class Vasprun(MSONable):
                                  Spin.down: down_eigen}
                 else:
                     eigenvals = {Spin.up: up_eigen}
+                p_eigenvals = {spin: v[:, start_bs_index:]
+                               for spin, v in p_eigenvals.items()}
             else:
                 if '' in kpoint_file.labels:
                     raise Exception("A band structure along symmetry lines "
@@ -792,14 +896,23 @@ class Vasprun(MSONable):
         vbm_kpoint = None
         cbm = float("inf")
         cbm_kpoint = None
-        for (spin, k), val in self.eigenvalues.items():
-            for (eigenval, occu) in val:
-                if occu > self.occu_tol and eigenval > vbm:
-                    vbm = eigenval
-                    vbm_kpoint = k
-                elif occu <= self.occu_tol and eigenval < cbm:
-                    cbm = eigenval
-                    cbm_kpoint = k
+        for val in self.eigenvalues.values():
+            eigenvals = val[:, :, 0]
+            occupied = val[:, :, 1] > self.occu_tol
+            if np.any(occupied):
+                k, b = np.unravel_index(
+                    np.argmax(np.where(occupied, eigenvals, -np.inf)),
+                    eigenvals.shape)
+                if eigenvals[k, b] > vbm:
+                    vbm = float(eigenvals[k, b])
+                    vbm_kpoint = int(k)
+            if not np.all(occupied):
+                k, b = np.unravel_index(
+                    np.argmin(np.where(occupied, np.inf, eigenvals)),
+                    eigenvals.shape)
+                if eigenvals[k, b] < cbm:
+                    cbm = float(eigenvals[k, b])
+                    cbm_kpoint = int(k)
         return max(cbm - vbm, 0), cbm, vbm, vbm_kpoint == cbm_kpoint
 
     def update_potcar_spec(self, path):
@@ -893,29 +1006,7 @@ class Vasprun(MSONable):
                     "efermi": self.efermi}
 
         if self.eigenvalues:
-            eigen = defaultdict(dict)
-            for (spin, index), values in self.eigenvalues.items():
-                eigen[index][str(spin)] = values
-            vout["eigenvalues"] = eigen
-            (gap, cbm, vbm, is_direct) = self.eigenvalue_band_properties
-            vout.update(dict(bandgap=gap, cbm=cbm, vbm=vbm,
-                             is_gap_direct=is_direct))
-
-            if self.projected_eigenvalues:
-                peigen = []
-                for i in range(len(eigen)):
-                    peigen.append({})
-                    for spin in eigen[i].keys():
-                        peigen[i][spin] = []
-                        for j in range(len(eigen[i][spin])):
-                            peigen[i][spin].append({})
-                for (spin, kpoint_index, band_index, ion_index, orbital), \
-                        value in self.projected_eigenvalues.items():
-                    beigen = peigen[kpoint_index][str(spin)][band_index]
-                    if orbital not in beigen:
-                        beigen[orbital] = [0.0] * nsites
-                    beigen[orbital][ion_index] = value
-                vout['projected_eigenvalues'] = peigen
+            vout.update(self._eigen_as_dict())
 
         vout['epsilon_static'] = self.epsilon_static
         vout['epsilon_static_wolfe'] = self.epsilon_static_wolfe
@@ -923,6 +1014,33 @@ class Vasprun(MSONable):
         d['output'] = vout
         return jsanitize(d, strict=True)
 
+    def _eigen_as_dict(self):
+        """
+        Eigenvalue related entries of the output section of as_dict. The
+        eigenvalues are given as {kpoint index: {spin: [[eigenvalue, occu]]}}
+        and the projected eigenvalues as a list over the kpoints of
+        {spin: [{orbital: [projection on each site]} for each band]}.
+        """
+        nkpts = len(self.eigenvalues[Spin.up])
+        d = {"eigenvalues": {
+            k: {str(spin): v[k].tolist()
+                for spin, v in self.eigenvalues.items()}
+            for k in range(nkpts)}}
+        (gap, cbm, vbm, is_direct) = self.eigenvalue_band_properties
+        d.update(dict(bandgap=gap, cbm=cbm, vbm=vbm, is_gap_direct=is_direct))
+
+        if self.projected_eigenvalues:
+            peigen = []
+            for k in range(nkpts):
+                peigen.append({})
+                for spin, v in self.projected_eigenvalues.items():
+                    orbitals = [Orbital(i) for i in range(v.shape[3])]
+                    peigen[k][str(spin)] = [
+                        {orb: v[k, b, :, orb.value].tolist()
+                         for orb in orbitals} for b in range(v.shape[1])]
+            d["projected_eigenvalues"] = peigen
+        return d
+
     def _parse_params(self, elem):
         params = {}
         for c in elem:
@@ -1050,7 +1168,7 @@ class Vasprun(MSONable):
         return calculation
 
 
-    def _parse_calculation(self, elem):
+    def _parse_calculation(self, elem, fields=None):
         try:
             istep = {i.attrib["name"]: float(i.text)
                      for i in elem.find("energy").findall("i")}
@@ -1058,20 +1176,24 @@ class Vasprun(MSONable):
             istep = {}
             pass
         esteps = []
-        for scstep in elem.findall("scstep"):
+        if fields is None or "electronic_steps" in fields:
+            for scstep in elem.findall("scstep"):
+                try:
+                    d = {i.attrib["name"]: _vasprun_float(i.text)
+                         for i in scstep.find("energy").findall("i")}
+                    esteps.append(d)
+                except AttributeError:  # not all calculations have an energy
+                    pass
+        s = None
+        if fields is None or "structure" in fields:
             try:
-                d = {i.attrib["name"]: _vasprun_float(i.text)
-                     for i in scstep.find("energy").findall("i")}
-                esteps.append(d)
-            except AttributeError:  # not all calculations have an energy
+                s = self._parse_structure(elem.find("structure"))
+            except AttributeError:  # not all calculations have a structure
                 pass
-        try:
-            s = self._parse_structure(elem.find("structure"))
-        except AttributeError:  # not all calculations have a structure
-            s = None
-            pass
         for va in elem.findall("varray"):
-            istep[va.attrib["name"]] = _parse_varray(va)
+            if fields is None or va.attrib["name"] not in ("forces", "stress") \
+                    or va.attrib["name"] in fields:
+                istep[va.attrib["name"]] = _parse_varray(va)
         istep["electronic_steps"] = esteps
         istep["structure"] = s
         elem.clear()
@@ -1120,8 +1242,10 @@ class Vasprun(MSONable):
         for s in elem.find("array").find("set").findall("set"):
             spin = Spin.up if s.attrib["comment"] == "spin 1" else \
                 Spin.down
-            for i, ss in enumerate(s.findall("set")):
-                eigenvalues[(spin, i)] = _parse_varray(ss)
+            kpts = s.findall("set")
+            nbands = len(kpts[0].findall("r"))
+            eigenvalues[spin] = _parse_r_block(s).reshape(
+                (len(kpts), nbands, 2))
         elem.clear()
         return eigenvalues
 
@@ -1131,12 +1255,12 @@ class Vasprun(MSONable):
         for s in root.findall("set"):
             spin = Spin.up if s.attrib["comment"] == "spin1" else \
                 Spin.down
-            for kpt, ss in enumerate(s.findall("set")):
-                for band, sss in enumerate(ss.findall("set")):
-                    for atom, data in enumerate(_parse_varray(sss)):
-                        for i, v in enumerate(data):
-                            orb = Orbital(i)
-                            proj_eigen[(spin, kpt, band, atom, orb)] = v
+            kpts = s.findall("set")
+            bands = kpts[0].findall("set")
+            atoms = bands[0].findall("r")
+            norbs = len(atoms[0].text.split())
+            proj_eigen[spin] = _parse_r_block(s).reshape(
+                (len(kpts), len(bands), len(atoms), norbs))
         elem.clear()
         return proj_eigen
 
@@ -1253,35 +1377,11 @@ class BSVasprun(Vasprun):
         vin["lattice_rec"] = self.lattice_rec.as_dict()
         d["input"] = vin
 
-        nsites = len(self.final_structure)
-
         vout = {"crystal": self.final_structure.as_dict(),
                 "efermi": self.efermi}
 
         if self.eigenvalues:
-            eigen = defaultdict(dict)
-            for (spin, index), values in self.eigenvalues.items():
-                eigen[index][str(spin)] = values
-            vout["eigenvalues"] = eigen
-            (gap, cbm, vbm, is_direct) = self.eigenvalue_band_properties
-            vout.update(dict(bandgap=gap, cbm=cbm, vbm=vbm,
-                             is_gap_direct=is_direct))
-
-            if self.projected_eigenvalues:
-                peigen = []
-                for i in range(len(eigen)):
-                    peigen.append({})
-                    for spin in eigen[i].keys():
-                        peigen[i][spin] = []
-                        for j in range(len(eigen[i][spin])):
-                            peigen[i][spin].append({})
-                for (spin, kpoint_index, band_index, ion_index, orbital), \
-                        value in self.projected_eigenvalues.items():
-                    beigen = peigen[kpoint_index][str(spin)][band_index]
-                    if orbital not in beigen:
-                        beigen[orbital] = [0.0] * nsites
-                    beigen[orbital][ion_index] = value
-                vout['projected_eigenvalues'] = peigen
+            vout.update(self._eigen_as_dict())
         d['output'] = vout
         return jsanitize(d, strict=True)
 
@@ -2088,6 +2188,38 @@ class Outcar(MSONable):
         return d
 
 
+def _read_volumetric_data(f, dim):
+    """
+    Reads one data set of a volumetric data file in bulk, starting at the
+    line after the grid dimensions.
+
+    Args:
+        f: File object, positioned after the grid dimension line.
+        dim: Grid dimensions (nx, ny, nz).
+
+    Returns:
+        Data set as a np.array of shape dim.
+    """
+    ngrid_pts = dim[0] * dim[1] * dim[2]
+    data = np.empty(ngrid_pts)
+    count = 0
+    nlines = 1
+    while count < ngrid_pts:
+        lines = list(itertools.islice(f, nlines))
+        if not lines:
+            raise ValueError("Volumetric data ended unexpectedly.")
+        toks = " ".join(lines).split()
+        vals = np.array(toks[:ngrid_pts - count], dtype=np.float)
+        data[count:count + len(vals)] = vals
+        count += len(vals)
+        # vasp writes a constant number of values per line, which is used
+        # to read the rest of the data set in large chunks.
+        nlines = min(int(math.ceil((ngrid_pts - count) /
+                                   max(len(toks) / len(lines), 1))), 100000)
+    # vasp outputs x as the fastest index, followed by y then z.
+    return data.reshape(dim, order="F")
+
+
 class VolumetricData(object):
     """
     Simple volumetric object for reading LOCPOT and CHGCAR type files.
@@ -2197,66 +2329,84 @@ class VolumetricData(object):
         return VolumetricData(self.structure, data, self._distance_matrix)
 
     @staticmethod
-    def parse_file(filename):
+    def parse_file(filename, mmap_dir=None):
         """
         Convenience method to parse a generic volumetric data file in the vasp
-        like format. Used by subclasses for parsing file.
+        like format. Used by subclasses for parsing file. Each data set is
+        read in bulk and the augmentation occupancies following it (in
+        CHGCAR files) are skipped.
 
         Args:
             filename (str): Path of file to parse
+            mmap_dir (str): If set, the parsed data sets are saved as .npy
+                files in this directory and returned as read-only memory
+                mapped arrays. If up-to-date .npy files for filename are
+                already present, only the header of filename is read and the
+                data is opened lazily from them, which makes reopening large
+                files almost instantaneous. The cached files are named after
+                a hash of the absolute path of filename and are used only if
+                the size and the modification time of filename did not change.
 
         Returns:
             (poscar, data)
         """
-        poscar_read = False
         poscar_string = []
-        dataset = []
-        all_dataset = []
-        dim = None
-        dimline = None
-        read_dataset = False
-        ngrid_pts = 0
-        data_count = 0
-        poscar = None
-        with zopen(filename) as f:
+        with zopen(filename, "rt") as f:
             for line in f:
                 line = line.strip()
-                if read_dataset:
-                    toks = line.split()
-                    for tok in toks:
-                        if data_count < ngrid_pts:
-                            # This complicated procedure is necessary because
-                            # vasp outputs x as the fastest index, followed by y
-                            # then z.
-                            x = data_count % dim[0]
-                            y = int(math.floor(data_count / dim[0])) % dim[1]
-                            z = int(math.floor(data_count / dim[0] / dim[1]))
-                            dataset[x, y, z] = float(tok)
-                            data_count += 1
-                    if data_count >= ngrid_pts:
-                        read_dataset = False
-                        data_count = 0
-                        all_dataset.append(dataset)
-                elif not poscar_read:
-                    if line != "" or len(poscar_string) == 0:
-                        poscar_string.append(line)
-                    elif line == "":
-                        poscar = Poscar.from_string("\n".join(poscar_string))
-                        poscar_read = True
-                elif not dim:
-                    dim = [int(i) for i in line.split()]
-                    ngrid_pts = dim[0] * dim[1] * dim[2]
-                    dimline = line
-                    read_dataset = True
-                    dataset = np.zeros(dim)
-                elif line == dimline:
-                    read_dataset = True
-                    dataset = np.zeros(dim)
-            if len(all_dataset) == 2:
-                data = {"total": all_dataset[0], "diff": all_dataset[1]}
-            else:
-                data = {"total": all_dataset[0]}
-            return poscar, data
+                if line != "" or len(poscar_string) == 0:
+                    poscar_string.append(line)
+                else:
+                    break
+            poscar = Poscar.from_string("\n".join(poscar_string))
+            dimline = next(f).strip()
+            dim = [int(i) for i in dimline.split()]
+
+            if mmap_dir:
+                abspath = os.path.abspath(filename)
+                stat = os.stat(abspath)
+                fingerprint = {"path": abspath, "size": stat.st_size,
+                               "mtime": stat.st_mtime, "dim": dim}
+                prefix = os.path.join(mmap_dir, "{}.{}".format(
+                    os.path.basename(filename),
+                    hashlib.sha1(abspath.encode("utf-8")).hexdigest()[:16]))
+                paths = {k: "{}.{}.npy".format(prefix, k)
+                         for k in ("total", "diff")}
+                # The index is written after the arrays and lists the data
+                # sets of filename together with its fingerprint.
+                index_path = prefix + ".json"
+                try:
+                    with open(index_path, "rt") as fi:
+                        index = json.load(fi)
+                    if index["fingerprint"] == fingerprint:
+                        data = {k: np.load(paths[k], mmap_mode="r")
+                                for k in index["keys"]}
+                        if all(list(d.shape) == dim for d in data.values()):
+                            return poscar, data
+                except (IOError, OSError, ValueError, KeyError):
+                    pass
+
+            all_dataset = [_read_volumetric_data(f, dim)]
+            # Skip the augmentation occupancies until the next data set.
+            for line in f:
+                if line.strip() == dimline:
+                    all_dataset.append(_read_volumetric_data(f, dim))
+
+        if len(all_dataset) == 2:
+            data = {"total": all_dataset[0], "diff": all_dataset[1]}
+        else:
+            data = {"total": all_dataset[0]}
+        if mmap_dir:
+            for path in list(paths.values()) + [index_path]:
+                if os.path.exists(path):
+                    os.remove(path)
+            for k, d in data.items():
+                np.save(paths[k], d)
+                data[k] = np.load(paths[k], mmap_mode="r")
+            with open(index_path, "wt") as fi:
+                json.dump({"fingerprint": fingerprint,
+                           "keys": sorted(data.keys())}, fi)
+        return poscar, data
 
     def write_file(self, file_name, vasp4_compatible=False):
         """
@@ -2287,19 +2437,15 @@ class VolumetricData(object):
             a = self.dim
 
             def write_spin(data_type):
-                lines = []
-                count = 0
                 f.write("{} {} {}\n".format(a[0], a[1], a[2]))
-                for (k, j, i) in itertools.product(list(range(a[2])), list(range(a[1])),
-                                                   list(range(a[0]))):
-                    lines.append("%0.11e" % self.data[data_type][i, j, k])
-                    count += 1
-                    if count % 5 == 0:
-                        f.write("".join(lines) + "\n")
-                        lines = []
-                    else:
-                        lines.append(" ")
-                f.write("".join(lines) + "\n")
+                # vasp outputs x as the fastest index, followed by y then z.
+                data = np.ravel(self.data[data_type], order="F")
+                nfull = len(data) - len(data) % 5
+                line = " ".join(["%0.11e"] * 5) + "\n"
+                for i in range(0, nfull, 50000):
+                    block = data[i:min(i + 50000, nfull)]
+                    f.write(line * (len(block) // 5) % tuple(block))
+                f.write("".join(["%0.11e " % v for v in data[nfull:]]) + "\n")
 
             write_spin("total")
             if self.is_spin_polarized:
@@ -2399,8 +2545,8 @@ class Locpot(VolumetricData):
         self.name = poscar.comment
 
     @staticmethod
-    def from_file(filename):
-        (poscar, data) = VolumetricData.parse_file(filename)
+    def from_file(filename, mmap_dir=None):
+        (poscar, data) = VolumetricData.parse_file(filename, mmap_dir=mmap_dir)
         return Locpot(poscar, data)
 
 
@@ -2420,8 +2566,8 @@ class Chgcar(VolumetricData):
         self._distance_matrix = {}
 
     @staticmethod
-    def from_file(filename):
-        (poscar, data) = VolumetricData.parse_file(filename)
+    def from_file(filename, mmap_dir=None):
+        (poscar, data) = VolumetricData.parse_file(filename, mmap_dir=mmap_dir)
         return Chgcar(poscar, data)
 
 
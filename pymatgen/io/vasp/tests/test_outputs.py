@@ -18,12 +18,15 @@ __date__ = "Jul 16, 2012"
 
 import unittest2 as unittest
 import os
+import glob
+import shutil
 import json
 import numpy as np
 import warnings
 
 import xml.etree.cElementTree as ET
 
+from monty.tempfile import ScratchDir
 
 from pymatgen.electronic_structure.core import OrbitalType
 from pymatgen.io.vasp.inputs import Kpoints
@@ -152,9 +155,8 @@ class VasprunTest(unittest.TestCase):
 
         self.assertTrue(vasprun_ggau.is_hubbard)
         self.assertEqual(vasprun_ggau.hubbards["Fe"], 4.3)
-        self.assertAlmostEqual(vasprun_ggau.projected_eigenvalues[(Spin.up, 0,
-                                                                   0, 96,
-                                                                   Orbital.s)],
+        self.assertAlmostEqual(vasprun_ggau.projected_eigenvalues[Spin.up][
+                                   0, 0, 96, Orbital.s.value],
                                0.0032)
         d = vasprun_ggau.as_dict()
         self.assertEqual(d["elements"], ["Fe", "Li", "O", "P"])
@@ -268,6 +270,52 @@ class VasprunTest(unittest.TestCase):
         vr = Vasprun(os.path.join(test_dir, 'vasprun.xml.xe'), parse_potcar_file=False)
         self.assertEqual(vr.atomic_symbols, ['Xe'])
 
+    def test_ionic_step_fields(self):
+        filepath = os.path.join(test_dir, 'vasprun.xml.xe')
+        vr = Vasprun(filepath, parse_potcar_file=False)
+        vr_skip = Vasprun(filepath, 2, 1, parse_potcar_file=False,
+                          ionic_step_fields=["energies"])
+        self.assertEqual(vr_skip.nionic_steps, 7)
+        self.assertEqual(len(vr_skip.ionic_steps), 3)
+        self.assertEqual(set(vr_skip.ionic_steps[0].keys()),
+                         {"e_fr_energy", "e_wo_entrp", "e_0_energy"})
+        self.assertAlmostEqual(vr_skip.ionic_steps[1]["e_fr_energy"],
+                               vr.ionic_steps[3]["e_fr_energy"])
+        # The last ionic step is always complete.
+        self.assertEqual(vr_skip.ionic_steps[-1]["structure"],
+                         vr.ionic_steps[5]["structure"])
+        self.assertRaises(ValueError, Vasprun, filepath,
+                          ionic_step_fields=["foo"])
+
+    def test_iter_ionic_steps(self):
+        filepath = os.path.join(test_dir, 'vasprun.xml.xe')
+        vr = Vasprun(filepath, parse_potcar_file=False)
+        steps = list(Vasprun.iter_ionic_steps(filepath))
+        self.assertEqual(len(steps), 7)
+        self.assertEqual(steps[-1]["structure"], vr.final_structure)
+        steps = list(Vasprun.iter_ionic_steps(
+            filepath, 3, ionic_step_fields=["structure", "forces"]))
+        self.assertEqual(len(steps), 3)
+        for istep, ref in zip(steps, vr.ionic_steps[::3]):
+            self.assertEqual(set(istep.keys()), {"structure", "forces"})
+            self.assertEqual(istep["structure"], ref["structure"])
+            self.assertEqual(istep["forces"], ref["forces"])
+
+    def test_eigenvalues(self):
+        vr = Vasprun(os.path.join(test_dir, 'vasprun_Si_bands.xml'),
+                     parse_projected_eigen=True, parse_potcar_file=False)
+        nkpts = len(vr.actual_kpoints)
+        self.assertEqual(vr.eigenvalues[Spin.up].shape, (nkpts, 13, 2))
+        self.assertEqual(vr.projected_eigenvalues[Spin.up].shape,
+                         (nkpts, 13, 2, 9))
+        self.assertAlmostEqual(vr.eigenvalues[Spin.up][0, 0, 0], -6.1991)
+        d = vr.as_dict()["output"]
+        self.assertEqual(d["eigenvalues"]["0"]["1"][0],
+                         vr.eigenvalues[Spin.up][0, 0].tolist())
+        self.assertEqual(len(d["projected_eigenvalues"]), nkpts)
+        self.assertEqual(d["projected_eigenvalues"][0]["1"][0]["s"],
+                         vr.projected_eigenvalues[Spin.up][0, 0, :, 0].tolist())
+
     def test_invalid_element(self):
         self.assertRaises(ValueError, Vasprun,
                           os.path.join(test_dir, 'vasprun.xml.wrong_sp'))
@@ -627,6 +675,50 @@ class ChgcarTest(unittest.TestCase):
         self.assertTrue(np.allclose(myans[:, 1], ans))
 
 
+    def test_write_file(self):
+        filepath = os.path.join(test_dir, 'CHGCAR.spin')
+        chg = Chgcar.from_file(filepath)
+        with ScratchDir("."):
+            chg.write_file("CHGCAR_pmg")
+            chg2 = Chgcar.from_file("CHGCAR_pmg")
+            for k in ["total", "diff"]:
+                self.assertTrue(np.allclose(chg.data[k], chg2.data[k]))
+            chg.write_file("CHGCAR_pmg.gz")
+            chg2 = Chgcar.from_file("CHGCAR_pmg.gz")
+            self.assertTrue(np.allclose(chg.data["diff"], chg2.data["diff"]))
+
+    def test_mmap_dir(self):
+        filepath = os.path.join(test_dir, 'CHGCAR.spin')
+        chg = Chgcar.from_file(filepath)
+        with ScratchDir(".") as d:
+            chg2 = Chgcar.from_file(filepath, mmap_dir=d)
+            self.assertEqual(len(glob.glob(os.path.join(
+                d, "CHGCAR.spin.*.diff.npy"))), 1)
+            self.assertIsInstance(chg2.data["total"], np.memmap)
+            # Reopening only reads the header.
+            chg3 = Chgcar.from_file(filepath, mmap_dir=d)
+            for k in ["total", "diff"]:
+                self.assertTrue(np.array_equal(chg.data[k], chg2.data[k]))
+                self.assertTrue(np.array_equal(chg.data[k], chg3.data[k]))
+
+            # Files with the same name in different directories do not
+            # share the cache.
+            for dirname, src in [("spin", "CHGCAR.spin"),
+                                 ("nospin", "CHGCAR.nospin")]:
+                os.mkdir(dirname)
+                shutil.copy(os.path.join(test_dir, src),
+                            os.path.join(dirname, "CHGCAR"))
+            for dirname, src in [("spin", "CHGCAR.spin"),
+                                 ("nospin", "CHGCAR.nospin")] * 2:
+                ref = Chgcar.from_file(os.path.join(test_dir, src))
+                chg = Chgcar.from_file(os.path.join(dirname, "CHGCAR"),
+                                       mmap_dir=d)
+                self.assertEqual(sorted(chg.data.keys()),
+                                 sorted(ref.data.keys()))
+                self.assertTrue(np.array_equal(chg.data["total"],
+                                               ref.data["total"]))
+
+
 class ProcarTest(unittest.TestCase):
 
     def test_init(self):
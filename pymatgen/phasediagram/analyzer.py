@@ -22,8 +22,6 @@ import numpy as np
 import itertools
 import collections
 
-from monty.functools import lru_cache
-
 from pymatgen.core.composition import Composition
 from pymatgen.phasediagram.maker import PhaseDiagram, \
     GrandPotentialPhaseDiagram, get_facets
@@ -57,6 +55,11 @@ class PDAnalyzer(object):
             pd: Phase Diagram to analyze.
         """
         self._pd = pd
+        # Caches of the data derived from the hull. They are stored with the
+        # facets they were computed from and rebuilt when pd.facets changes
+        # (e.g. after PhaseDiagram.add_entries).
+        self._simplex_data = None
+        self._facet_cache = None
 
     def _make_comp_matrix(self, complist):
         """
@@ -66,20 +69,70 @@ class PDAnalyzer(object):
         return np.array([[comp.get_atomic_fraction(el)
                           for el in self._pd.elements] for comp in complist])
 
-    @lru_cache(1)
+    def _get_simplex_data(self):
+        """
+        Origins and inverse matrices of the simplices of the phase diagram,
+        as arrays of shape (nfacets, dim-1) and (nfacets, dim-1, dim-1).
+        Computed once and used to obtain the barycentric coordinates of
+        many compositions with respect to all the facets at the same time.
+        """
+        if self._simplex_data is None or \
+                self._simplex_data[0] is not self._pd.facets:
+            simplices = [Simplex(s) for s in self._pd.simplices]
+            origins = np.array([s.origin for s in simplices])
+            t_invs = np.array([s.T_inv for s in simplices])
+            self._simplex_data = (self._pd.facets, (
+                origins.reshape(len(simplices), -1),
+                t_invs.reshape((len(simplices),) + origins.shape[1:] * 2)))
+        return self._simplex_data[1]
+
+    def _get_facet_indices(self, comp_matrix, chunk_size=100000):
+        """
+        Vectorized version of _get_facet.
+
+        Args:
+            comp_matrix: Array of shape (n, dim) with the atomic fractions
+                (as given by _make_comp_matrix) of n compositions.
+            chunk_size (int): Maximum number of barycentric coordinates
+                computed at once. Used to limit the memory.
+
+        Returns:
+            Array with the index (in self._pd.facets) of the first facet
+            containing each composition. -1 if no facet is found.
+        """
+        origins, t_invs = self._get_simplex_data()
+        points = np.asarray(comp_matrix)[:, 1:]
+        nfacets = len(origins)
+        inds = np.empty(len(points), dtype=np.int)
+        step = max(1, chunk_size // max(1, nfacets))
+        for i in range(0, len(points), step):
+            p = points[i:i + step, None, :] - origins[None, :, :]
+            c = np.einsum("nfi,fij->nfj", p, t_invs)
+            bary = np.concatenate([c, 1 - np.sum(c, axis=2)[:, :, None]],
+                                  axis=2)
+            inside = np.all(bary >= -PDAnalyzer.numerical_tol / 10, axis=2)
+            inds[i:i + step] = np.where(inside.any(axis=1),
+                                        inside.argmax(axis=1), -1)
+        return inds
+
     def _get_facet(self, comp):
         """
         Get any facet that a composition falls into. Cached so successive
         calls at same composition are fast.
         """
+        facets = self._pd.facets
+        if self._facet_cache is not None:
+            cached_facets, cached_comp, facet = self._facet_cache
+            if cached_facets is facets and cached_comp == comp:
+                return facet
         if set(comp.elements).difference(self._pd.elements):
             raise ValueError('{} has elements not in the phase diagram {}'
                              ''.format(comp, self._pd.elements))
-        c = [comp.get_atomic_fraction(e) for e in self._pd.elements[1:]]
-        for f, s in zip(self._pd.facets, self._pd.simplices):
-            if Simplex(s).in_simplex(c, PDAnalyzer.numerical_tol / 10):
-                return f
-        raise RuntimeError("No facet found for comp = {}".format(comp))
+        ind = self._get_facet_indices(self._make_comp_matrix([comp]))[0]
+        if ind < 0:
+            raise RuntimeError("No facet found for comp = {}".format(comp))
+        self._facet_cache = (facets, comp, facets[ind])
+        return facets[ind]
 
     def get_decomposition(self, comp):
         """
@@ -160,6 +213,54 @@ class PDAnalyzer(object):
         """
         return self.get_decomp_and_e_above_hull(entry)[1]
 
+    def get_e_above_hull_batch(self, entries, allow_negative=False):
+        """
+        Provides the energies above convex hull for many entries. Equivalent
+        to calling get_e_above_hull on each entry, but the facets containing
+        the entries are located and the decompositions solved for all the
+        entries at once, which is much faster for large numbers of entries.
+
+        Args:
+            entries: List of PDEntry like objects
+            allow_negative: Whether to allow negative e_above_hulls. Defaults
+                to False.
+
+        Returns:
+            numpy array with the energy above convex hull of each entry.
+        """
+        entries = list(entries)
+        if not entries:
+            return np.zeros(0)
+        for entry in entries:
+            if set(entry.composition.elements).difference(self._pd.elements):
+                raise ValueError('{} has elements not in the phase diagram {}'
+                                 ''.format(entry.composition,
+                                           self._pd.elements))
+
+        compm = self._make_comp_matrix([e.composition for e in entries])
+        inds = self._get_facet_indices(compm)
+        if (inds < 0).any():
+            comp = entries[np.where(inds < 0)[0][0]].composition
+            raise RuntimeError("No facet found for comp = {}".format(comp))
+
+        # Solve the decompositions of all the entries at once.
+        facets = np.array(self._pd.facets).reshape(len(self._pd.facets), -1)
+        facet_comps = self._make_comp_matrix(
+            [e.composition for e in self._pd.qhull_entries])[facets]
+        facet_energies = np.array([e.energy_per_atom
+                                   for e in self._pd.qhull_entries])[facets]
+        m = np.transpose(facet_comps[inds], (0, 2, 1))
+        decomp_amts = np.linalg.solve(m, compm[:, :, None])[:, :, 0]
+
+        energies = np.array([e.energy_per_atom for e in entries])
+        ehulls = energies - np.sum(decomp_amts * facet_energies[inds], axis=1)
+
+        stable_entries = self._pd.stable_entries
+        ehulls[[i for i, e in enumerate(entries) if e in stable_entries]] = 0
+        if not allow_negative and (ehulls < -PDAnalyzer.numerical_tol).any():
+            raise ValueError("No valid decomp found!")
+        return ehulls
+
     def get_equilibrium_reaction_energy(self, entry):
         """
         Provides the reaction energy of a stable entry from the neighboring
@@ -130,6 +130,19 @@ class PhaseDiagram(MSONable):
             raise PhaseDiagramError(
                 "There are no entries associated with a terminal element!.")
 
+        self.all_entries = all_entries
+        self.dim = dim
+        self.el_refs = el_refs
+        self.elements = elements
+        self._compute_hull(min_entries)
+
+    def _compute_hull(self, min_entries):
+        """
+        Computes the convex hull from min_entries, the lowest energy entries
+        of each composition (including the elemental references), and sets
+        qhull_entries, qhull_data, facets and simplices.
+        """
+        elements, dim, el_refs = self.elements, self.dim, self.el_refs
         data = np.array([
             [e.composition.get_atomic_fraction(el) for el in elements] + [e.energy_per_atom]
             for e in min_entries
@@ -168,13 +181,62 @@ class PhaseDiagram(MSONable):
             self.facets = finalfacets
 
         self.simplices = [qhull_data[f, :-1] for f in self.facets]
-        self.all_entries = all_entries
         self.qhull_data = qhull_data
-        self.dim = dim
-        self.el_refs = el_refs
-        self.elements = elements
         self.qhull_entries = qhull_entries
 
+    def add_entries(self, entries):
+        """
+        Adds new entries to the phase diagram. The convex hull is recomputed
+        only if some of the new entries are below the current hull. In this
+        case, only the current stable entries and the new entries below the
+        hull are used since entries that are unstable cannot become stable
+        when other entries are added. Note that qhull_entries then includes
+        only these entries.
+
+        Args:
+            entries ([PDEntry]): A list of PDEntry-like objects with elements
+                in the phase diagram.
+
+        Returns:
+            (newly_stable, no_longer_stable): Sets with the entries that
+            have become stable and the entries that are no longer stable.
+        """
+        from pymatgen.phasediagram.analyzer import PDAnalyzer
+        entries = list(entries)
+        for entry in entries:
+            if set(entry.composition.elements).difference(self.elements):
+                raise PhaseDiagramError(
+                    "{} has elements not in the phase diagram {}".format(
+                        entry.composition, self.elements))
+        if not entries:
+            return set(), set()
+
+        self.all_entries.extend(entries)
+        ehulls = PDAnalyzer(self).get_e_above_hull_batch(
+            entries, allow_negative=True)
+        below_hull = [e for e, ehull in zip(entries, ehulls)
+                      if ehull < -self.formation_energy_tol]
+        if not below_hull:
+            return set(), set()
+
+        old_stable = self.stable_entries
+        get_reduced_comp = lambda e: e.composition.reduced_composition
+        min_entries = {}
+        for entry in itertools.chain(old_stable, self.el_refs.values(),
+                                     below_hull):
+            c = get_reduced_comp(entry)
+            if c not in min_entries or \
+                    entry.energy_per_atom < min_entries[c].energy_per_atom:
+                min_entries[c] = entry
+
+        min_entries = sorted(min_entries.values(), key=get_reduced_comp)
+        self.el_refs = {e.composition.elements[0]: e for e in min_entries
+                        if e.composition.is_element}
+        self._compute_hull(min_entries)
+
+        new_stable = self.stable_entries
+        return new_stable - old_stable, old_stable - new_stable
+
     @property
     def all_entries_hulldata(self):
         data = []
@@ -300,6 +362,16 @@ class GrandPotentialPhaseDiagram(PhaseDiagram):
                 all_entries.append(GrandPotPDEntry(e, self.chempots))
         super(GrandPotentialPhaseDiagram, self).__init__(all_entries, elements)
 
+    def add_entries(self, entries):
+        """
+        Adds new entries to the phase diagram. See PhaseDiagram.add_entries.
+        The entries are converted to GrandPotPDEntries and the entries
+        containing only open elements are ignored.
+        """
+        entries = [GrandPotPDEntry(e, self.chempots) for e in entries
+                   if set(e.composition.elements).intersection(self.elements)]
+        return super(GrandPotentialPhaseDiagram, self).add_entries(entries)
+
     def __str__(self):
         output = []
         chemsys = "-".join([el.symbol for el in self.elements])
@@ -361,6 +433,19 @@ class CompoundPhaseDiagram(PhaseDiagram):
         super(CompoundPhaseDiagram, self).__init__(
             pentries, elements=species_mapping.values())
 
+    def add_entries(self, entries):
+        """
+        Adds new entries to the phase diagram. See PhaseDiagram.add_entries.
+        The entries are transformed to the composition coordinate in the
+        terminal compositions and the entries outside the phase space are
+        ignored.
+        """
+        entries = list(entries)
+        self.original_entries = list(self.original_entries) + entries
+        pentries = self.transform_entries(entries,
+                                          self.terminal_compositions)[0]
+        return super(CompoundPhaseDiagram, self).add_entries(pentries)
+
     def transform_entries(self, entries, terminal_compositions):
         """
         Method to transform all entries to the composition coordinate in the
@@ -428,6 +513,110 @@ class CompoundPhaseDiagram(PhaseDiagram):
                    d["normalize_terminal_compositions"])
 
 
+class PhaseDiagramCollection(object):
+    """
+    Collection of the phase diagrams of the chemical subsystems of a set of
+    entries, e.g. all the binaries and ternaries of a large chemical space.
+    The entries are indexed by chemical system once and the phase diagrams
+    are built lazily and kept in a cache of bounded size.
+
+    The phase diagram of a system is built from the entries containing all
+    its elements and the stable entries of its subsystems obtained one
+    element less (which are cached as well), since entries that are unstable
+    in a subsystem are also unstable in the larger system. Note that the
+    all_entries attribute of these phase diagrams only contains these
+    entries.
+    """
+
+    def __init__(self, entries, max_cache_size=256):
+        """
+        Args:
+            entries ([PDEntry]): A list of PDEntry-like objects having an
+                energy, energy_per_atom and composition.
+            max_cache_size (int): Maximum number of phase diagrams kept in
+                memory. The least recently used ones are removed first.
+        """
+        self.max_cache_size = max_cache_size
+        self._entries_by_chemsys = collections.defaultdict(list)
+        for entry in entries:
+            chemsys = frozenset(entry.composition.elements)
+            self._entries_by_chemsys[chemsys].append(entry)
+        self._cache = collections.OrderedDict()
+
+    @property
+    def elements(self):
+        """All the elements of the entries."""
+        return sorted(set(itertools.chain(*self._entries_by_chemsys.keys())))
+
+    def get_entries(self, elements):
+        """
+        Returns all the entries whose elements are a subset of elements.
+        """
+        elements = set(get_el_sp(el) for el in elements)
+        return [entry for chemsys, entries in self._entries_by_chemsys.items()
+                if chemsys.issubset(elements) for entry in entries]
+
+    def get_phase_diagram(self, elements):
+        """
+        Returns the PhaseDiagram of a chemical system.
+
+        Args:
+            elements ([Element]): Elements (or symbols) of the system.
+        """
+        chemsys = frozenset(get_el_sp(el) for el in elements)
+        # The diagrams of the subsystems are kept in built until the end of
+        # the construction so that they are computed only once, whatever the
+        # size of the cache.
+        built = {}
+        pd = self._get_phase_diagram(chemsys, built)
+        for sub_chemsys, sub_pd in built.items():
+            if sub_chemsys != chemsys:
+                self._cache[sub_chemsys] = sub_pd
+        # The requested diagram is the most recently used one.
+        self._cache.pop(chemsys, None)
+        self._cache[chemsys] = pd
+        while len(self._cache) > self.max_cache_size:
+            self._cache.popitem(last=False)
+        return pd
+
+    def _get_phase_diagram(self, chemsys, built):
+        """
+        Returns the PhaseDiagram of chemsys, building it (and the diagrams of
+        its subsystems) if it is not in the cache or in built.
+        """
+        if chemsys in built:
+            return built[chemsys]
+        if chemsys in self._cache:
+            # Move to the end of the queue of the most recently used.
+            pd = self._cache.pop(chemsys)
+            self._cache[chemsys] = pd
+            built[chemsys] = pd
+            return pd
+
+        entries = list(self._entries_by_chemsys.get(chemsys, []))
+        if len(chemsys) > 1:
+            stable_entries = set()
+            for el in chemsys:
+                sub_pd = self._get_phase_diagram(chemsys.difference([el]),
+                                                 built)
+                stable_entries.update(sub_pd.stable_entries)
+            entries.extend(stable_entries)
+
+        pd = PhaseDiagram(entries, elements=sorted(chemsys))
+        built[chemsys] = pd
+        return pd
+
+    def __getitem__(self, elements):
+        return self.get_phase_diagram(elements)
+
+    def __len__(self):
+        return len(self._cache)
+
+    def clear_cache(self):
+        """Removes all the phase diagrams from the cache."""
+        self._cache.clear()
+
+
 class PhaseDiagramError(Exception):
     """
     An exception class for Phase Diagram generation.
@@ -35,6 +35,16 @@ class PDAnalyzerTest(unittest.TestCase):
                 self.assertGreaterEqual(e_ah, 0)
                 self.assertTrue(isinstance(e_ah, Number))
 
+    def test_get_e_above_hull_batch(self):
+        entries = self.pd.all_entries
+        ehulls = self.analyzer.get_e_above_hull_batch(entries)
+        self.assertEqual(len(ehulls), len(entries))
+        for entry, e_ah in zip(entries, ehulls):
+            self.assertAlmostEqual(e_ah, self.analyzer.get_e_above_hull(entry))
+        self.assertEqual(len(self.analyzer.get_e_above_hull_batch([])), 0)
+        self.assertRaises(ValueError, self.analyzer.get_e_above_hull_batch,
+                          [PDEntry(Composition("NaCl"), -10)])
+
     def test_get_equilibrium_reaction_energy(self):
         for entry in self.pd.stable_entries:
             self.assertLessEqual(
@@ -10,7 +10,8 @@ import os
 from pymatgen import Element, Composition
 from pymatgen.phasediagram.entries import PDEntryIO, PDEntry
 from pymatgen.phasediagram.maker import PhaseDiagram, \
-    GrandPotentialPhaseDiagram, CompoundPhaseDiagram, PhaseDiagramError
+    GrandPotentialPhaseDiagram, CompoundPhaseDiagram, PhaseDiagramError, \
+    PhaseDiagramCollection
 from pymatgen.phasediagram.analyzer import PDAnalyzer
 from pymatgen.phasediagram.plotter import PDPlotter
 
@@ -76,6 +77,51 @@ class PhaseDiagramTest(unittest.TestCase):
     def test_all_entries_hulldata(self):
         self.assertEqual(len(self.pd.all_entries_hulldata), 492)
 
+    def test_add_entries(self):
+        new_formulas = ["LiFeO2", "Fe3O4"]
+        new_entries = [e for e in self.entries
+                       if e.composition.reduced_formula in new_formulas]
+        pd = PhaseDiagram([e for e in self.entries if e not in new_entries])
+        old_stable = pd.stable_entries
+
+        # Entries above the hull do not change the stable entries.
+        unstable = [PDEntry(e.composition, e.energy + 100)
+                    for e in new_entries]
+        self.assertEqual(pd.add_entries(unstable), (set(), set()))
+        self.assertEqual(pd.stable_entries, old_stable)
+
+        newly_stable, no_longer_stable = pd.add_entries(new_entries)
+        self.assertEqual(pd.stable_entries, self.pd.stable_entries)
+        self.assertEqual(set(e.composition.reduced_formula
+                             for e in newly_stable), set(new_formulas))
+        self.assertEqual(no_longer_stable, old_stable - pd.stable_entries)
+        self.assertEqual(len(pd.all_entries),
+                         len(self.entries) + len(unstable))
+        self.assertRaises(PhaseDiagramError, pd.add_entries,
+                          [PDEntry("NaCl", -10)])
+
+    def test_add_entries_analyzer(self):
+        # An analyzer created before add_entries uses the updated hull.
+        new_entries = [e for e in self.entries
+                       if e.composition.reduced_formula in ["LiFeO2", "Fe3O4"]]
+        pd = PhaseDiagram([e for e in self.entries if e not in new_entries])
+        analyzer = PDAnalyzer(pd)
+        ref_analyzer = PDAnalyzer(self.pd)
+        comp = Composition("Li3Fe7O11")
+        analyzer.get_decomposition(comp)
+        analyzer.get_e_above_hull_batch(self.entries[:5])
+        pd.add_entries(new_entries)
+        decomp = {e.composition.reduced_formula: amt
+                  for e, amt in analyzer.get_decomposition(comp).items()}
+        ref_decomp = {e.composition.reduced_formula: amt
+                      for e, amt in ref_analyzer.get_decomposition(comp).items()}
+        self.assertEqual(set(decomp.keys()), set(ref_decomp.keys()))
+        for k, v in ref_decomp.items():
+            self.assertAlmostEqual(decomp[k], v)
+        for e_ah, ref_e_ah in zip(analyzer.get_e_above_hull_batch(self.entries),
+                                  ref_analyzer.get_e_above_hull_batch(self.entries)):
+            self.assertAlmostEqual(e_ah, ref_e_ah)
+
     def test_planar_inputs(self):
         e1 = PDEntry('H',    0)
         e2 = PDEntry('He',   0)
@@ -94,6 +140,38 @@ class PhaseDiagramTest(unittest.TestCase):
         self.assertIsNotNone(str(self.pd))
 
 
+class PhaseDiagramCollectionTest(unittest.TestCase):
+
+    def setUp(self):
+        module_dir = os.path.dirname(os.path.abspath(__file__))
+        (self.elements, self.entries) = \
+            PDEntryIO.from_csv(os.path.join(module_dir, "pdentries_test.csv"))
+        self.pd = PhaseDiagram(self.entries)
+        self.pds = PhaseDiagramCollection(self.entries, max_cache_size=4)
+
+    def test_get_phase_diagram(self):
+        self.assertEqual(set(self.pds.elements), set(self.pd.elements))
+        pd = self.pds.get_phase_diagram(["Li", "Fe", "O"])
+        self.assertEqual(pd.stable_entries, self.pd.stable_entries)
+        self.assertIs(self.pds[[Element("O"), "Fe", "Li"]], pd)
+        self.assertLessEqual(len(self.pds), 4)
+
+        for elements in [["Li", "O"], ["Fe", "O"], ["Li"]]:
+            entries = self.pds.get_entries(elements)
+            self.assertEqual(self.pds[elements].stable_entries,
+                             PhaseDiagram(entries).stable_entries)
+
+        self.pds.clear_cache()
+        self.assertEqual(len(self.pds), 0)
+
+    def test_small_cache(self):
+        pds = PhaseDiagramCollection(self.entries, max_cache_size=1)
+        pd = pds.get_phase_diagram(["Li", "Fe", "O"])
+        self.assertEqual(pd.stable_entries, self.pd.stable_entries)
+        self.assertEqual(len(pds), 1)
+        self.assertIs(pds[["Li", "Fe", "O"]], pd)
+
+
 class GrandPotentialPhaseDiagramTest(unittest.TestCase):
 
     def setUp(self):
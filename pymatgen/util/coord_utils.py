@@ -321,6 +321,141 @@ def lattice_points_in_supercell(supercell_matrix):
     return tvects
 
 
+def find_points_in_spheres(lattice, frac_points, center_coords, r,
+                           method="cell_list"):
+    """
+    Finds all periodic images of a set of points that lie within a sphere of
+    radius r around each of a set of centers. Only the periodic images that
+    can fall within r of at least one center are generated, and the pairs
+    are then found either with a linked-cell list or a kd-tree, so that the
+    cost scales linearly with the number of points for a fixed cutoff
+    instead of with the number of points times the number of images.
+
+    Args:
+        lattice (Lattice): Lattice defining the periodic boundary conditions.
+        frac_points: Fractional coordinates of the points, shape (n, 3).
+        center_coords: Cartesian coordinates of the sphere centers, shape
+            (m, 3).
+        r (float): Radius of the spheres.
+        method (str): Pair search algorithm. Either "cell_list" (linked-cell
+            list, the default) or "kdtree" (scipy's cKDTree).
+
+    Returns:
+        (center_indices, point_indices, images, distances), where
+        center_indices and point_indices are int arrays, images is an
+        (npairs, 3) int array of lattice translations such that the
+        neighbor is located at frac_points[point_indices] + images, and
+        distances is a float array. Pairs are sorted by center index and
+        then by point index.
+    """
+    frac_points = np.reshape(np.array(frac_points, dtype=np.float64), (-1, 3))
+    centers = np.reshape(np.array(center_coords, dtype=np.float64), (-1, 3))
+    r = float(r)
+    if len(frac_points) == 0 or len(centers) == 0 or r < 0:
+        return (np.zeros(0, dtype=np.int), np.zeros(0, dtype=np.int),
+                np.zeros((0, 3), dtype=np.int), np.zeros(0))
+
+    # Work with points wrapped into the unit cell and correct the images at
+    # the end so that they refer to the coordinates as given.
+    offsets = np.floor(frac_points)
+    fcoords = frac_points - offsets
+
+    # Lattice translations that can bring a point within r of any center.
+    pcoords = lattice.get_fractional_coords(centers)
+    recp_len = np.array(lattice.reciprocal_lattice_crystallographic.abc)
+    nmax = r * recp_len + 0.01
+    mins = np.floor(np.min(pcoords, axis=0) - nmax)
+    maxes = np.ceil(np.max(pcoords, axis=0) + nmax)
+    all_images = np.array(list(itertools.product(
+        *[np.arange(lo, hi) for lo, hi in zip(mins, maxes)])))
+
+    # Only keep the periodic images inside the bounding box of the spheres.
+    cart_points = lattice.get_cartesian_coords(fcoords)
+    cart_images = lattice.get_cartesian_coords(all_images)
+    box_min = np.min(centers, axis=0) - r - 1e-8
+    box_max = np.max(centers, axis=0) + r + 1e-8
+    expanded = []
+    for i, cart_image in enumerate(cart_images):
+        coords = cart_points + cart_image
+        inside = np.where(np.all((coords >= box_min) & (coords <= box_max),
+                                 axis=1))[0]
+        if len(inside):
+            expanded.append((coords[inside], inside,
+                             np.repeat(i, len(inside))))
+    if not expanded:
+        return (np.zeros(0, dtype=np.int), np.zeros(0, dtype=np.int),
+                np.zeros((0, 3), dtype=np.int), np.zeros(0))
+    exp_coords = np.concatenate([e[0] for e in expanded])
+    exp_indices = np.concatenate([e[1] for e in expanded])
+    exp_images = np.concatenate([e[2] for e in expanded])
+
+    if method == "cell_list":
+        cinds, pinds = _cell_list_pairs(centers, exp_coords, r, box_min)
+    elif method == "kdtree":
+        from scipy.spatial import cKDTree
+        found = cKDTree(exp_coords).query_ball_point(centers, r)
+        counts = np.array([len(f) for f in found], dtype=np.int)
+        cinds = np.repeat(np.arange(len(centers)), counts)
+        pinds = np.array([i for f in found for i in f], dtype=np.int)
+    else:
+        raise ValueError("Unknown neighbor search method %s" % method)
+
+    dists = np.sqrt(np.sum((exp_coords[pinds] - centers[cinds]) ** 2,
+                           axis=1))
+    within_r = dists <= r
+    cinds, pinds, dists = cinds[within_r], pinds[within_r], dists[within_r]
+    point_indices = exp_indices[pinds]
+    images = all_images[exp_images[pinds]] - offsets[point_indices]
+    images = np.round(images).astype(np.int)
+
+    order = np.lexsort((images[:, 2], images[:, 1], images[:, 0],
+                        point_indices, cinds))
+    return cinds[order], point_indices[order], images[order], dists[order]
+
+
+def _cell_list_pairs(centers, points, r, origin):
+    """
+    Candidate (center, point) pairs from a linked-cell list with cubic cells
+    of edge r. Every pair of points within r of each other is returned,
+    together with some pairs that are further apart.
+    """
+    cell_size = r if r > 0 else 1.0
+    pcells = np.floor((points - origin) / cell_size).astype(np.int)
+    ccells = np.floor((centers - origin) / cell_size).astype(np.int)
+    ncells = np.maximum(np.max(pcells, axis=0), np.max(ccells, axis=0)) + 3
+    # Shift by one so that the cells neighboring the centers never have
+    # negative or out of range indices.
+    pcells += 1
+    ccells += 1
+
+    def cell_ids(cells):
+        return (cells[:, 0] * ncells[1] + cells[:, 1]) * ncells[2] + \
+            cells[:, 2]
+
+    pids = cell_ids(pcells)
+    order = np.argsort(pids, kind="mergesort")
+    sorted_ids = pids[order]
+
+    all_cinds = []
+    all_pinds = []
+    for shift in itertools.product([-1, 0, 1], repeat=3):
+        nids = cell_ids(ccells + shift)
+        starts = np.searchsorted(sorted_ids, nids, side="left")
+        ends = np.searchsorted(sorted_ids, nids, side="right")
+        counts = ends - starts
+        total = np.sum(counts)
+        if total == 0:
+            continue
+        cinds = np.repeat(np.arange(len(centers)), counts)
+        first = np.cumsum(counts) - counts
+        positions = np.arange(total) - np.repeat(first - starts, counts)
+        all_cinds.append(cinds)
+        all_pinds.append(order[positions])
+    if not all_cinds:
+        return np.zeros(0, dtype=np.int), np.zeros(0, dtype=np.int)
+    return np.concatenate(all_cinds), np.concatenate(all_pinds)
+
+
 def barycentric_coords(coords, simplex):
     """
     Converts a list of coordinates to barycentric coordinates, given a
@@ -220,6 +220,27 @@ class CoordUtilsTest(PymatgenTest):
 
         coord_utils.LOOP_THRESHOLD = prev_threshold
 
+    def test_find_points_in_spheres(self):
+        lattice = Lattice.from_lengths_and_angles([8, 8, 4], [90, 76, 58])
+        fcoords = np.array([[0.3, 0.3, 0.5],
+                            [0.1, 0.1, 0.3],
+                            [1.9, 0.9, -0.2],
+                            [0.1, 0.0, 0.5]])
+        centers = lattice.get_cartesian_coords([[0.3, 0.3, 0.5],
+                                                [0.5, 0.5, 0.5]])
+        for method in ["cell_list", "kdtree"]:
+            cinds, pinds, images, dists = find_points_in_spheres(
+                lattice, fcoords, centers, 5.5, method=method)
+            pos = lattice.get_cartesian_coords(fcoords[pinds] + images)
+            self.assertArrayAlmostEqual(
+                np.sum((pos - centers[cinds]) ** 2, axis=1) ** 0.5, dists)
+            for i, center in enumerate(centers):
+                ref = lattice.get_points_in_sphere(fcoords, center, 5.5)
+                self.assertArrayAlmostEqual(sorted(dists[cinds == i]),
+                                            sorted([d for _, d, _ in ref]))
+        self.assertRaises(ValueError, find_points_in_spheres, lattice,
+                          fcoords, centers, 5.5, method="foo")
+
     def test_get_angle(self):
         v1 = (1, 0, 0)
         v2 = (1, 1, 1)